@@ -1,6 +1,7 @@
 import os
 import json
 import subprocess
+import threading
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
@@ -12,8 +13,10 @@ from video_extraction.compacted_transcript import TranscriptSegmenter
 from video_extraction.comment_analyzer import CommentAnalyzer
 from video_extraction.utils.check_video_exits import check_video_exists
 from video_extraction.utils.check_comment_analysis_exists import check_analysis_exists
-from valkey_rest.crud import valkey_get, valkey_set, valkey_delete, valkey_exists
-from video_extraction.fact_checker import FactChecker
+from valkey_rest.crud import valkey_get, valkey_set, valkey_delete, valkey_exists, ping, pool_stats
+from video_extraction.fact_checker import FactChecker, FactCheckStream
+from video_extraction.token_budget import TokenBudget
+from video_extraction import claim_cache, gemini_cache, gemini_client, search_index
 
 os.environ["PYTHONUTF8"] = "1"
 
@@ -55,6 +58,20 @@ def check_status():
     }), 200
 
 
+def run_summarization(segmenter, vtt_path, output_path, video_id, stream=None, preview=True):
+    """Summarizes the transcript; with a FactCheckStream, fact checks segments as they finish"""
+    try:
+        segmenter.process_file(vtt_path, output_path, video_id=video_id, preview=preview,
+                               on_segment=stream.add_segment if stream else None)
+    except Exception:
+        # A fact check of only the segments that made it would be saved as final
+        if stream is not None:
+            stream.abort("summarization failed")
+        raise
+    if stream is not None:
+        stream.finish()
+
+
 @app.route('/extract_video_info', methods=['POST', 'OPTIONS'])
 def extract_video_info():
     """
@@ -62,6 +79,11 @@ def extract_video_info():
     1. Download Video Data
     2. Clean Transcript
     3. Segment & Summarize Transcript (AI)
+
+    With {"background_summary": true} the extractive preview is published and the
+    request returns immediately, while the Gemini summaries run in a background thread.
+    With {"stream_fact_check": true} each segment is fact checked as soon as it is
+    summarized; /fact_check returns the verdicts so far until the video is done.
     """
     if request.method == 'OPTIONS':
         return '', 204
@@ -121,9 +143,22 @@ def extract_video_info():
     try:
         if vtt_path and os.path.exists(vtt_path):
             segmenter = TranscriptSegmenter(api_key=GEMINI_API_KEY)
-            # This processes the file and saves the JSON to segmented_json_path
-            segmenter.process_file(
-                vtt_path, segmented_json_path, video_id=video_id)
+            stream = None
+            if data.get('stream_fact_check'):
+                stream = FactCheckStream(
+                    FactChecker(), video_id, os.path.join(folder_path, f"{video_id}_factcheck.json"),
+                    source_file=os.path.basename(vtt_path))
+            if data.get('background_summary') and segmenter.use_ai:
+                segmenter.publish_preview(vtt_path, video_id)
+                threading.Thread(
+                    target=run_summarization,
+                    args=(segmenter, vtt_path, segmented_json_path, video_id, stream),
+                    kwargs={"preview": False},
+                    daemon=True
+                ).start()
+            else:
+                # This processes the file and saves the JSON to segmented_json_path
+                run_summarization(segmenter, vtt_path, segmented_json_path, video_id, stream)
         else:
             print("No VTT file found, skipping summarization.")
     except Exception as e:
@@ -136,6 +171,48 @@ def extract_video_info():
     }), 200
 
 
+@app.route('/retry_segments', methods=['POST', 'OPTIONS'])
+def retry_segments():
+    """
+    Re-summarizes failed (or explicitly listed) transcript segments of a video.
+    Request: {"video_id": "...", "segment_ids": [2, 5]}  (segment_ids optional)
+    """
+    if request.method == 'OPTIONS':
+        return '', 204
+
+    data = request.json
+    video_id = data.get('video_id')
+
+    if not video_id:
+        return jsonify({"error": "No video_id provided"}), 400
+
+    segment_ids = data.get('segment_ids')
+    if segment_ids is not None and not (
+            isinstance(segment_ids, list)
+            and all(isinstance(s, int) and not isinstance(s, bool) for s in segment_ids)):
+        return jsonify({"error": "segment_ids must be a list of integers"}), 400
+
+    segmented_json_path = os.path.join(
+        DOWNLOAD_FOLDER, video_id, f"{video_id}_segmented_summary.json")
+    output_path = segmented_json_path if os.path.exists(
+        os.path.dirname(segmented_json_path)) else None
+
+    try:
+        segmenter = TranscriptSegmenter(api_key=GEMINI_API_KEY)
+        result = segmenter.retry_failed_segments(
+            video_id, segment_ids=segment_ids, output_path=output_path)
+        if not result:
+            return jsonify({"error": "Segmented summary or transcript not found. Run extraction first."}), 404
+
+        return jsonify({
+            "status": "success",
+            "video_id": video_id,
+            "failed_segments": result.get("failed_segments", [])
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Segment retry failed: {str(e)}"}), 500
+
+
 @app.route('/analyze/quality', methods=['POST', 'OPTIONS'])
 def analyze_twelve_labs():
     """
@@ -235,6 +312,14 @@ def analyze_comments():
     # 2. Check if analysis already exists
     exists, analysis_path = check_analysis_exists(video_id, DOWNLOAD_FOLDER)
 
+    if exists and data.get('refresh'):
+        # Merge only the comments posted since the last run into the stored analysis
+        try:
+            analyzer = CommentAnalyzer(api_key=GEMINI_API_KEY)
+            return jsonify(analyzer.refresh(video_id, output_path=analysis_path)), 200
+        except Exception as e:
+            return jsonify({"error": f"Comment refresh failed: {str(e)}"}), 500
+
     if exists:
         print(f"Returning cached analysis for {video_id}")
         return jsonify(valkey_get(f"{video_id}_analysis.json")), 200
@@ -256,8 +341,9 @@ def analyze_comments():
         # Run process (saves to analysis_path internally)
         # analyzer.run(metadata_path, transcript_path=transcript_arg,
         #              output_path=analysis_path)
+        # "mode": "map_reduce" analyzes every comment instead of a representative sample
         analyzer.run(video_id,
-                     output_path=analysis_path, input_path=metadata_path)
+                     output_path=analysis_path, input_path=metadata_path, mode=data.get('mode'))
 
         # Load and return the newly created file
         with open(analysis_path, 'r', encoding='utf-8') as f:
@@ -272,6 +358,61 @@ def ping_route():
     return jsonify({"status": "ok", "valkey": ping()})
 
 
+@app.route("/stats/gemini_cache", methods=["GET"])
+def gemini_cache_stats():
+    """Hit ratio of the shared Gemini response cache, per call site."""
+    cache = gemini_cache.get_response_cache()
+    if cache is None:
+        return jsonify({"enabled": False, "call_sites": {}})
+    return jsonify({"enabled": True, "call_sites": cache.stats()})
+
+
+@app.route("/search", methods=["GET"])
+def search_route():
+    """
+    BM25 search over all processed transcripts and segment summaries.
+        Sample usage:
+        curl "http://localhost:5002/search?q=inflation+federal+reserve&limit=10"
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+
+    limit = request.args.get("limit", 10, type=int)
+    limit = max(1, min(limit, 100))
+    return jsonify(search_index.search(query, limit=limit))
+
+
+@app.route("/token_usage/<video_id>", methods=["GET"])
+def token_usage_route(video_id):
+    """Gemini token usage recorded for a video, per pipeline stage."""
+    budget = TokenBudget.for_video(video_id)
+    if not budget.usage:
+        return jsonify({"error": "No token usage recorded for this video"}), 404
+    return jsonify(budget.report())
+
+
+@app.route("/stats/claim_cache", methods=["GET"])
+def claim_cache_stats():
+    """Hit rate of the claim -> search results cache."""
+    cache = claim_cache.get_claim_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(enabled=True, **cache.stats()))
+
+
+@app.route("/stats/gemini_client", methods=["GET"])
+def gemini_client_stats():
+    """Shared Gemini client pool, rate limiter queue depth and retry counters."""
+    return jsonify(gemini_client.stats())
+
+
+@app.route("/stats/valkey_pool", methods=["GET"])
+def valkey_pool_stats():
+    """Valkey connection pool utilization of this worker process."""
+    return jsonify(pool_stats())
+
+
 @app.route("/get/<key>", methods=["GET"])
 def get_route(key):
     """
@@ -308,6 +449,7 @@ def delete_route(key):
         curl -X DELETE http://localhost:5000/delete/key1 
     """
     deleted = valkey_delete(key)
+    search_index.remove_video(key)
     return jsonify({"deleted": deleted})
 
 
@@ -342,6 +484,11 @@ def fact_check_video():
 
     try:
         if fact_check_json is None:
+            # A streaming fact check is still running: return the verdicts so far
+            partial = valkey_get(video_id + "_fact_check_partial.json")
+            if partial is not None:
+                return jsonify(json.loads(partial) if isinstance(partial, str) else partial), 200
+
             # 4. Check Prerequisites
             if not os.path.exists(summary_path):
                 return jsonify({
@@ -0,0 +1,23 @@
+"""
+Shared fixtures: every test gets its own in-memory Valkey (fakeredis) behind
+valkey_rest.crud's lazy client, so no server or VALKEY_* settings are needed.
+"""
+
+import os
+import sys
+
+import fakeredis
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valkey_rest import crud  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def valkey(monkeypatch):
+    """Fresh fakeredis client installed as crud's process client"""
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    monkeypatch.setattr(crud, "_client", client)
+    monkeypatch.setattr(crud, "_pid", os.getpid())
+    return client
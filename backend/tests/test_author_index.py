@@ -0,0 +1,29 @@
+from video_extraction import author_index
+from video_extraction.author_index import fingerprint, index_comments, author_activity
+
+COPY = "Make $5000 a week from home with this one simple trick"
+
+
+def test_fingerprint_is_64_bit_and_skips_short_texts():
+    assert len(fingerprint(COPY)) == 16
+    assert fingerprint(COPY) == fingerprint(COPY.upper() + "!")
+    assert fingerprint("first") is None
+
+
+def test_copy_paste_across_videos_is_flagged(monkeypatch):
+    monkeypatch.setattr(author_index, "FANOUT_THRESHOLD", 2)
+    index_comments("v1", ["@spam", "@fan"], [COPY, "first"])
+    index_comments("v2", ["@spam", "@fan"], ["something else entirely here", "first"])
+
+    report = author_activity("v3", ["@spam", "@fan"], [COPY, "first"], threshold=2)
+    assert report["cross_video_copy_paste_authors"] == 1
+    assert {a["author"] for a in report["top_authors"]} == {"@spam", "@fan"}
+    assert [a["repeats_text_across_videos"] for a in report["top_authors"] if a["author"] == "@fan"] == [False]
+
+
+def test_flagged_channels_show_their_display_name():
+    index_comments("v1", ["UC1"], ["hello there"])
+    report = author_activity("v2", ["UC1", "UC1"], ["a", "b"], threshold=1, names=["@sam", "@sam_renamed"])
+    assert report["top_authors"][0]["author"] == "UC1"
+    assert report["top_authors"][0]["name"] == "@sam"
+    assert report["top_authors"][0]["comments_here"] == 2
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from valkey_rest import crud
+from video_extraction import checkability_triage
+from video_extraction.checkability_triage import CheckabilityTriage, example_fields, record_example
+
+LEXICON = {"news": ["news", "election", "president", "inflation"],
+           "entertainment": ["gameplay", "minecraft", "music video"]}
+
+
+def fields(title, tags=(), topics=()):
+    segments = [{"analysis": {"topic": t, "entities_mentioned": []}} for t in topics]
+    return example_fields({"title": title, "tags": list(tags)}, segments)
+
+
+def test_example_fields_collect_metadata_and_segments():
+    segments = [{"analysis": {"topic": "Budget", "entities_mentioned": ["Congress"]}}, {"analysis": {}}]
+    result = example_fields({"title": "T", "tags": ["a"], "description": "d" * 5000}, segments)
+    assert result["topics"] == ["Budget"] and result["entities"] == ["Congress"]
+    assert len(result["description"]) == checkability_triage.DESCRIPTION_CHARS
+    assert example_fields(None, [])["title"] == ""
+
+
+def test_rules_skip_entertainment_and_keep_news():
+    triage = CheckabilityTriage(LEXICON)
+    gaming = triage.triage({"title": "Minecraft gameplay", "tags": ["gameplay", "minecraft"],
+                            "description": "minecraft gameplay"}, [{"analysis": {"topic": "Minecraft gameplay"}}],
+                           explore=False)
+    news = triage.triage({"title": "Election news", "tags": ["election"]}, [])
+    assert gaming["decision"] == "skip" and gaming["model"] == "rules"
+    assert news["decision"] == "extract"
+    assert news["probability"] > gaming["probability"]
+
+
+def test_training_separates_labels_and_round_trips():
+    examples = ([{**fields(f"President speech on inflation part {i}", ["politics"]), "label": True} for i in range(30)]
+                + [{**fields(f"Lofi beats to relax {i}", ["chill"]), "label": False} for i in range(30)])
+    triage = CheckabilityTriage(LEXICON)
+    report = triage.fit(examples)
+    assert report["training_accuracy"] == 1.0
+
+    triage.save_model()
+    loaded = CheckabilityTriage(LEXICON)
+    assert loaded.load_model()
+    assert loaded.probability(fields("Lofi beats to study", ["chill"])) < 0.5 < loaded.probability(
+        fields("President speech on inflation", ["politics"]))
+
+
+def test_record_example_is_capped(monkeypatch):
+    monkeypatch.setattr(checkability_triage, "MAX_EXAMPLES", 3)
+    for i in range(5):
+        record_example(fields(f"video {i}"), i % 2 == 0)
+    stored = [json.loads(e) for e in crud.valkey_lrange(checkability_triage.EXAMPLES_KEY, 0, -1)]
+    assert [e["title"] for e in stored] == ["video 4", "video 3", "video 2"]
+    assert stored[0]["label"] is True
+
+
+def test_train_needs_both_classes():
+    record_example(fields("only news"), True)
+    assert checkability_triage.train()["status"] == "skipped"
+
+
+def test_explored_skips_go_to_gemini(monkeypatch):
+    gaming = {"title": "Minecraft gameplay", "tags": ["gameplay", "minecraft"], "description": "minecraft gameplay"}
+    triage = CheckabilityTriage(LEXICON)
+    assert triage.triage(gaming, [], explore=True)["decision"] == "extract"
+    assert triage.triage(gaming, [], explore=True)["explored"] is True
+    assert triage.triage({"title": "Election news"}, [], explore=True)["explored"] is False
+
+    monkeypatch.setattr(checkability_triage, "EXPLORE_RATE", 1.0)
+    assert triage.triage(gaming, [])["decision"] == "extract"
+    monkeypatch.setattr(checkability_triage, "EXPLORE_RATE", 0.0)
+    assert triage.triage(gaming, [])["decision"] == "skip"
+
+
+def test_default_triage_reloads_a_newer_model(monkeypatch):
+    monkeypatch.setattr(checkability_triage, "_default_triage", None)
+    monkeypatch.setattr(checkability_triage, "_model_loaded_at", None)
+    monkeypatch.setattr(checkability_triage, "MODEL_RELOAD_SECONDS", 3600)
+    triage = checkability_triage.get_default_triage()
+    assert triage.weights is None
+
+    # Another process trains and stores a model
+    trained = CheckabilityTriage(LEXICON)
+    trained.fit([{**fields("President on inflation"), "label": True}, {**fields("Lofi beats"), "label": False}])
+    trained.save_model()
+    assert checkability_triage.get_default_triage().weights is None      # not due yet
+
+    monkeypatch.setattr(checkability_triage, "MODEL_RELOAD_SECONDS", 0)
+    assert checkability_triage.get_default_triage().weights is not None
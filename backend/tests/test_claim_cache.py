@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from video_extraction import claim_cache
+from video_extraction.claim_cache import ClaimEvidenceCache, normalize_claim, claim_ttl
+
+RESULTS = [{"title": "t", "snippet": "s", "source": "src", "url": "https://example.com/a"}]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Inflation hit 9.1 percent in June 2022", "inflation HIT 9.1% in june, 2022!"),
+    ("The deficit is $1,200 million", "the deficit was 1.2 billion dollars"),
+    ("Five people were hurt", "5 people were hurt"),
+])
+def test_equivalent_claims_normalize_alike(a, b):
+    assert normalize_claim(a) == normalize_claim(b)
+
+
+@pytest.mark.parametrize("claim", [
+    "The vaccine is not safe",
+    "The vaccine isn't safe",
+    "The vaccine isn’t safe",
+    "The vaccine is never safe",
+])
+def test_negation_is_kept(claim):
+    assert normalize_claim(claim) != normalize_claim("The vaccine is safe")
+    assert "vaccine" in normalize_claim(claim)
+
+
+def test_ttl_by_freshness():
+    year = datetime.now().year
+    assert claim_ttl("anything", []) == claim_cache.TTL_EMPTY
+    assert claim_ttl("Breaking: the bridge collapsed", RESULTS) == claim_cache.TTL_BREAKING
+    assert claim_ttl(f"GDP grew in {year}", RESULTS) == claim_cache.TTL_BREAKING
+    assert claim_ttl("GDP grew in 1999", RESULTS) == claim_cache.TTL_HISTORICAL
+    assert claim_ttl("GDP grew", RESULTS) == claim_cache.TTL_DEFAULT
+
+
+def test_put_then_get_from_memory_and_valkey(valkey):
+    cache = ClaimEvidenceCache()
+    assert cache.get_many(["Inflation hit 9.1% in 2022"]) == [None]
+    cache.put("Inflation hit 9.1% in 2022", RESULTS)
+
+    assert cache.get_many(["inflation hit 9.1 percent in 2022"]) == [RESULTS]
+    # A new process only has the Valkey tier
+    assert ClaimEvidenceCache().get_many(["Inflation hit 9.1% in 2022", "other"]) == [RESULTS, None]
+    assert valkey.ttl(cache.make_key("Inflation hit 9.1% in 2022")) > 0
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["valkey_hits"] == 1 and stats["stores"] == 1
+
+
+def test_keys_are_per_backend():
+    cache = ClaimEvidenceCache()
+    cache.put("Inflation hit 9.1% in 2022", RESULTS, backend="local")
+    assert cache.get_many(["Inflation hit 9.1% in 2022"], backend="duckduckgo") == [None]
+    assert cache.get_many(["Inflation hit 9.1% in 2022"], backend="local") == [RESULTS]
+
+
+def test_negated_claim_gets_its_own_entry():
+    cache = ClaimEvidenceCache()
+    cache.put("The vaccine is safe", RESULTS)
+    assert cache.get_many(["The vaccine is not safe"]) == [None]
@@ -0,0 +1,73 @@
+import pytest
+
+from video_extraction import claim_cache, claim_index
+
+STORED = [
+    {"claim": "The new vaccine is safe for children under twelve", "verdict": "True", "explanation": "trials"},
+    {"claim": "The company lost 5 billion dollars in 2023 because of the strike", "verdict": "True",
+     "explanation": "annual report"},
+]
+
+
+@pytest.fixture
+def indexed():
+    assert claim_index.add_verdicts("video1", STORED) == 2
+
+
+def test_reuses_verdict_for_the_same_claim(indexed):
+    match, = claim_index.find_matches(["The new vaccine is safe for children under twelve!"])
+    assert match["verdict"] == "True"
+    assert match["video_id"] == "video1"
+    assert match["similarity"] >= claim_index.SIMILARITY_THRESHOLD
+
+
+def test_same_numbers_in_other_formats_match(indexed):
+    match, = claim_index.find_matches(["The company lost $5 billion in 2023 because of the strike"])
+    assert match is not None and match["explanation"] == "annual report"
+
+
+@pytest.mark.parametrize("claim", [
+    "The new vaccine is not safe for children under twelve",
+    "The new vaccine isn't safe for children under twelve",
+])
+def test_negated_claim_is_not_reused(indexed, claim):
+    assert claim_index.find_matches([claim]) == [None]
+
+
+@pytest.mark.parametrize("claim", [
+    "The company lost 3 billion dollars in 2023 because of the strike",
+    "The company lost 5 billion dollars in 2022 because of the strike",
+    "The company lost 5 billion dollars because of the strike",
+])
+def test_different_numbers_are_not_reused(indexed, claim):
+    assert claim_index.find_matches([claim]) == [None]
+
+
+def test_only_definite_verdicts_are_indexed():
+    added = claim_index.add_verdicts("video2", [
+        {"claim": "Unemployment fell to 3.5% last year", "verdict": "Unverified", "explanation": ""},
+        {"claim": "The mayor resigned on Monday morning", "verdict": "False", "explanation": "",
+         "reused_from": "video1"},
+    ])
+    assert added == 0
+    assert claim_index.find_matches(["Unemployment fell to 3.5% last year"]) == [None]
+
+
+def test_empty_input():
+    assert claim_index.find_matches([]) == []
+    assert claim_index.add_verdicts("video", []) == 0
+
+
+def test_entries_expire_like_their_search_results(valkey):
+    evidence = [{"title": "t", "snippet": "long text", "source": "Reuters", "url": "https://reuters.com/a"}]
+    claim_index.add_verdicts("video1", [
+        {"claim": "The bridge was opened to traffic in 1937", "verdict": "True"},
+        {"claim": "Breaking: the bridge is closed to traffic today", "verdict": "True"},
+    ], {"The bridge was opened to traffic in 1937": evidence,
+        "Breaking: the bridge is closed to traffic today": evidence})
+
+    ttls = sorted(valkey.ttl(k) for k in valkey.keys("claim_index:claim:*"))
+    assert ttls[0] <= claim_cache.TTL_BREAKING < ttls[1] <= claim_cache.TTL_HISTORICAL
+
+    match, = claim_index.find_matches(["The bridge was opened to traffic in 1937"])
+    assert match["evidence"] == [{"title": "t", "source": "Reuters", "url": "https://reuters.com/a"}]
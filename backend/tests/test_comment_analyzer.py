@@ -0,0 +1,25 @@
+import pytest
+
+from video_extraction.comment_analyzer import CommentAnalyzer, _as_int
+
+
+@pytest.fixture
+def analyzer():
+    return CommentAnalyzer(api_key=None)
+
+
+@pytest.mark.parametrize("value, expected", [(12, 12), (12.7, 12), ("12", 12), (None, 0),
+                                             ("high", None), ([1], None), (True, None), ("nan", None)])
+def test_as_int(value, expected):
+    assert _as_int(value) == expected
+
+
+def test_malformed_chunk_counts_are_rejected(analyzer):
+    assert analyzer._validate_chunk({"sentiment_counts": {"positive": "many"}, "bot_count": 0}) is None
+    assert analyzer._validate_chunk({"bot_count": {"n": 1}}) is None
+    assert analyzer._validate_chunk(["not", "a", "dict"]) is None
+
+    valid = analyzer._validate_chunk({"sentiment_counts": {"positive": "3", "negative": 1.0},
+                                      "bot_count": "2", "engagement_score": 40})
+    assert valid["sentiment_counts"] == {"positive": 3, "negative": 1, "neutral": 0}
+    assert analyzer._normalize_counts(valid["sentiment_counts"], 10) == {"positive": 3, "negative": 1, "neutral": 6}
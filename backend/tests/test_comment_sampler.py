@@ -0,0 +1,58 @@
+from video_extraction.comment_sampler import CommentSampler, author_key, flatten_comments, vectorize
+from video_extraction.token_budget import estimate_tokens
+
+
+def comment(text, likes=0, author="a", replies=()):
+    return {"text": text, "likes": likes, "author": author, "replies": list(replies)}
+
+
+COMMENTS = (
+    [comment(f"the audio quality is bad in part {i}", likes=i) for i in range(30)]
+    + [comment(f"great explanation of the math {i}", likes=i) for i in range(10)]
+    + [comment("🔥🔥"), comment("👍", replies=[comment("the audio quality is bad", author="b")])]
+)
+
+
+def test_flatten_marks_replies():
+    flat = flatten_comments([comment("top", replies=[comment("reply", likes=None)])])
+    assert [(c["text"], c["is_reply"], c["likes"]) for c in flat] == [("top", False, 0), ("reply", True, 0)]
+
+
+def test_author_key_prefers_the_channel_id():
+    flat = flatten_comments([{**comment("top"), "author_id": "UC1"}])
+    assert author_key(flat[0]) == "UC1"
+    assert author_key(comment("old summary without ids")) == "a"
+
+
+def test_vectors_are_unit_length():
+    matrix, labels = vectorize(["audio quality", "", "audio"])
+    norms = (matrix ** 2).sum(axis=1)
+    assert abs(norms[0] - 1) < 1e-5 and norms[1] == 0 and abs(norms[2] - 1) < 1e-5
+    assert "audio" in labels.values()
+
+
+def test_clusters_cover_every_comment():
+    flat = flatten_comments(COMMENTS)
+    clusters = CommentSampler(num_clusters=3).cluster(flat)
+    assert sorted(i for c in clusters for i in c["members"]) == list(range(len(flat)))
+    assert [c["rank"] for c in clusters] == list(range(1, len(clusters) + 1))
+    assert clusters[0]["size"] >= clusters[-1]["size"]
+
+
+def test_sample_fits_the_token_allowance():
+    sampler = CommentSampler(num_clusters=3)
+    for max_tokens in (60, 200, 2000):
+        sample = sampler.sample(COMMENTS, max_tokens=max_tokens)
+        assert sample["total"] == 43
+        assert estimate_tokens(sampler.format_for_prompt(sample)) <= max_tokens + 5
+
+
+def test_sample_gives_every_cluster_a_voice():
+    sample = CommentSampler(num_clusters=3).sample(COMMENTS, max_tokens=2000)
+    assert len(sample["clusters"]) >= 3
+    texts = [c["text"] for cluster in sample["clusters"] for c in cluster["comments"]]
+    assert len(texts) == len(set(texts))
+
+
+def test_no_comments():
+    assert CommentSampler().sample([], max_tokens=100) == {"total": 0, "clusters": []}
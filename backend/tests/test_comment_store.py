@@ -0,0 +1,62 @@
+from video_extraction.comment_store import CommentColumns, store_comments, load_comments
+
+RAW = [
+    {"id": "r1", "text": "reply first", "author": "@b", "like_count": 1, "timestamp": 20, "parent": "c1"},
+    {"id": "c1", "text": "top comment", "author": "@a", "like_count": 5, "timestamp": 10, "parent": "root"},
+    {"id": "c2", "text": "émoji ✓ comment", "author": "@a", "like_count": 9, "timestamp": 30, "parent": "root"},
+]
+
+
+def test_parents_resolve_even_when_replies_come_first():
+    columns = CommentColumns.from_raw(RAW)
+    assert len(columns) == 3
+    assert columns.parents[columns.index_of("r1")] == columns.index_of("c1")
+    assert columns.author(columns.index_of("c2")) == "@a"
+    assert len(columns.authors) == 2
+
+
+def test_authors_are_keyed_by_channel_id():
+    columns = CommentColumns.from_raw([
+        {"id": "a", "text": "x", "author": "@sam", "author_id": "UC1"},
+        {"id": "b", "text": "y", "author": "@sam", "author_id": "UC2"},
+        {"id": "c", "text": "z", "author": "@sam_renamed", "author_id": "UC1"},
+        {"id": "d", "text": "w", "author": "@old"},
+    ])
+    assert [columns.author_key(i) for i in range(4)] == ["UC1", "UC2", "UC1", "@old"]
+    assert columns.author_ids[0] == columns.author_ids[2] != columns.author_ids[1]
+
+    restored = CommentColumns.from_bytes(columns.to_bytes())
+    assert [restored.author_key(i) for i in range(4)] == ["UC1", "UC2", "UC1", "@old"]
+    assert {c["id"]: c["author_id"] for c in restored.to_tree()}["b"] == "UC2"
+    assert restored.extend_raw([{"id": "e", "text": "v", "author": "@sam", "author_id": "UC2"}]) == [4]
+    assert restored.author_ids[4] == restored.author_ids[1]
+
+
+def test_tree_is_sorted_by_likes_with_replies_nested():
+    tree = CommentColumns.from_raw(RAW).to_tree()
+    assert [c["id"] for c in tree] == ["c2", "c1"]
+    assert [r["text"] for r in tree[1]["replies"]] == ["reply first"]
+    assert len(CommentColumns.from_raw(RAW).to_tree(limit_roots=1)) == 1
+
+
+def test_extend_skips_known_comments():
+    columns = CommentColumns.from_raw(RAW)
+    new_rows = columns.extend_raw(RAW + [{"id": "c3", "text": "new", "parent": "c2", "timestamp": 40}])
+    assert new_rows == [3]
+    assert columns.parents[3] == columns.index_of("c2")
+
+
+def test_bytes_and_valkey_round_trip():
+    columns = CommentColumns.from_raw(RAW)
+    restored = CommentColumns.from_bytes(columns.to_bytes())
+    assert list(restored.texts()) == list(columns.texts())
+    assert list(restored.likes) == [1, 5, 9]
+
+    store_comments("v1", columns)
+    loaded = load_comments("v1")
+    assert loaded.to_tree() == columns.to_tree()
+    assert load_comments("missing") is None
+
+
+def test_empty_table_round_trips():
+    assert len(CommentColumns.from_bytes(CommentColumns().to_bytes())) == 0
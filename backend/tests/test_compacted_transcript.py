@@ -0,0 +1,96 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from valkey_rest import crud
+from video_extraction import gemini_cache
+from video_extraction.compacted_transcript import TranscriptSegmenter
+from video_extraction.token_budget import TokenBudget
+
+VTT = """WEBVTT
+
+00:00:01.000 --> 00:00:04.000
+The city council approved the new transit budget.
+
+00:06:01.000 --> 00:06:04.000
+The mayor said bus service will double next year.
+"""
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Fake Gemini behind the real response cache; `fail` makes every call raise"""
+    calls = SimpleNamespace(count=0, fail=False)
+
+    def generate_content(client, model, contents, config=None, call_site="default"):
+        calls.count += 1
+        if calls.fail:
+            raise RuntimeError("Gemini unavailable")
+        return SimpleNamespace(usage_metadata=None, text=json.dumps({
+            "topic": f"Topic {calls.count}", "summary": "s", "key_points": [],
+            "sentiment": "Neutral", "entities_mentioned": []}))
+
+    monkeypatch.setattr(gemini_cache, "_response_cache", gemini_cache.GeminiResponseCache())
+    monkeypatch.setattr(gemini_cache.gemini_client, "generate_content", generate_content)
+    return calls
+
+
+@pytest.fixture
+def segmenter():
+    segmenter = TranscriptSegmenter(fused_claims=False)
+    segmenter.use_ai, segmenter.client = True, object()
+    return segmenter
+
+
+@pytest.fixture
+def processed(tmp_path, segmenter, gemini):
+    vtt_path = tmp_path / "v1.en.vtt"
+    vtt_path.write_text(VTT, encoding="utf-8")
+    crud.valkey_set("v1.en.vtt", VTT)
+    return segmenter.process_file(str(vtt_path), str(tmp_path / "out.json"), video_id="v1", preview=False)
+
+
+def summary():
+    return crud.valkey_get("v1_segmented_summary.json")
+
+
+def test_segments_are_summarized_once(tmp_path, segmenter, gemini, processed):
+    assert [s["status"] for s in summary()["segments"]] == ["ok", "ok"]
+    assert gemini.count == 2
+
+    segmenter.process_file(str(tmp_path / "v1.en.vtt"), str(tmp_path / "out.json"), video_id="v1", preview=False)
+    assert gemini.count == 2
+
+
+def test_failed_segments_are_retried(segmenter, gemini, tmp_path):
+    gemini.fail = True
+    vtt_path = tmp_path / "v1.en.vtt"
+    vtt_path.write_text(VTT, encoding="utf-8")
+    crud.valkey_set("v1.en.vtt", VTT)
+    segmenter.process_file(str(vtt_path), None, video_id="v1", preview=False)
+    assert summary()["failed_segments"] == [1, 2]
+    assert {s["source"] for s in summary()["segments"]} == {"extractive"}
+
+    gemini.fail = False
+    segmenter.retry_failed_segments("v1")
+    assert summary()["failed_segments"] == []
+    assert {s["source"] for s in summary()["segments"]} == {"gemini"}
+
+
+def test_requested_segments_bypass_both_caches(segmenter, gemini, processed):
+    before = gemini.count
+    segmenter.retry_failed_segments("v1", segment_ids=[2])
+    assert gemini.count == before + 1
+    topics = [s["analysis"]["topic"] for s in summary()["segments"]]
+    assert topics == ["Topic 1", f"Topic {before + 1}"]
+
+    # The retry is accounted separately, the first pass is not forgotten
+    usage = TokenBudget.for_video("v1").usage
+    assert usage["segment_summary"]["calls"] == 2
+    assert usage["segment_retry"]["calls"] == 1
+
+
+def test_segment_ids_must_be_integers(segmenter, processed):
+    with pytest.raises(ValueError):
+        segmenter.retry_failed_segments("v1", segment_ids=["2"])
@@ -0,0 +1,74 @@
+import os
+
+import fakeredis
+import pytest
+import redis
+
+from valkey_rest import crud
+
+
+def test_json_round_trip(valkey):
+    crud.valkey_set("k", {"a": [1, 2]}, expire=60)
+    assert crud.valkey_get("k") == {"a": [1, 2]}
+    assert 0 < valkey.ttl("k") <= 60
+
+
+def test_double_encoded_and_plain_values(valkey):
+    valkey.set("double", '"{\\"a\\": 1}"')
+    valkey.set("plain", "not json")
+    assert crud.valkey_get("double") == {"a": 1}
+    assert crud.valkey_get("plain") == "not json"
+    assert crud.valkey_get("missing") is None
+
+
+def test_mget_and_hash_helpers():
+    crud.valkey_set("a", {"x": 1})
+    assert crud.valkey_mget(["a", "b"]) == [{"x": 1}, None]
+    assert crud.valkey_mget([]) == []
+    assert crud.valkey_hincr("h", "f", 3) == 3
+    assert crud.valkey_hgetall("h") == {"f": "3"}
+    assert crud.valkey_hdel("h") == 0
+
+
+def test_client_is_created_lazily_once_per_process(monkeypatch):
+    created = []
+
+    def fake_pool():
+        pool = fakeredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True).connection_pool
+        created.append(pool)
+        return pool
+
+    monkeypatch.setattr(crud, "_create_pool", fake_pool)
+    monkeypatch.setattr(crud, "_client", None)
+    monkeypatch.setattr(crud, "_pid", None)
+
+    crud.valkey_set("k", 1)
+    assert crud.valkey_get("k") == 1
+    assert len(created) == 1
+
+    # A forked worker must not reuse the parent's connections
+    monkeypatch.setattr(crud, "_pid", os.getpid() + 1)
+    assert crud.valkey_get("k") is None
+    assert len(created) == 2
+
+
+def test_missing_settings_fail_on_first_use(monkeypatch):
+    monkeypatch.setattr(crud, "_client", None)
+    monkeypatch.setattr(crud, "_pid", None)
+    monkeypatch.delenv("VALKEY_HOST", raising=False)
+    with pytest.raises(RuntimeError):
+        crud.get_client()
+    assert crud.ping() is False
+
+
+def test_only_connection_errors_are_retried(monkeypatch):
+    monkeypatch.setenv("VALKEY_HOST", "localhost")
+    monkeypatch.setenv("VALKEY_PORT", "6379")
+    connection = crud._create_pool().make_connection()
+    # A timed-out HINCRBY may have been applied already
+    assert connection.retry._supported_errors == (redis.ConnectionError,)
+
+
+def test_pool_stats_before_initialization(monkeypatch):
+    monkeypatch.setattr(crud, "_pool", None)
+    assert crud.pool_stats()["initialized"] is False
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from video_extraction import evidence_backends
+from video_extraction.evidence_backends import (
+    EvidenceBackend, FallbackBackend, LocalCorpusBackend, SearchFailed, create_backend)
+
+DOCS = [
+    {"title": "Inflation hits 9.1% in June", "text": "Consumer prices rose 9.1% in June 2022.",
+     "source": "Reuters", "url": "https://reuters.com/inflation"},
+    {"title": "Local team wins final", "text": "The home team won the cup final on Sunday.",
+     "source": "BBC", "url": "https://bbc.co.uk/sport"},
+    {"title": "Inflation cools", "text": "Inflation slowed to 3% a year later.",
+     "source": "AP", "url": "https://apnews.com/inflation"},
+]
+
+
+class StaticBackend(EvidenceBackend):
+    name = "static"
+
+    def __init__(self, results=None, error=None):
+        self.results = results or []
+        self.error = error
+        self.calls = 0
+
+    def search(self, query, timeout):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return list(self.results)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("\n".join(json.dumps(d) for d in DOCS), encoding="utf-8")
+    return str(path)
+
+
+def test_backend_must_implement_search():
+    with pytest.raises(TypeError):
+        EvidenceBackend()
+
+
+def test_local_search_ranks_matching_documents(corpus):
+    backend = LocalCorpusBackend(corpus)
+    assert backend.doc_count == 3
+    hits = backend.search("inflation 9.1% june")
+    assert hits[0]["url"] == "https://reuters.com/inflation"
+    assert set(hits[0]) == {"title", "snippet", "source", "url"}
+    assert backend.search("cricket") == []
+
+
+def test_local_index_is_reused_until_the_corpus_changes(corpus, monkeypatch):
+    LocalCorpusBackend(corpus)
+    built = []
+    monkeypatch.setattr(evidence_backends, "build_index", lambda *a: built.append(a) or 0)
+    LocalCorpusBackend(corpus)
+    assert built == []
+
+
+def test_fallback_only_for_low_recall():
+    web = StaticBackend([{"title": "web", "url": "https://web.example/1"}])
+    enough = StaticBackend([{"url": "a"}, {"url": "b"}])
+    assert FallbackBackend(enough, web, min_results=2).search("q", 1.0) == [{"url": "a"}, {"url": "b"}]
+    assert web.calls == 0
+
+    sparse = StaticBackend([{"url": "a"}])
+    combined = FallbackBackend(sparse, web, min_results=2)
+    assert [r["url"] for r in combined.search("q", 1.0)] == ["a", "https://web.example/1"]
+    assert combined.name == "static+static"
+
+
+def test_fallback_failure_keeps_primary_results():
+    failing = StaticBackend(error=SearchFailed("offline", [{"url": "partial"}]))
+    backend = FallbackBackend(StaticBackend([{"url": "a"}]), failing, min_results=2)
+    with pytest.raises(SearchFailed) as raised:
+        backend.search("q", 1.0)
+    assert [r["url"] for r in raised.value.partial] == ["a", "partial"]
+
+
+def test_duckduckgo_unavailable_is_a_failure(monkeypatch):
+    monkeypatch.setattr(evidence_backends, "DDG_AVAILABLE", False)
+    with pytest.raises(SearchFailed):
+        evidence_backends.DuckDuckGoBackend().search("q", 1.0)
+
+
+def test_create_backend_falls_back_to_duckduckgo(tmp_path, corpus):
+    assert create_backend("local", str(tmp_path / "missing.jsonl")).name == "duckduckgo"
+    assert create_backend("nope").name == "duckduckgo"
+    assert create_backend("local", corpus).name == "local"
+    assert create_backend("local+web", corpus).name == "local+duckduckgo"
@@ -0,0 +1,32 @@
+from video_extraction import evidence_ranker
+from video_extraction.evidence_ranker import rank_passages, compact_evidence, split_passages
+
+RESULTS = [
+    {"title": "Prices and wages", "snippet": "Wages grew slowly. Inflation hit 9.1% in June 2022, a 40-year high.",
+     "url": "https://www.reuters.com/a"},
+    {"title": "Inflation outlook", "snippet": "Economists expect inflation to ease next year.",
+     "url": "https://apnews.com/b"},
+]
+
+
+def test_passages_keep_their_source():
+    passages = split_passages(RESULTS)
+    assert {"text": "Prices and wages", "source": "reuters.com"} in passages
+
+
+def test_shared_numbers_rank_first():
+    ranked = rank_passages("Inflation hit 9.1% in June 2022", RESULTS)
+    assert "9.1%" in ranked[0]["text"]
+    assert all(p["score"] > 0 for p in ranked)
+
+
+def test_compact_evidence_stays_within_budget():
+    text, sizes = compact_evidence("Inflation hit 9.1% in June 2022", RESULTS, max_tokens=20)
+    assert text.startswith("- ") and "(reuters.com)" in text
+    assert sizes["prompt_tokens"] <= 20 < sizes["raw_tokens"]
+
+
+def test_no_evidence():
+    text, sizes = compact_evidence("Inflation hit 9.1%", [])
+    assert text == evidence_ranker.NO_EVIDENCE
+    assert sizes["raw_tokens"] == 1
@@ -0,0 +1,39 @@
+import pytest
+
+from video_extraction.compacted_transcript import TranscriptSegmenter
+from video_extraction.extractive_summarizer import ExtractiveSummarizer
+
+TEXT = (
+    "The city council approved the new budget on Monday. "
+    "The budget adds funding for public transit and road repairs. "
+    "Several residents asked about the transit schedule. "
+    "Mayor Jane Smith said transit funding will double next year. "
+    "The weather was sunny during the meeting. "
+    "Council members will vote on the transit plan in May."
+)
+
+
+def test_summary_has_the_gemini_fields():
+    summary = ExtractiveSummarizer(summary_sentences=2, key_points=2).summarize(TEXT)
+    assert set(summary) == {"topic", "summary", "key_points", "sentiment", "entities_mentioned"}
+    assert summary["topic"]
+    assert len(summary["key_points"]) == 2
+    assert "Mayor Jane Smith" in summary["entities_mentioned"]
+
+
+def test_summary_keeps_sentence_order():
+    summary = ExtractiveSummarizer(summary_sentences=3).summarize(TEXT)["summary"]
+    positions = [TEXT.index(s) for s in summary.split(". ") if s]
+    assert positions == sorted(positions)
+
+
+def test_text_without_words_has_no_dialogue():
+    summary = ExtractiveSummarizer().summarize("the and of ... !!")
+    assert summary["topic"] == "No Dialogue"
+    assert summary["key_points"] == []
+
+
+def test_missing_vtt_raises_instead_of_exiting(tmp_path):
+    # SystemExit would escape `except Exception` in the summarization thread
+    with pytest.raises(FileNotFoundError):
+        TranscriptSegmenter()._load_segments(str(tmp_path / "missing.vtt"))
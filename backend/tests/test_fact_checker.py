@@ -0,0 +1,198 @@
+import json
+import time
+
+import pytest
+
+import app
+from valkey_rest import crud
+from video_extraction import checkability_triage, claim_cache, fact_checker
+from video_extraction.evidence_backends import EvidenceBackend, SearchFailed
+from video_extraction.fact_checker import FactChecker, FactCheckStream
+
+EVIDENCE = [{"title": "Confirmed", "snippet": "It happened.", "source": "Reuters", "url": "https://reuters.com/a"}]
+
+
+class ScriptedBackend(EvidenceBackend):
+    """Returns EVIDENCE, or raises SearchFailed for queries listed in `failing`"""
+    name = "scripted"
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.queries = []
+
+    def search(self, query, timeout):
+        self.queries.append(query)
+        if query in self.failing:
+            raise SearchFailed("rate limited", [{"title": "partial", "url": "https://p.example"}])
+        return list(EVIDENCE)
+
+
+def fake_gemini(extraction):
+    """generate_content stand-in: `extraction(prompt)` answers claim extraction, every claim is verified True"""
+    def generate_content(client, model, contents, config=None, call_site="default", budget=None, validate=None):
+        if call_site == "claim_extraction":
+            return extraction(contents)
+        claims = [line.split('"')[1] for line in contents.splitlines() if line.strip().startswith("CLAIM:")]
+        return json.dumps({"fact_checks": [{"claim": c, "verdict": "True", "explanation": "x"} for c in claims]})
+    return generate_content
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(claim_cache, "_claim_cache", claim_cache.ClaimEvidenceCache())
+    monkeypatch.setattr(checkability_triage, "TRIAGE_ENABLED", False)
+
+
+def segment(segment_id):
+    return {"segment_id": segment_id, "analysis": {"summary": f"summary {segment_id}", "key_points": ["a"]}}
+
+
+def claims_for(contents):
+    return json.dumps({"is_checkable": True, "claims": [
+        {"claim_text": "The factory closed in March 2024 after 40 years", "segment_id": 1}]})
+
+
+def wait_for_partial(video_id, segments):
+    for _ in range(200):
+        partial = crud.valkey_get(f"{video_id}_fact_check_partial.json")
+        if partial and partial["analysis"]["segments_checked"] >= segments:
+            return partial
+        time.sleep(0.01)
+    raise AssertionError("partial result was not published")
+
+
+# --- Searching ---
+def test_failed_searches_are_not_cached():
+    backend = ScriptedBackend(failing={"Unemployment is 3.5% now"})
+    checker = FactChecker(backend=backend)
+    claims = ["Inflation hit 9.1% in June 2022", "Unemployment is 3.5% now"]
+
+    results = checker.search_all(claims)
+    assert results[0] == EVIDENCE
+    assert results[1] == [{"title": "partial", "url": "https://p.example"}]
+
+    # Only the successful search is answered from the cache the second time
+    backend.queries.clear()
+    checker.search_all(claims)
+    assert backend.queries == ["Unemployment is 3.5% now"]
+    assert claim_cache.ClaimEvidenceCache().get_many(claims, "scripted") == [EVIDENCE, None]
+
+
+def test_empty_results_are_cached():
+    class NoResults(ScriptedBackend):
+        def search(self, query, timeout):
+            self.queries.append(query)
+            return []
+
+    backend = NoResults()
+    checker = FactChecker(backend=backend)
+    checker.search_all(["A claim nobody wrote about"])
+    checker.search_all(["A claim nobody wrote about"])
+    assert len(backend.queries) == 1
+
+
+# --- Verification ---
+def test_claims_that_do_not_fit_stay_unverified(monkeypatch):
+    class TightBudget:
+        def require(self, stage, min_tokens=256):
+            return fact_checker.PROMPT_OVERHEAD_TOKENS + 60
+
+        def record(self, *args, **kwargs):
+            pass
+
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(claims_for))
+    batch = [{"claim": f"claim number {i} " + "x" * 100, "evidence_text": "- e"} for i in range(3)]
+    checks = FactChecker(backend=ScriptedBackend())._verify_batch(batch, TightBudget())["fact_checks"]
+    assert [c["verdict"] for c in checks] == ["True", "Unverified", "Unverified"]
+    assert "token budget" in checks[1]["explanation"]
+
+
+def test_reused_verdicts_keep_their_evidence(monkeypatch):
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(claims_for))
+    claim = "The factory closed in March 2019 after 40 years"
+    FactChecker(backend=ScriptedBackend()).check_claims([claim], "v1")
+
+    backend = ScriptedBackend()
+    result, _ = FactChecker(backend=backend).check_claims([claim], "v2")
+    assert backend.queries == []
+    assert result["fact_checks"][0]["reused_from"]["video_id"] == "v1"
+    assert result["bias_distribution"]["center_count"] == 1
+    assert result["alternative_perspectives"]
+
+
+def test_claims_missing_from_the_answer_stay_unverified():
+    batch = [{"claim": c} for c in ("Inflation hit 9.1% in June 2022", "The bridge opened in 1937",
+                                    "Unemployment fell to 3.5% last year")]
+    checks = [
+        {"claim": "Unemployment fell to 3.5 percent last year", "verdict": "True", "explanation": "x"},
+        {"claim": "In June 2022, inflation hit 9.1%", "verdict": "False", "explanation": "y"},
+    ]
+    merged = FactChecker(backend=ScriptedBackend())._merge_verifications([batch], [{"fact_checks": checks}])
+    assert [(c["claim"], c["verdict"]) for c in merged["fact_checks"]] == [
+        ("In June 2022, inflation hit 9.1%", "False"),
+        ("The bridge opened in 1937", "Unverified"),
+        ("Unemployment fell to 3.5 percent last year", "True"),
+    ]
+
+
+# --- Streaming ---
+def test_stream_saves_final_result(monkeypatch):
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(claims_for))
+    stream = FactCheckStream(FactChecker(backend=ScriptedBackend()), "v1")
+    stream.add_segment(segment(1))
+    assert wait_for_partial("v1", 1)["analysis"]["status"] == "partial"
+    stream.add_segment(segment(2))
+
+    result = json.loads(stream.finish())
+    assert result["analysis"]["status"] == "processed"
+    assert len(result["analysis"]["fact_checks"]) == 1     # the repeated claim is checked once
+    assert crud.valkey_get("v1_fact_check.json") is not None
+    assert crud.valkey_get("v1_fact_check_partial.json") is None
+
+
+def test_stream_with_failed_extraction_saves_nothing(monkeypatch):
+    def flaky(contents):
+        if "Segment 2" in contents:
+            raise RuntimeError("Gemini unavailable")
+        return claims_for(contents)
+
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(flaky))
+    stream = FactCheckStream(FactChecker(backend=ScriptedBackend()), "v1")
+    stream.add_segment(segment(1))
+    stream.add_segment(segment(2))
+
+    assert stream.finish() is None
+    assert stream.failed_segments == [2]
+    assert crud.valkey_get("v1_fact_check.json") is None
+    assert crud.valkey_get("v1_fact_check_partial.json") is None
+
+
+def test_failed_summarization_aborts_the_stream(monkeypatch):
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(claims_for))
+
+    class FailingSegmenter:
+        def process_file(self, vtt_path, output_path, video_id=None, preview=True, on_segment=None):
+            on_segment(segment(1))
+            raise RuntimeError("segmenter crashed")
+
+    stream = FactCheckStream(FactChecker(backend=ScriptedBackend()), "v1")
+    with pytest.raises(RuntimeError):
+        app.run_summarization(FailingSegmenter(), "v1.vtt", None, "v1", stream)
+    assert crud.valkey_get("v1_fact_check.json") is None
+    assert crud.valkey_get("v1_fact_check_partial.json") is None
+
+
+def test_stream_records_one_triage_example(monkeypatch):
+    monkeypatch.setattr(checkability_triage, "TRIAGE_ENABLED", True)
+    monkeypatch.setattr(checkability_triage, "_default_triage",
+                        checkability_triage.CheckabilityTriage({"news": ["news"], "entertainment": ["gameplay"]}))
+    monkeypatch.setattr(fact_checker.gemini_cache, "generate_content", fake_gemini(claims_for))
+
+    stream = FactCheckStream(FactChecker(backend=ScriptedBackend()), "v1")
+    for i in range(1, 4):
+        stream.add_segment(segment(i))
+    stream.finish()
+
+    examples = crud.valkey_lrange(checkability_triage.EXAMPLES_KEY, 0, -1)
+    assert len(examples) == 1
+    assert json.loads(examples[0])["label"] is True
@@ -0,0 +1,98 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from video_extraction import gemini_cache
+from video_extraction.gemini_cache import BYTES_KEY, INDEX_KEY, SIZES_KEY, GeminiResponseCache, json_validator
+
+VALID = json_validator("summary")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = GeminiResponseCache(ttl=60, max_total_bytes=10_000, max_entry_bytes=1_000)
+    monkeypatch.setattr(gemini_cache, "_response_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Scripted gemini_client.generate_content: answers pop from `replies`"""
+    calls = SimpleNamespace(count=0, replies=[])
+
+    def generate_content(client, model, contents, config=None, call_site="default"):
+        calls.count += 1
+        return SimpleNamespace(text=calls.replies.pop(0), usage_metadata=None)
+
+    monkeypatch.setattr(gemini_cache.gemini_client, "generate_content", generate_content)
+    return calls
+
+
+def test_keys_depend_on_model_prompt_and_config(cache):
+    key = cache.make_key("m", "prompt", {"temperature": 0})
+    assert key == cache.make_key("m", "prompt", {"temperature": 0})
+    assert key != cache.make_key("m2", "prompt", {"temperature": 0})
+    assert key != cache.make_key("m", "prompt", {"temperature": 1})
+
+
+def test_json_validator():
+    assert VALID('{"summary": "s"}')
+    assert not VALID('{"summary": "s"')          # truncated
+    assert not VALID('["summary"]')
+    assert not VALID('{"topic": "t"}')
+    assert json_validator("n", check=lambda r: r["n"] > 1)('{"n": 2}')
+    assert not json_validator("n", check=lambda r: r["n"] > 1)('{"n": 1}')
+
+
+def test_valid_responses_are_cached(cache, gemini):
+    gemini.replies = ['{"summary": "s"}']
+    for _ in range(2):
+        assert gemini_cache.generate_content(None, "m", "prompt", call_site="site", validate=VALID) == '{"summary": "s"}'
+    assert gemini.count == 1
+    assert cache.stats()["site"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_malformed_responses_are_not_cached(cache, gemini):
+    gemini.replies = ['{"summary": "cut o', '{"summary": "s"}']
+    assert gemini_cache.generate_content(None, "m", "prompt", validate=VALID) == '{"summary": "cut o'
+    # The retry reaches Gemini again
+    assert gemini_cache.generate_content(None, "m", "prompt", validate=VALID) == '{"summary": "s"}'
+    assert gemini.count == 2
+
+
+def test_expired_entries_leave_the_byte_count(cache, valkey):
+    key = cache.make_key("m", "prompt")
+    cache.put(key, '{"summary": "s"}', "site")
+    assert int(valkey.get(BYTES_KEY)) > 0
+
+    valkey.delete(key)      # what the TTL does
+    assert cache.get(key, "site") is None
+    assert int(valkey.get(BYTES_KEY)) == 0
+    assert valkey.zcard(INDEX_KEY) == 0 and valkey.hlen(SIZES_KEY) == 0
+
+
+def test_eviction_keeps_the_cache_under_budget(cache, valkey):
+    keys = [cache.make_key("m", f"prompt {i}") for i in range(40)]
+    for key in keys:
+        cache.put(key, json.dumps({"summary": "x" * 400}), "site")
+    assert int(valkey.get(BYTES_KEY)) <= cache.max_total_bytes
+    assert valkey.get(keys[0]) is None and valkey.get(keys[-1]) is not None
+    assert int(valkey.get(BYTES_KEY)) == sum(int(v) for v in valkey.hvals(SIZES_KEY))
+
+
+def test_expired_entries_are_evicted_first(cache, valkey):
+    keys = [cache.make_key("m", f"prompt {i}") for i in range(30)]
+    for key in keys[:10]:
+        cache.put(key, json.dumps({"summary": "x" * 400}), "site")
+    valkey.delete(keys[0], keys[1])     # expired, never looked up again
+    for key in keys[10:]:
+        cache.put(key, json.dumps({"summary": "x" * 400}), "site")
+    assert valkey.zscore(INDEX_KEY, keys[0]) is None
+    assert int(valkey.get(BYTES_KEY)) == sum(int(v) for v in valkey.hvals(SIZES_KEY))
+
+
+def test_oversized_responses_are_not_cached(cache, valkey):
+    key = cache.make_key("m", "prompt")
+    cache.put(key, "x" * 2_000, "site")
+    assert valkey.get(key) is None
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+import pytest
+
+from video_extraction import gemini_client
+from video_extraction.gemini_client import GeminiRateLimiter
+from video_extraction.utils.rate_limit import TokenBucket
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeClient:
+    """Answers with `usage`, after raising the given errors first"""
+
+    def __init__(self, usage=None, errors=()):
+        self.errors = list(errors)
+        self.calls = 0
+        self.models = self
+        self.usage = usage
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(text="ok", usage_metadata=self.usage)
+
+
+@pytest.fixture(autouse=True)
+def limiter(monkeypatch):
+    limiter = GeminiRateLimiter(rpm=6000, tpm=6000)
+    # Practically no refill, so the balance only moves with the calls
+    limiter.tokens = TokenBucket(rate=0.001, capacity=10_000)
+    monkeypatch.setattr(gemini_client, "_limiter", limiter)
+    monkeypatch.setattr(gemini_client.time, "sleep", lambda seconds: None)
+    return limiter
+
+
+def available(limiter):
+    return round(limiter.tokens.stats()["available"])
+
+
+def test_bucket_is_charged_the_actual_usage(limiter):
+    prompt = "word " * 400     # estimated at 500 tokens
+    usage = SimpleNamespace(prompt_token_count=450, candidates_token_count=1550, total_token_count=2000)
+    gemini_client.generate_content(FakeClient(usage), "model", prompt)
+    assert available(limiter) == 8000
+
+
+def test_over_estimate_is_given_back(limiter):
+    usage = SimpleNamespace(prompt_token_count=100, candidates_token_count=None, total_token_count=None)
+    gemini_client.generate_content(FakeClient(usage), "model", "word " * 400)
+    assert available(limiter) == 9900
+
+
+def test_missing_usage_keeps_the_estimate(limiter):
+    gemini_client.generate_content(FakeClient(None), "model", "word " * 400)
+    assert available(limiter) == 9500
+
+
+def test_debt_makes_the_next_call_wait(limiter):
+    limiter.tokens.debit(10_500)
+    assert limiter.tokens.acquire(1, timeout=0.01) is False
+
+
+def test_retryable_errors_are_retried():
+    client = FakeClient(errors=[ApiError(429), ApiError(503)])
+    assert gemini_client.generate_content(client, "model", "hello").text == "ok"
+    assert client.calls == 3
+
+
+def test_other_errors_are_raised(monkeypatch):
+    client = FakeClient(errors=[ApiError(400)])
+    with pytest.raises(ApiError):
+        gemini_client.generate_content(client, "model", "hello")
+    assert client.calls == 1
+
+    monkeypatch.setattr(gemini_client, "GEMINI_MAX_RETRIES", 1)
+    client = FakeClient(errors=[ApiError(429)] * 3)
+    with pytest.raises(ApiError):
+        gemini_client.generate_content(client, "model", "hello")
+    assert client.calls == 2
@@ -0,0 +1,33 @@
+from video_extraction.keyword_matcher import KeywordMatcher, get_default_matcher
+
+LEXICONS = {"praise": ["love", "great video"], "bot": ["check my channel", "free gift"], "question": ["how"]}
+
+
+def test_match_uses_word_boundaries():
+    matcher = KeywordMatcher(LEXICONS)
+    assert matcher.match("I LOVE this") == {"praise"}
+    assert matcher.match("lovely weather, showing how") == {"question"}
+    assert matcher.match("nothing here") == set()
+
+
+def test_longer_keyword_keeps_the_shorter_ones_categories():
+    matcher = KeywordMatcher({"praise": ["love"], "strong": ["love it"]})
+    assert matcher.match("love it") == {"praise", "strong"}
+
+
+def test_batch_matches_each_text_separately():
+    matcher = KeywordMatcher(LEXICONS)
+    texts = ["Great\nvideo", "check my", "channel free gift", ""]
+    # A keyword split across two texts must not match
+    assert matcher.classify_batch(texts) == [{"praise"}, set(), {"bot"}, set()]
+    assert matcher.classify_batch(texts) == [matcher.match(t.replace("\n", " ")) for t in texts]
+
+
+def test_empty_lexicon_matches_nothing():
+    matcher = KeywordMatcher({})
+    assert matcher.match("love") == set()
+    assert matcher.classify_batch(["love"]) == [set()]
+
+
+def test_default_lexicon_loads():
+    assert get_default_matcher().match("Check my channel, promo inside") == {"bot"}
@@ -0,0 +1,56 @@
+import pytest
+
+from video_extraction.media_bias import MediaBiasTable, hostname
+
+TABLE = MediaBiasTable({
+    "multi_part_suffixes": ["co.uk", "ac.uk"],
+    "suffix_categories": {"gov": "Government", "ac.uk": "Academic"},
+    "sources": {
+        "bbc.co.uk": {"name": "BBC", "bias": "center", "category": "News"},
+        "go.com": {"name": "Disney", "bias": None, "category": "Entertainment"},
+        "abcnews.go.com": {"name": "ABC News", "bias": "lean_left", "category": "News"},
+        "leftpost.com": {"name": "Left Post", "bias": "left", "category": "News"},
+        "rightwire.com": {"name": "Right Wire", "bias": "right", "category": "News"},
+    },
+})
+
+
+@pytest.mark.parametrize("url, host", [
+    ("https://www.BBC.co.uk/news/1", "bbc.co.uk"),
+    ("news.example.com", "news.example.com"),
+    ("", ""),
+])
+def test_hostname(url, host):
+    assert hostname(url) == host
+
+
+def test_registrable_domain_respects_multi_part_suffixes():
+    assert TABLE.registrable_domain("https://news.bbc.co.uk/x") == "bbc.co.uk"
+    assert TABLE.registrable_domain("https://edition.cnn.com/x") == "cnn.com"
+
+
+def test_specific_host_wins_over_domain():
+    assert TABLE.rate("https://abcnews.go.com/story")["name"] == "ABC News"
+    assert TABLE.rate("https://www.go.com/")["name"] == "Disney"
+
+
+def test_unrated_domains_fall_back_to_suffix_category():
+    assert TABLE.rate("https://www.cdc.gov/flu")["category"] == "Government"
+    assert TABLE.rate("https://www.ox.ac.uk/")["category"] == "Academic"
+    assert TABLE.rate("https://unknown.example.com") is None
+
+
+def test_bias_distribution_counts_each_domain_once():
+    results = [{"url": "https://leftpost.com/1"}, {"url": "https://leftpost.com/2"},
+               {"url": "https://bbc.co.uk/3"}, {"url": "https://abcnews.go.com/4"},
+               {"url": "https://unknown.example.com/5"}]
+    assert TABLE.bias_distribution(results) == {"left_count": 2, "center_count": 1, "right_count": 0}
+
+
+def test_perspectives_alternate_across_the_spectrum():
+    results = [{"url": "https://leftpost.com/1", "title": "L"}, {"url": "https://abcnews.go.com/2", "title": "L2"},
+               {"url": "https://unknown.example.com/3", "title": "U"}, {"url": "https://rightwire.com/4", "title": "R"},
+               {"url": "https://bbc.co.uk/5", "title": "C"}]
+    perspectives = TABLE.perspectives(results, limit=4)
+    assert [p["description"] for p in perspectives] == ["L", "C", "R", "L2"]
+    assert perspectives[0]["type"] == "News (Left)"
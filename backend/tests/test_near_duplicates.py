@@ -0,0 +1,23 @@
+from video_extraction.near_duplicates import find_near_duplicates, normalize
+
+SPAM = "Make $5000 a week from home with this one simple trick, link in my bio"
+
+
+def test_normalize():
+    assert normalize("Check https://x.co/abc NOW!!  ok") == "check now ok"
+
+
+def test_edited_copies_form_one_cluster():
+    texts = [SPAM, SPAM.replace("5000", "6000"), SPAM + "!!", SPAM.upper(),
+             "I really enjoyed the part about the history of the bridge",
+             "The music in the intro was way too loud for me honestly"]
+    result = find_near_duplicates(texts)
+    assert result["cluster_count"] == 1
+    assert result["clusters"][0]["indices"] == [0, 1, 2, 3]
+    assert result["duplicate_comments"] == 4
+    assert result["duplicate_ratio"] == round(4 / 6, 4)
+
+
+def test_short_comments_are_ignored():
+    result = find_near_duplicates(["first", "first", "lol", "lol"])
+    assert result["duplicate_comments"] == 0 and result["clusters"] == []
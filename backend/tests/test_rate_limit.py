@@ -0,0 +1,25 @@
+import time
+
+from video_extraction.utils.rate_limit import TokenBucket
+
+
+def test_bucket_allows_burst_then_times_out():
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    assert bucket.acquire(1, timeout=0) and bucket.acquire(1, timeout=0)
+    started = time.monotonic()
+    assert bucket.acquire(1, timeout=0.05) is False
+    assert time.monotonic() - started < 1
+    assert bucket.stats()["total_waits"] == 1
+
+
+def test_release_returns_tokens():
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    bucket.acquire(2, timeout=0)
+    bucket.release(1)
+    assert bucket.acquire(1, timeout=0)
+
+
+def test_zero_rate_is_unlimited():
+    bucket = TokenBucket(rate=0, capacity=0)
+    assert all(bucket.acquire(5, timeout=0.01) for _ in range(3))
+    assert bucket.stats()["unlimited"] is True
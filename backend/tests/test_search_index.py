@@ -0,0 +1,44 @@
+from video_extraction import search_index
+
+
+def segments(*summaries):
+    return [{"segment_id": i, "timestamps": {"start": f"00:0{i}:00"},
+             "analysis": {"topic": f"Topic {i}", "summary": summary}}
+            for i, summary in enumerate(summaries, start=1)]
+
+
+def test_bm25_ranks_the_matching_segment_first():
+    search_index.index_segments("v1", segments("the rocket launch was delayed by weather",
+                                              "the crew talked about food on the station"), {})
+    results = search_index.search("rocket launch")["results"]
+    assert [(r["video_id"], r["segment_id"]) for r in results] == [("v1", 1)]
+    assert results[0]["topic"] == "Topic 1"
+    assert search_index.search("")["results"] == []
+
+
+def test_transcript_is_searchable_until_segments_are_indexed(valkey):
+    search_index.index_transcript("v1", "the rocket launch was delayed by weather")
+    assert [r["segment_id"] for r in search_index.search("rocket")["results"]] == [0]
+
+    search_index.index_segments("v1", segments("the rocket launch was delayed by weather"), {})
+    assert [r["segment_id"] for r in search_index.search("rocket")["results"]] == [1]
+    assert valkey.hget(search_index.STATS_KEY, "doc_count") == "1"
+
+    # A later transcript pass doesn't bring the duplicate back
+    search_index.index_transcript("v1", "the rocket launch was delayed by weather")
+    assert [r["segment_id"] for r in search_index.search("rocket")["results"]] == [1]
+
+
+def test_reindexing_replaces_old_postings(valkey):
+    search_index.index_segments("v1", segments("rocket launch"), {})
+    search_index.index_segments("v1", segments("ocean voyage"), {})
+    assert search_index.search("rocket")["results"] == []
+    assert valkey.hgetall(search_index.STATS_KEY) == {"doc_count": "1", "total_length": "3"}
+
+
+def test_remove_video(valkey):
+    search_index.index_segments("v1", segments("rocket launch"), {})
+    search_index.index_segments("v2", segments("rocket engines"), {})
+    search_index.remove_video("v1")
+    assert [r["video_id"] for r in search_index.search("rocket")["results"]] == ["v2"]
+    assert valkey.hget(search_index.STATS_KEY, "doc_count") == "1"
@@ -0,0 +1,51 @@
+import pytest
+
+from video_extraction.sentiment_classifier import SentimentClassifier, count_labels, get_default_classifier
+
+LEXICON = {
+    "words": {"love": 3.2, "great": 3.1, "good": 1.9, "bad": -2.5, "hate": -2.7, "terrible": -2.1, "okay": 0.9},
+    "boosters": {"very": 0.3},
+    "negations": ["not", "never"],
+    "contrast": ["but"],
+    "sarcasm_cues": ["yeah right", "/s"]
+}
+
+
+@pytest.fixture
+def classifier():
+    return SentimentClassifier(LEXICON)
+
+
+def test_labels(classifier):
+    result = classifier.classify_batch(["I love this", "I hate this", "It is a video", ""])
+    assert result["labels"] == ["positive", "negative", "neutral", "neutral"]
+    assert not result["needs_review"][2] and not result["needs_review"][3]
+
+
+def test_negation_flips_only_its_own_text(classifier):
+    # The "not" at the end of the first text must not negate the second one
+    result = classifier.classify_batch(["this is not good", "not", "good"])
+    assert result["labels"] == ["negative", "neutral", "positive"]
+
+
+def test_emphasis_raises_intensity(classifier):
+    compound = classifier.classify_batch(["great", "very great", "GREAT!!!"])["compound"]
+    assert compound[0] < compound[1] and compound[0] < compound[2]
+
+
+def test_contrast_weights_the_second_part(classifier):
+    assert classifier.classify_batch(["great video but terrible audio"])["labels"] == ["negative"]
+
+
+def test_ambiguous_comments_need_review(classifier):
+    result = classifier.classify_batch(["love it yeah right", "love the intro, hate the ending", "okay", "I love it"])
+    assert result["needs_review"].tolist() == [True, True, True, False]
+    assert result["sarcasm"].tolist() == [True, False, False, False]
+
+
+def test_count_labels():
+    assert count_labels(["positive", "neutral", "positive"]) == {"positive": 2, "negative": 0, "neutral": 1}
+
+
+def test_default_lexicon_loads():
+    assert get_default_classifier().classify_batch(["This was awesome, thanks!"])["labels"] == ["positive"]
@@ -0,0 +1,100 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from video_extraction import token_budget
+from video_extraction.token_budget import (
+    TokenBudget, TokenBudgetExceeded, estimate_tokens, fit_text, fit_items, usage_key)
+
+
+def usage(prompt, output):
+    return SimpleNamespace(prompt_token_count=prompt, candidates_token_count=output,
+                           total_token_count=prompt + output)
+
+
+def test_estimates_and_fitting():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert fit_text("one two three four", 2) == "one two"
+    assert fit_text("short", 10) == "short"
+    assert fit_text("anything", 0) == ""
+    assert fit_items(["aaaa", "bbbb", "cccc"], lambda s: s, 2) == ["aaaa", "bbbb"]
+
+
+def test_record_save_and_reload(valkey):
+    budget = TokenBudget.for_video("v1")
+    budget.record("segment_summary", usage(100, 20))
+    budget.record("segment_summary", None, estimated_prompt_tokens=50)
+    budget.record("segment_summary", usage(100, 20), cached=True)
+    budget.save()
+
+    stored = TokenBudget.for_video("v1")
+    stage = stored.usage["segment_summary"]
+    assert stage["calls"] == 3 and stage["cached_calls"] == 1
+    assert stage["total_tokens"] == 170
+    assert stored.spent() == 170
+    assert 0 < valkey.ttl(usage_key("v1")) <= token_budget.TOKEN_USAGE_TTL
+    assert stored.report()["total_tokens"] == 170
+
+
+def test_saving_twice_does_not_double_count():
+    budget = TokenBudget.for_video("v1")
+    budget.record("claim_extraction", usage(10, 5))
+    budget.save()
+    budget.save()
+    assert TokenBudget.for_video("v1").spent() == 15
+
+
+def test_concurrent_instances_add_up():
+    stages = ["segment_summary", "comment_analysis", "claim_extraction", "claim_verification"]
+    start = threading.Barrier(len(stages) * 2)
+
+    def worker(stage):
+        # Every instance loads before any other one saves
+        budget = TokenBudget.for_video("v1")
+        start.wait()
+        for _ in range(10):
+            budget.record(stage, usage(7, 3))
+        budget.save()
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in stages * 2]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    merged = TokenBudget.for_video("v1")
+    assert {s: merged.spent(s) for s in stages} == {s: 200 for s in stages}
+    assert merged.usage["claim_extraction"]["calls"] == 20
+
+
+def test_save_picks_up_other_instances():
+    a, b = TokenBudget.for_video("v1"), TokenBudget.for_video("v1")
+    a.record("segment_summary", usage(50, 50))
+    a.save()
+    b.record("claim_extraction", usage(5, 5))
+    b.save()
+    assert b.spent() == 110
+
+
+def test_retries_have_their_own_stage():
+    budget = TokenBudget(None, stages={"segment_summary": 1_500, "segment_retry": 2_000})
+    budget.record("segment_summary", usage(1_000, 500))
+    with pytest.raises(TokenBudgetExceeded):
+        budget.require("segment_summary")
+    assert budget.require("segment_retry") == 1_000
+
+    # Retries are still counted toward the video total
+    budget.record("segment_retry", usage(1_000, 500))
+    assert budget.spent() == 3_000
+    assert budget.spent("segment_summary") == 1_500
+
+
+def test_require_raises_when_stage_is_spent():
+    budget = TokenBudget(None, stages={"claim_extraction": 2_000})
+    assert budget.require("claim_extraction") == 1_000
+    budget.record("claim_extraction", usage(1_000, 500))
+    with pytest.raises(TokenBudgetExceeded):
+        budget.require("claim_extraction")
+    assert budget.remaining("claim_extraction") == 500
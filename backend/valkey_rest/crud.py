@@ -1,25 +1,109 @@
 import os
 import json
+import threading
 from typing import Any
 
 import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Single connection object
-r = redis.Redis(
-    host=os.getenv("VALKEY_HOST"),
-    port=int(os.getenv("VALKEY_PORT")),
-    password=os.getenv("VALKEY_PASSWORD"),
-    ssl=True,
-    decode_responses=True,
-)
+# --- Connection settings ---
+VALKEY_SSL = os.getenv("VALKEY_SSL", "1") != "0"
+VALKEY_MAX_CONNECTIONS = int(os.getenv("VALKEY_MAX_CONNECTIONS", 64))    # per process
+VALKEY_POOL_TIMEOUT = float(os.getenv("VALKEY_POOL_TIMEOUT", 10))         # wait for a free connection
+VALKEY_SOCKET_TIMEOUT = float(os.getenv("VALKEY_SOCKET_TIMEOUT", 5))
+VALKEY_CONNECT_TIMEOUT = float(os.getenv("VALKEY_CONNECT_TIMEOUT", 5))
+VALKEY_RETRIES = int(os.getenv("VALKEY_RETRIES", 3))
+VALKEY_HEALTH_CHECK_INTERVAL = 30                                         # seconds idle before a PING
+
+_client = None
+_pool = None
+_pid = None
+_lock = threading.Lock()
+
+
+def _create_pool() -> redis.BlockingConnectionPool:
+    host, port = os.getenv("VALKEY_HOST"), os.getenv("VALKEY_PORT")
+    if not host or not port:
+        raise RuntimeError("VALKEY_HOST and VALKEY_PORT must be set")
+    # Blocking pool: under load, callers wait up to VALKEY_POOL_TIMEOUT for a
+    # connection instead of failing with "Too many connections"
+    return redis.BlockingConnectionPool(
+        max_connections=VALKEY_MAX_CONNECTIONS,
+        timeout=VALKEY_POOL_TIMEOUT,
+        connection_class=redis.SSLConnection if VALKEY_SSL else redis.Connection,
+        host=host,
+        port=int(port),
+        password=os.getenv("VALKEY_PASSWORD"),
+        decode_responses=True,
+        socket_timeout=VALKEY_SOCKET_TIMEOUT,
+        socket_connect_timeout=VALKEY_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=VALKEY_HEALTH_CHECK_INTERVAL,
+        # Retry only when the connection failed. A timed-out HINCRBY, LPUSH or
+        # PFADD may already have been applied, and running it again would
+        # count it twice
+        retry=Retry(ExponentialBackoff(cap=1.0, base=0.05), VALKEY_RETRIES,
+                    supported_errors=(redis.ConnectionError,)),
+        retry_on_error=[redis.ConnectionError],
+    )
+
+
+def get_client() -> redis.Redis:
+    """
+    The process's shared client, created on first use.
+    A forked worker (gunicorn, multiprocessing) gets its own pool instead of
+    sharing the parent's sockets.
+    """
+    global _client, _pool, _pid
+    if _client is None or _pid != os.getpid():
+        with _lock:
+            if _client is None or _pid != os.getpid():
+                _pool = _create_pool()
+                _client = redis.Redis(connection_pool=_pool)
+                _pid = os.getpid()
+    return _client
+
+
+def pool_stats() -> dict:
+    """Connection pool utilization of this process"""
+    pool = _pool
+    if pool is None or _pid != os.getpid():
+        return {"initialized": False, "pid": os.getpid()}
+    created = len(getattr(pool, "_connections", []))
+    idle = sum(1 for c in list(pool.pool.queue) if c is not None)
+    return {
+        "initialized": True,
+        "pid": _pid,
+        "max_connections": pool.max_connections,
+        "created": created,
+        "in_use": created - idle,
+        "idle": idle,
+        "utilization": round((created - idle) / pool.max_connections, 3) if pool.max_connections else 0.0
+    }
+
+
+class _LazyClient:
+    """Stand-in for the old module-level client: resolves to get_client() on every use"""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_client(), name)
+
+
+# Single connection object (connects lazily; safe to import without Valkey settings)
+r = _LazyClient()
 
 
 def ping() -> bool:
     """Test connection"""
-    return r.ping()
+    try:
+        return r.ping()
+    except (redis.RedisError, RuntimeError) as e:
+        print(f"[!] Valkey ping failed: {e}")
+        return False
 
 
 def valkey_exists(key: str) -> bool:
@@ -57,18 +141,99 @@ def valkey_set(key: str, value: Any, expire: int | None = None) -> bool:
         json_value = json.dumps(value)
 
     # print("SET - ", key, " - value: ", str(json_value)[:55])
-    r.set(key, json_value)
-
-    if expire is not None:
-        r.expire(key, expire)
+    r.set(key, json_value, ex=expire)
 
     return True
 
 
+def valkey_mget(keys: list) -> list:
+    """GET many keys in one round trip, JSON-deserialized like valkey_get (None for missing keys)."""
+    values = []
+    for value in (r.mget(keys) if keys else []):
+        try:
+            value = json.loads(value) if value is not None else None
+            if isinstance(value, str):
+                value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            pass
+        values.append(value)
+    return values
+
+
+def valkey_incr(key: str, amount: int = 1) -> int:
+    """INCRBY a counter key and return the new value."""
+    return r.incrby(key, amount)
+
+
+def valkey_hincr(key: str, field: str, amount: int = 1) -> int:
+    """HINCRBY a field of a hash and return the new value."""
+    return r.hincrby(key, field, amount)
+
+
+def valkey_hgetall(key: str) -> dict:
+    """HGETALL a hash as a plain dict of strings."""
+    return r.hgetall(key)
+
+
+def valkey_hmget(key: str, fields: list) -> list:
+    """HMGET several fields of a hash (missing fields come back as None)."""
+    if not fields:
+        return []
+    return r.hmget(key, fields)
+
+
+def valkey_hdel(key: str, *fields: str) -> int:
+    """HDEL one or more fields of a hash."""
+    if not fields:
+        return 0
+    return r.hdel(key, *fields)
+
+
+def valkey_smembers(key: str) -> set:
+    """SMEMBERS of a set."""
+    return r.smembers(key)
+
+
+def valkey_lrange(key: str, start: int, end: int) -> list:
+    """LRANGE of a list (end inclusive, -1 for the last element)."""
+    return r.lrange(key, start, end)
+
+
+def valkey_zadd(key: str, mapping: dict) -> int:
+    """ZADD members with their scores ({member: score})."""
+    return r.zadd(key, mapping)
+
+
+def valkey_zrange(key: str, start: int, end: int) -> list:
+    """ZRANGE by rank, lowest score first."""
+    return r.zrange(key, start, end)
+
+
+def valkey_zrem(key: str, *members: str) -> int:
+    """ZREM one or more members."""
+    if not members:
+        return 0
+    return r.zrem(key, *members)
+
+
+def valkey_pipeline():
+    """Non-transactional pipeline for batching many commands in one round trip."""
+    return r.pipeline(transaction=False)
+
+
+def valkey_delete_keys(*keys: str) -> int:
+    """DELETE arbitrary keys, returns how many existed."""
+    if not keys:
+        return 0
+    return r.delete(*keys)
+
+
 def valkey_delete(video_id: str) -> bool:
     """DELETE a key"""
     delete_list = [video_id + "_clean_transcript.json", video_id + "_segmented_summary.json", video_id + "_fact_check.json",
-                   video_id + "_summary.json", video_id + ".en.vtt", video_id + "_analysis.json"]
+                   video_id + "_summary.json", video_id + ".en.vtt", video_id + "_analysis.json",
+                   video_id + "_token_usage.hash", video_id + "_comments.col",
+                   video_id + "_comment_state.json", video_id + "_fact_check_partial.json"]
     count = []
     for key in delete_list:
         count.append(int(r.delete(key)))
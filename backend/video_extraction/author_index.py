@@ -0,0 +1,134 @@
+"""
+Cross-Video Author Index
+Connects comment authors across every processed video, so accounts that post on
+hundreds of videos (and paste the same text everywhere) stand out.
+
+Authors are keyed by yt-dlp's author_id (the channel id), which survives display
+name changes and tells apart channels that share a name; comments without one
+fall back to the display name.
+
+Layout:
+- authors:videos:<author>   HyperLogLog of video ids the author commented on (~12 KB max, O(1) count)
+- authors:recent:<author>   list of the author's latest "<video_id>:<fingerprint>" entries,
+                            capped at RECENT_FINGERPRINTS
+
+Both indexing and lookups are pipelined in batches, so the cost per video is
+O(comments) round-trip work no matter how many videos are indexed.
+"""
+
+import os
+import hashlib
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from valkey_rest import crud
+from video_extraction.near_duplicates import normalize, MIN_CHARS
+
+PREFIX = "authors"
+
+# --- Configuration ---
+RECENT_FINGERPRINTS = 50
+FANOUT_THRESHOLD = int(os.environ.get("AUTHOR_FANOUT_THRESHOLD", 25))   # distinct videos
+PIPELINE_BATCH = 500
+TOP_AUTHORS = 10
+
+
+def _videos_key(author: str) -> str:
+    return f"{PREFIX}:videos:{author}"
+
+
+def _recent_key(author: str) -> str:
+    return f"{PREFIX}:recent:{author}"
+
+
+def fingerprint(text: str) -> Optional[str]:
+    """
+    Stable 64-bit fingerprint of a comment's normalized text, or None for texts shorter
+    than near_duplicates.MIN_CHARS ("first", "lol" repeat across videos by chance).
+    """
+    normalized = normalize(text)
+    if len(normalized) < MIN_CHARS:
+        return None
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _group_by_author(authors: Iterable[str], texts: Iterable[str]) -> Dict[str, List[str]]:
+    grouped: Dict[str, List[str]] = {}
+    for author, text in zip(authors, texts):
+        if author:
+            grouped.setdefault(author, []).append(text or "")
+    return grouped
+
+
+def _batches(items: List[Any], size: int = PIPELINE_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def index_comments(video_id: str, authors: Iterable[str], texts: Iterable[str]):
+    """Records that each author commented on video_id, plus fingerprints of what they wrote"""
+    grouped = list(_group_by_author(authors, texts).items())
+    for batch in _batches(grouped):
+        pipe = crud.valkey_pipeline()
+        for author, author_texts in batch:
+            pipe.pfadd(_videos_key(author), video_id)
+            prints = [fingerprint(t) for t in author_texts]
+            entries = list(dict.fromkeys(f"{video_id}:{p}" for p in prints if p))
+            if entries:
+                pipe.lpush(_recent_key(author), *entries[-RECENT_FINGERPRINTS:])
+                pipe.ltrim(_recent_key(author), 0, RECENT_FINGERPRINTS - 1)
+        pipe.execute()
+    print(f"   Indexed {len(grouped)} authors for cross-video activity.")
+
+
+def lookup_authors(authors: List[str]) -> Dict[str, Tuple[int, List[str]]]:
+    """{author: (distinct video count, recent "<video_id>:<fingerprint>" entries)}"""
+    results = {}
+    for batch in _batches(list(dict.fromkeys(a for a in authors if a))):
+        pipe = crud.valkey_pipeline()
+        for author in batch:
+            pipe.pfcount(_videos_key(author))
+            pipe.lrange(_recent_key(author), 0, RECENT_FINGERPRINTS - 1)
+        replies = pipe.execute()
+        for i, author in enumerate(batch):
+            results[author] = (int(replies[2 * i] or 0), list(replies[2 * i + 1] or []))
+    return results
+
+
+def author_activity(video_id: str, authors: List[str], texts: List[str],
+                    threshold: int = FANOUT_THRESHOLD, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Flags high-fan-out authors among a video's commenters.
+    An author also counts as a copy-paster when something they wrote here matches
+    one of their recent comments on a different video.
+    `names` (display names, parallel to `authors`) are shown next to flagged authors.
+    """
+    authors = list(authors)
+    display = dict(zip(reversed(authors), reversed(names))) if names is not None else {}
+    grouped = _group_by_author(authors, texts)
+    if not grouped:
+        return {"authors_checked": 0, "high_fanout_authors": 0, "cross_video_copy_paste_authors": 0,
+                "high_fanout_comment_percentage": 0, "top_authors": []}
+
+    activity = lookup_authors(list(grouped))
+    total_comments = sum(len(t) for t in grouped.values())
+
+    flagged = []
+    copy_paste = 0
+    for author, author_texts in grouped.items():
+        video_count, recent = activity.get(author, (0, []))
+        elsewhere = {entry.split(":", 1)[1] for entry in recent if not entry.startswith(f"{video_id}:")}
+        repeated = any(p in elsewhere for p in map(fingerprint, author_texts) if p)
+        copy_paste += repeated
+        if video_count >= threshold:
+            flagged.append({"author": author, "name": display.get(author) or author, "video_count": video_count,
+                            "comments_here": len(author_texts), "repeats_text_across_videos": repeated})
+
+    flagged.sort(key=lambda a: a["video_count"], reverse=True)
+    flagged_comments = sum(a["comments_here"] for a in flagged)
+    return {
+        "authors_checked": len(grouped),
+        "high_fanout_authors": len(flagged),
+        "cross_video_copy_paste_authors": copy_paste,
+        "high_fanout_comment_percentage": round(flagged_comments / total_comments * 100) if total_comments else 0,
+        "top_authors": flagged[:TOP_AUTHORS]
+    }
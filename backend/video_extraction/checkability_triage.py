@@ -0,0 +1,264 @@
+"""
+Checkability Triage
+Decides locally (well under a millisecond) whether a video is clearly not
+fact-checkable - gaming, music, vlogs - so the fact checker can skip the Gemini
+claim extraction call. Uncertain and news-like videos still go to Gemini.
+
+Method:
+- Features from the video metadata ({id}_summary.json: title, tags, channel,
+  description) and the segments' topics / entities_mentioned, hashed into
+  HASH_DIM dimensions, plus rule features: in how many fields news and
+  entertainment cues (lexicons/triage_lexicon.json) appear.
+- Logistic regression over those features, trained with SGD on past Gemini
+  is_checkable decisions (recorded in "triage:examples") and stored in
+  "triage:model". Until a model exists, only the rule features are used.
+- P(checkable) below SKIP_THRESHOLD skips extraction, except for a random share
+  (TRIAGE_EXPLORE_RATE) of the skips that still go to Gemini: only videos Gemini
+  saw are labeled, so without them a wrong skip would never be corrected.
+- The process-wide triage reloads "triage:model" every TRIAGE_MODEL_RELOAD_SECONDS,
+  so a model trained by another process is picked up without a restart.
+
+Train: python -m video_extraction.checkability_triage train
+"""
+
+import os
+import json
+import math
+import time
+import random
+import zlib
+import base64
+import argparse
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from valkey_rest import crud
+from video_extraction.keyword_matcher import KeywordMatcher
+from video_extraction.utils.text import tokenize
+
+PREFIX = "triage"
+MODEL_KEY = f"{PREFIX}:model"
+EXAMPLES_KEY = f"{PREFIX}:examples"
+
+DEFAULT_LEXICON_PATH = os.environ.get(
+    "TRIAGE_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "triage_lexicon.json"))
+
+# --- Configuration ---
+TRIAGE_ENABLED = os.environ.get("CHECKABILITY_TRIAGE", "1") != "0"
+SKIP_THRESHOLD = float(os.environ.get("TRIAGE_SKIP_THRESHOLD", 0.1))
+EXPLORE_RATE = float(os.environ.get("TRIAGE_EXPLORE_RATE", 0.05))
+MODEL_RELOAD_SECONDS = float(os.environ.get("TRIAGE_MODEL_RELOAD_SECONDS", 600))
+HASH_DIM = 1 << 14
+MAX_EXAMPLES = 5000
+DESCRIPTION_CHARS = 1000
+
+# Cold start (no trained model): logit = bias + weight * cue fields
+RULE_BIAS = 0.5
+RULE_NEWS_WEIGHT = 1.0
+RULE_ENTERTAINMENT_WEIGHT = -1.5
+
+# SGD
+EPOCHS = 10
+LEARNING_RATE = 0.1
+L2 = 1e-4
+MIN_TRAINING_EXAMPLES = 50
+
+
+def _sigmoid(x: float) -> float:
+    return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, x))))
+
+
+def should_explore() -> bool:
+    """Whether a skip decision is sent to Gemini anyway (drawn with EXPLORE_RATE)"""
+    return random.random() < EXPLORE_RATE
+
+
+def example_fields(metadata: Optional[Dict[str, Any]], segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The raw inputs triage looks at; this is also what is stored as a training example"""
+    metadata = metadata or {}
+    entities, topics = [], []
+    for seg in segments:
+        analysis = seg.get("analysis", {}) or {}
+        entities.extend(analysis.get("entities_mentioned", []) or [])
+        if analysis.get("topic"):
+            topics.append(analysis["topic"])
+    return {
+        "title": metadata.get("title") or "",
+        "tags": list(metadata.get("tags") or []),
+        "channel": metadata.get("channel") or "",
+        "description": (metadata.get("description") or "")[:DESCRIPTION_CHARS],
+        "entities": entities,
+        "topics": topics
+    }
+
+
+class CheckabilityTriage:
+    """Hashed-feature logistic regression with lexicon rule features"""
+
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        self.matcher = KeywordMatcher(lexicon)
+        self.weights: Optional[np.ndarray] = None
+        self.bias = 0.0
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_LEXICON_PATH) -> "CheckabilityTriage":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    # --- Features ---
+    def rule_counts(self, fields: Dict[str, Any]) -> Tuple[int, int]:
+        """(fields with news cues, fields with entertainment cues)"""
+        texts = [fields["title"], " | ".join(fields["tags"]), fields["channel"], fields["description"],
+                 " | ".join(fields["topics"])]
+        found = self.matcher.classify_batch(texts)
+        return sum("news" in f for f in found), sum("entertainment" in f for f in found)
+
+    def features(self, fields: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse (indices, values) of the hashed feature vector"""
+        names = [f"t:{w}" for w in tokenize(fields["title"])]
+        names += [f"tag:{t.lower().strip()}" for t in fields["tags"]]
+        names += [f"tagw:{w}" for t in fields["tags"] for w in tokenize(t)]
+        names += [f"d:{w}" for w in tokenize(fields["description"])]
+        names += [f"top:{w}" for t in fields["topics"] for w in tokenize(t)]
+        if fields["channel"]:
+            names.append(f"ch:{fields['channel'].lower()}")
+
+        counts: Dict[int, float] = {}
+        for name in names:
+            index = zlib.crc32(name.encode("utf-8")) % HASH_DIM
+            counts[index] = counts.get(index, 0.0) + 1.0
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+
+        # Dense extras after the hashed block: rule cues and entity density
+        news, entertainment = self.rule_counts(fields)
+        extras = np.array([news, entertainment, math.log1p(len(fields["entities"]))], dtype=np.float32)
+        return (np.concatenate([indices, HASH_DIM + np.arange(len(extras))]),
+                np.concatenate([values, extras]))
+
+    # --- Prediction ---
+    def probability(self, fields: Dict[str, Any]) -> float:
+        if self.weights is None:
+            news, entertainment = self.rule_counts(fields)
+            return _sigmoid(RULE_BIAS + RULE_NEWS_WEIGHT * news + RULE_ENTERTAINMENT_WEIGHT * entertainment)
+        indices, values = self.features(fields)
+        return _sigmoid(float(self.weights[indices] @ values) + self.bias)
+
+    def triage(self, metadata: Optional[Dict[str, Any]], segments: List[Dict[str, Any]],
+               explore: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        {"decision": "skip" | "extract", "probability", "model", "explored", "fields"}
+        With explore (drawn by should_explore() if None), a skip becomes an
+        "extract" marked explored, so Gemini labels it.
+        """
+        started = time.perf_counter()
+        fields = example_fields(metadata, segments)
+        probability = self.probability(fields)
+        skip = probability < SKIP_THRESHOLD
+        explored = skip and (should_explore() if explore is None else explore)
+        return {
+            "decision": "skip" if skip and not explored else "extract",
+            "probability": round(probability, 4),
+            "model": "trained" if self.weights is not None else "rules",
+            "explored": explored,
+            "took_ms": round((time.perf_counter() - started) * 1000, 3),
+            "fields": fields
+        }
+
+    # --- Training ---
+    def fit(self, examples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """SGD logistic regression on [{**fields, "label": bool}]"""
+        rows = [self.features(e) for e in examples]
+        labels = np.array([1.0 if e.get("label") else 0.0 for e in examples], dtype=np.float32)
+        weights = np.zeros(HASH_DIM + 3, dtype=np.float32)
+        bias = 0.0
+        rng = np.random.default_rng(0)
+
+        for _ in range(EPOCHS):
+            for i in rng.permutation(len(rows)):
+                indices, values = rows[i]
+                error = _sigmoid(float(weights[indices] @ values) + bias) - float(labels[i])
+                weights[indices] -= LEARNING_RATE * (error * values + L2 * weights[indices])
+                bias -= LEARNING_RATE * error
+
+        self.weights, self.bias = weights, float(bias)
+        predictions = np.array([self.probability(e) for e in examples]) >= 0.5
+        return {"examples": len(examples), "positives": int(labels.sum()),
+                "training_accuracy": round(float((predictions == (labels == 1)).mean()), 4)}
+
+    def save_model(self):
+        crud.valkey_set(MODEL_KEY, {
+            "weights": base64.b64encode(self.weights.astype("<f4").tobytes()).decode("ascii"),
+            "bias": self.bias,
+            "hash_dim": HASH_DIM,
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        })
+
+    def load_model(self) -> bool:
+        stored = crud.valkey_get(MODEL_KEY)
+        if not isinstance(stored, dict) or stored.get("hash_dim") != HASH_DIM:
+            return False
+        weights = np.frombuffer(base64.b64decode(stored["weights"]), dtype="<f4").astype(np.float32)
+        self.weights, self.bias = weights, float(stored["bias"])
+        return True
+
+
+def record_example(fields: Dict[str, Any], is_checkable: bool):
+    """Stores a Gemini is_checkable decision as a training example"""
+    pipe = crud.valkey_pipeline()
+    pipe.lpush(EXAMPLES_KEY, json.dumps({**fields, "label": bool(is_checkable)}, ensure_ascii=False))
+    pipe.ltrim(EXAMPLES_KEY, 0, MAX_EXAMPLES - 1)
+    pipe.execute()
+
+
+def train() -> Dict[str, Any]:
+    """Trains on the recorded examples and stores the model in Valkey"""
+    examples = [json.loads(e) for e in crud.valkey_lrange(EXAMPLES_KEY, 0, MAX_EXAMPLES - 1)]
+    labels = {bool(e.get("label")) for e in examples}
+    if len(examples) < MIN_TRAINING_EXAMPLES or len(labels) < 2:
+        return {"status": "skipped", "examples": len(examples),
+                "reason": f"need {MIN_TRAINING_EXAMPLES}+ examples of both classes"}
+
+    triage = CheckabilityTriage.from_file(DEFAULT_LEXICON_PATH)
+    report = triage.fit(examples)
+    triage.save_model()
+    set_default_triage(triage)
+    return {"status": "trained", **report}
+
+
+_default_triage = None
+_model_loaded_at: Optional[float] = None
+
+
+def get_default_triage() -> CheckabilityTriage:
+    """
+    Process-wide triage; (re)loads the trained model from Valkey if there is one,
+    at most every MODEL_RELOAD_SECONDS
+    """
+    global _default_triage, _model_loaded_at
+    if _default_triage is None:
+        _default_triage = CheckabilityTriage.from_file(DEFAULT_LEXICON_PATH)
+        _model_loaded_at = None
+    triage = _default_triage
+    if _model_loaded_at is None or time.monotonic() - _model_loaded_at >= MODEL_RELOAD_SECONDS:
+        _model_loaded_at = time.monotonic()
+        try:
+            triage.load_model()
+        except Exception as e:
+            print(f"[!] Loading triage model failed, keeping the current one: {e}")
+    return triage
+
+
+def set_default_triage(triage: Optional[CheckabilityTriage]):
+    global _default_triage, _model_loaded_at
+    _default_triage = triage
+    _model_loaded_at = time.monotonic() if triage is not None else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkability triage model")
+    parser.add_argument("command", choices=["train"])
+    args = parser.parse_args()
+    print(json.dumps(train(), indent=2))
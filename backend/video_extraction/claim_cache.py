@@ -0,0 +1,201 @@
+"""
+Claim Evidence Cache
+Caches web search results per claim, so the same claim showing up in many news
+videos ("inflation hit 9.1% in June 2022") is only searched once.
+
+Features:
+- Normalized Keys: case, punctuation, number formats ("9.1 percent", "$1,000",
+  "five million") and stopwords are canonicalized before hashing. Negations are
+  kept ("isn't" -> "not"), so a claim and its denial never share a key.
+- Freshness-Based TTL: claims about breaking / current events expire within hours,
+  claims about past years are kept for weeks, empty results are retried soon.
+- Two Tiers: a small in-process LRU in front of Valkey ("claim_cache:<backend>:<hash>");
+  each evidence backend gets its own entries.
+- Metrics: memory hits, Valkey hits and misses, aggregated in "claim_cache:stats".
+"""
+
+import os
+import re
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from valkey_rest import crud
+from video_extraction.utils.text import STOPWORDS
+
+# --- Configuration ---
+CACHE_PREFIX = "claim_cache"
+STATS_KEY = f"{CACHE_PREFIX}:stats"
+CACHE_ENABLED = os.environ.get("CLAIM_CACHE_ENABLED", "1") != "0"
+MEMORY_ENTRIES = 1024
+
+TTL_BREAKING = 6 * 3600             # "today", "breaking", the current year, ...
+TTL_DEFAULT = 3 * 24 * 3600
+TTL_HISTORICAL = 30 * 24 * 3600     # only mentions years before last year
+TTL_EMPTY = 30 * 60                 # no results: try again soon
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "twenty": 20, "thirty": 30,
+    "forty": 40, "fifty": 50, "hundred": 100
+}
+MULTIPLIERS = {"thousand": 10 ** 3, "k": 10 ** 3, "million": 10 ** 6, "m": 10 ** 6,
+               "billion": 10 ** 9, "bn": 10 ** 9, "b": 10 ** 9, "trillion": 10 ** 12}
+CURRENCY_WORDS = {"dollar", "dollars", "usd", "euro", "euros", "pound", "pounds"}
+NEGATIONS = frozenset({"not", "no", "nor", "never", "none", "neither", "nobody", "nothing",
+                       "nowhere", "without"})
+BREAKING_WORDS = {"today", "tonight", "yesterday", "breaking", "currently", "now", "latest",
+                  "this week", "this month", "right now", "ongoing", "just"}
+
+_TOKEN = re.compile(r"\d+(?:\.\d+)?%?|[a-z]+")
+_YEAR = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def normalize_claim(claim: str) -> str:
+    """Canonical form of a claim, used as the cache key"""
+    text = (claim or "").replace("\u2019", "'")
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", text)                # 1,000 -> 1000
+    text = re.sub(r"\s*(?:percent|per cent|pct)\b", "%", text)    # 9.1 percent -> 9.1%
+    text = text.replace("$", " ").replace("€", " ").replace("£", " ")
+    text = re.sub(r"\bcannot\b", "can not", text)
+    text = re.sub(r"n't\b", " not", text)                        # isn't -> is not
+
+    tokens = _TOKEN.findall(text)
+    out: List[str] = []
+    for token in tokens:
+        if token in NUMBER_WORDS:
+            token = str(NUMBER_WORDS[token])
+        if token in MULTIPLIERS and out and re.fullmatch(r"\d+(?:\.\d+)?", out[-1]):
+            out[-1] = _format_number(float(out[-1]) * MULTIPLIERS[token])
+            continue
+        if (token in STOPWORDS and token not in NEGATIONS) or token in CURRENCY_WORDS:
+            continue
+        out.append(token)
+    return " ".join(out)
+
+
+def claim_ttl(claim: str, results: List[Dict[str, Any]]) -> int:
+    """How long search results for this claim stay fresh"""
+    if not results:
+        return TTL_EMPTY
+    text = (claim or "").lower()
+    current_year = datetime.now().year
+    years = [int(y) for y in _YEAR.findall(text)]
+
+    if any(w in text for w in BREAKING_WORDS if " " in w) or any(
+            t in BREAKING_WORDS for t in re.findall(r"[a-z]+", text)):
+        return TTL_BREAKING
+    if any(y >= current_year for y in years):
+        return TTL_BREAKING
+    if years and max(years) < current_year - 1:
+        return TTL_HISTORICAL
+    return TTL_DEFAULT
+
+
+class ClaimEvidenceCache:
+    """Search results per normalized claim: in-process LRU + Valkey with TTL"""
+
+    def __init__(self, memory_entries: int = MEMORY_ENTRIES):
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (expires_at, results)
+        self._lock = threading.Lock()
+        self.local_stats = {"memory_hits": 0, "valkey_hits": 0, "misses": 0, "stores": 0}
+
+    def make_key(self, claim: str, backend: str = "duckduckgo") -> str:
+        digest = hashlib.sha1(normalize_claim(claim).encode("utf-8")).hexdigest()
+        return f"{CACHE_PREFIX}:{backend}:{digest}"
+
+    def _record(self, outcome: str, amount: int = 1):
+        if not amount:
+            return
+        with self._lock:
+            self.local_stats[outcome] += amount
+        try:
+            crud.valkey_hincr(STATS_KEY, outcome, amount)
+        except Exception as e:
+            print(f"[!] Claim cache stats update failed: {e}")
+
+    def _remember(self, key: str, results: List[Dict], ttl: int):
+        with self._lock:
+            self._memory[key] = (time.time() + ttl, results)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_many(self, claims: List[str], backend: str = "duckduckgo") -> List[Optional[List[Dict]]]:
+        """Cached results of `backend` per claim (None on a miss); Valkey is read in one round trip"""
+        keys = [self.make_key(c, backend) for c in claims]
+        found: List[Optional[List[Dict]]] = [None] * len(claims)
+
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._memory.get(key)
+                if entry and entry[0] > now:
+                    self._memory.move_to_end(key)
+                    found[i] = entry[1]
+        memory_hits = sum(r is not None for r in found)
+
+        missing = [i for i, r in enumerate(found) if r is None]
+        valkey_hits = 0
+        if missing:
+            try:
+                stored = crud.valkey_mget([keys[i] for i in missing])
+            except Exception as e:
+                print(f"[!] Claim cache read failed: {e}")
+                stored = [None] * len(missing)
+            for i, entry in zip(missing, stored):
+                if isinstance(entry, dict) and isinstance(entry.get("results"), list):
+                    found[i] = entry["results"]
+                    valkey_hits += 1
+                    self._remember(keys[i], entry["results"], int(entry.get("ttl", TTL_DEFAULT)))
+
+        self._record("memory_hits", memory_hits)
+        self._record("valkey_hits", valkey_hits)
+        self._record("misses", len(claims) - memory_hits - valkey_hits)
+        return found
+
+    def put(self, claim: str, results: List[Dict], backend: str = "duckduckgo"):
+        key = self.make_key(claim, backend)
+        ttl = claim_ttl(claim, results)
+        self._remember(key, results, ttl)
+        try:
+            crud.valkey_set(key, {"claim": claim, "results": results, "ttl": ttl,
+                                  "cached_at": time.time()}, expire=ttl)
+            self._record("stores")
+        except Exception as e:
+            print(f"[!] Claim cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate aggregated over all processes via Valkey"""
+        try:
+            raw = {k: int(v) for k, v in crud.valkey_hgetall(STATS_KEY).items()}
+        except Exception:
+            raw = dict(self.local_stats)
+        report = {k: raw.get(k, 0) for k in ("memory_hits", "valkey_hits", "misses", "stores")}
+        lookups = report["memory_hits"] + report["valkey_hits"] + report["misses"]
+        report["hit_ratio"] = round((report["memory_hits"] + report["valkey_hits"]) / lookups, 4) if lookups else 0.0
+        report["memory_entries"] = len(self._memory)
+        return report
+
+
+# Process-wide cache instance. Replace it with set_claim_cache() (None disables caching).
+_claim_cache: Optional[ClaimEvidenceCache] = ClaimEvidenceCache() if CACHE_ENABLED else None
+
+
+def get_claim_cache() -> Optional[ClaimEvidenceCache]:
+    return _claim_cache
+
+
+def set_claim_cache(cache: Optional[ClaimEvidenceCache]):
+    global _claim_cache
+    _claim_cache = cache
@@ -0,0 +1,167 @@
+"""
+Claim Similarity Index
+Maps new claims to claims that were already verified (in any video), so
+paraphrases of the same statement reuse the stored verdict instead of going
+through search and Gemini again.
+
+Method:
+- Claims are normalized (claim_cache.normalize_claim) and MinHashed over
+  character shingles (near_duplicates.minhash_signatures).
+- LSH bands are Valkey sets "claim_index:band:<band>:<key>" -> claim ids; a lookup
+  reads the buckets of all claims in one pipelined round trip.
+- Candidates are verified by estimated Jaccard similarity of their stored signature,
+  and must agree exactly on numbers, percentages and years and on negation
+  ("is safe" never reuses the verdict of "is not safe").
+
+Entries ("claim_index:claim:<id>") keep the verdict, explanation, provenance
+(video, original claim text, verification time) and the evidence sources, so a
+reused verdict still feeds perspectives and bias distribution. They expire like
+the claim's search results (claim_cache.claim_ttl): a verdict on breaking news is
+rechecked within hours, one on a historical claim is kept for weeks. The LSH
+buckets live CLAIM_INDEX_TTL, which also caps every entry.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from valkey_rest import crud
+from video_extraction.claim_cache import normalize_claim, claim_ttl, NEGATIONS
+from video_extraction.near_duplicates import minhash_signatures, band_keys, BANDS, SHINGLE_SIZE
+
+PREFIX = "claim_index"
+
+# --- Configuration ---
+SIMILARITY_THRESHOLD = float(os.environ.get("CLAIM_SIMILARITY_THRESHOLD", 0.7))
+CLAIM_INDEX_TTL = int(os.environ.get("CLAIM_INDEX_TTL", 30 * 24 * 3600))
+REUSABLE_VERDICTS = {"True", "False"}       # "Unverified" may just mean the search came up empty
+MAX_STORED_EVIDENCE = 8                     # evidence sources kept per entry
+
+
+def _claim_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def _band_key(band: int, key: np.uint64) -> str:
+    return f"{PREFIX}:band:{band}:{int(key):016x}"
+
+
+def _encode_signature(signature: np.ndarray) -> str:
+    return base64.b64encode(signature.astype("<u8").tobytes()).decode("ascii")
+
+
+def _decode_signature(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<u8").astype(np.uint64)
+
+
+def _facts(normalized: str):
+    """What must match exactly for a verdict to carry over: the numbers and the polarity"""
+    tokens = normalized.split()
+    return sorted(t for t in tokens if t[0].isdigit()), sum(t in NEGATIONS for t in tokens) % 2
+
+
+def _signatures(claims: List[str]):
+    normalized = [normalize_claim(c) for c in claims]
+    return normalized, minhash_signatures(normalized)
+
+
+def find_matches(claims: List[str], threshold: float = SIMILARITY_THRESHOLD) -> List[Optional[Dict[str, Any]]]:
+    """
+    The best previously verified claim for each claim (or None).
+    A match: {"claim", "verdict", "explanation", "video_id", "verified_at", "similarity", "evidence"}
+    """
+    matches: List[Optional[Dict[str, Any]]] = [None] * len(claims)
+    if not claims:
+        return matches
+
+    normalized, signatures = _signatures(claims)
+    keys = band_keys(signatures)
+
+    # Claims too short to shingle have no meaningful signature
+    valid = [i for i, n in enumerate(normalized) if len(n) >= SHINGLE_SIZE]
+
+    # 1. Candidate ids from every band bucket of every claim (one round trip)
+    pipe = crud.valkey_pipeline()
+    for i in valid:
+        for band in range(BANDS):
+            pipe.smembers(_band_key(band, keys[band][i]))
+    buckets = pipe.execute() if valid else []
+
+    candidates = [set() for _ in claims]
+    for n, i in enumerate(valid):
+        for members in buckets[n * BANDS:(n + 1) * BANDS]:
+            candidates[i].update(members)
+
+    all_ids = sorted(set().union(*candidates))
+    if not all_ids:
+        return matches
+
+    # 2. Stored entries of the candidates, verified against the signature
+    entries = dict(zip(all_ids, crud.valkey_mget([f"{PREFIX}:claim:{cid}" for cid in all_ids])))
+    for i, ids in enumerate(candidates):
+        best, best_similarity = None, threshold
+        for cid in ids:
+            entry = entries.get(cid)
+            if not isinstance(entry, dict) or "signature" not in entry:
+                continue
+            if _facts(normalize_claim(entry.get("claim") or "")) != _facts(normalized[i]):
+                continue
+            similarity = float((_decode_signature(entry["signature"]) == signatures[i]).mean())
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        if best is not None:
+            matches[i] = {
+                "claim": best.get("claim"),
+                "verdict": best.get("verdict"),
+                "explanation": best.get("explanation"),
+                "video_id": best.get("video_id"),
+                "verified_at": best.get("verified_at"),
+                "similarity": round(best_similarity, 3),
+                "evidence": best.get("evidence") or []
+            }
+    return matches
+
+
+def add_verdicts(video_id: str, fact_checks: List[Dict[str, Any]],
+                 evidence: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> int:
+    """
+    Indexes verified claims ({"claim", "verdict", "explanation"}) together with the
+    search results they were judged on (`evidence`: claim text -> results);
+    returns how many were added
+    """
+    checks = [fc for fc in fact_checks
+              if fc.get("claim") and fc.get("verdict") in REUSABLE_VERDICTS and not fc.get("reused_from")]
+    if not checks:
+        return 0
+
+    normalized, signatures = _signatures([fc["claim"] for fc in checks])
+    keys = band_keys(signatures)
+    results_by_claim = {normalize_claim(claim): results for claim, results in (evidence or {}).items()}
+
+    pipe = crud.valkey_pipeline()
+    for i, fc in enumerate(checks):
+        if len(normalized[i]) < SHINGLE_SIZE:
+            continue
+        cid = _claim_id(normalized[i])
+        results = results_by_claim.get(normalized[i]) or []
+        sources = [{k: r.get(k) for k in ("title", "source", "url")} for r in results[:MAX_STORED_EVIDENCE]]
+        pipe.set(f"{PREFIX}:claim:{cid}", json.dumps({
+            "claim": fc["claim"],
+            "verdict": fc["verdict"],
+            "explanation": fc.get("explanation", ""),
+            "video_id": video_id,
+            "verified_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "signature": _encode_signature(signatures[i]),
+            "evidence": sources
+        }, ensure_ascii=False), ex=min(claim_ttl(fc["claim"], results), CLAIM_INDEX_TTL))
+        for band in range(BANDS):
+            bucket = _band_key(band, keys[band][i])
+            pipe.sadd(bucket, cid)
+            pipe.expire(bucket, CLAIM_INDEX_TTL)
+    pipe.execute()
+    return len(checks)
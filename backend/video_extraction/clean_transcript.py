@@ -3,6 +3,7 @@ import os
 import json
 
 import valkey_rest
+from video_extraction import search_index
 
 def clean_vtt(file_path, video_id):
     """
@@ -59,7 +60,13 @@ def clean_vtt(file_path, video_id):
             json.dump(output_data, f, indent=4, ensure_ascii=False)
             
         # CRUD PUT 3. Save the clean trascript data to Valkey with the key "VIDEO_ID_clean_transcript.json"
-        valkey_rest.crud.valkey_set(video_id + "_clean_transcript.json", json.dump(output_data, indent=4, ensure_ascii=False))
+        valkey_rest.crud.valkey_set(video_id + "_clean_transcript.json", json.dumps(output_data, indent=4, ensure_ascii=False))
+
+        # Make the transcript searchable (/search)
+        try:
+            search_index.index_transcript(video_id, transcript_string)
+        except Exception as e:
+            print(f"[!] Search indexing failed for {video_id}: {e}")
 
         print(f"Transcript saved to: {json_path}")
         return True
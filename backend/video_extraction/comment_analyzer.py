@@ -8,16 +8,43 @@ import json
 import sys
 import os
 import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+import numpy as np
+
 from valkey_rest import crud
 from valkey_rest.crud import valkey_get
+from video_extraction import author_index, gemini_cache, gemini_client
+from video_extraction.comment_store import load_comments, store_comments
+from video_extraction.comment_sampler import CommentSampler, flatten_comments, author_key
+from video_extraction.keyword_matcher import get_default_matcher
+from video_extraction.near_duplicates import find_near_duplicates
+from video_extraction.sentiment_classifier import get_default_classifier, count_labels, LABELS
+from video_extraction.video_data_extractor import fetch_new_comments
+from video_extraction.token_budget import (
+    TokenBudget, TokenBudgetExceeded, PER_CALL_PROMPT_LIMITS, OUTPUT_RESERVE, fit_text, estimate_tokens)
 
 # --- Configuration ---
 # We use Gemini 2.0 Flash as it is the current standard for new API keys
 DEFAULT_MODEL = "gemini-3-flash-preview"
 
+# Approximate size of the fixed instructions in the analysis prompt
+PROMPT_OVERHEAD_TOKENS = 800
+
+# "sample": one call over representative comments; "map_reduce": every comment, in parallel chunks
+ANALYSIS_MODE = os.environ.get("COMMENT_ANALYSIS_MODE", "sample")
+MAP_CHUNK_TOKENS = int(os.environ.get("COMMENT_MAP_CHUNK_TOKENS", 6000))
+MAP_WORKERS = int(os.environ.get("COMMENT_MAP_WORKERS", 4))
+MAP_CONTEXT_TOKENS = 400        # transcript summary repeated in every chunk prompt
+MAP_PROMPT_OVERHEAD_TOKENS = 400
+
+# Sentiment is scored locally; at most this many ambiguous / sarcastic comments go to Gemini
+MAX_SENTIMENT_ESCALATIONS = int(os.environ.get("MAX_SENTIMENT_ESCALATIONS", 300))
+ESCALATION_COMMENT_CHARS = 300
+
 # Check for the new Google GenAI SDK
 try:
     from google import genai
@@ -27,6 +54,18 @@ except ImportError:
     GEMINI_AVAILABLE = False
 
 
+def _as_int(value: Any) -> Optional[int]:
+    """int() for model output: 12, 12.0 and "12" pass, missing counts as 0, anything else is None"""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
 class CommentAnalyzer:
     """Analyzes YouTube comments for manipulation and credibility"""
 
@@ -37,8 +76,8 @@ class CommentAnalyzer:
 
         if GEMINI_AVAILABLE and self.api_key:
             try:
-                # NEW SDK Initialization
-                self.client = genai.Client(api_key=self.api_key)
+                # Shared, process-wide client (connection reuse + global rate limits)
+                self.client = gemini_client.get_client(self.api_key)
                 self.use_ai = True
                 print(f"[OK] AI mode enabled ({DEFAULT_MODEL})")
             except Exception as e:
@@ -91,17 +130,34 @@ class CommentAnalyzer:
 
         return context_str
 
-    def analyze_with_ai(self, video_data: Dict[str, Any], transcript_context: str) -> Dict[str, Any]:
+    def analyze_with_ai(self, video_data: Dict[str, Any], transcript_context: str,
+                        budget: Optional[TokenBudget] = None) -> Dict[str, Any]:
         """Use Gemini AI for advanced analysis with Transcript Context"""
         comments = video_data.get('comments', [])
         title = video_data.get('title', 'Unknown Video')
-        description = video_data.get('description', '')[:500]
+        description = (video_data.get('description') or '')[:500]
 
         if not comments:
             return self._create_empty_analysis("No comments to analyze")
 
-        # Analyze a larger sample since we are summarizing metrics
-        comments_text = self._format_comments_for_prompt(comments[:200])
+        try:
+            prompt_limit = budget.require("comment_analysis") if budget else PER_CALL_PROMPT_LIMITS["comment_analysis"]
+        except TokenBudgetExceeded as e:
+            print(f"[!] {e}. Falling back to rule-based.")
+            return self._analyze_fallback(video_data)
+
+        # Transcript context may use up to a quarter of the prompt, comments get the rest
+        transcript_context = fit_text(transcript_context, prompt_limit // 4)
+        comment_allowance = prompt_limit - PROMPT_OVERHEAD_TOKENS - estimate_tokens(
+            transcript_context) - estimate_tokens(title) - estimate_tokens(description)
+
+        # Cluster the whole comment section and send representatives of every cluster
+        sampler = CommentSampler()
+        sample = sampler.sample(comments, comment_allowance)
+        comments_text = sampler.format_for_prompt(sample)
+        total_comments = sample["total"]
+        print(f"   Sampled {sum(len(c['comments']) for c in sample['clusters'])} of {total_comments} "
+              f"comments from {len(sample['clusters'])} clusters.")
 
         prompt = f"""
         Act as an expert Social Media Analyst. Analyze these YouTube comments in the context of the video transcript provided.
@@ -113,6 +169,9 @@ class CommentAnalyzer:
         {transcript_context}
 
         === COMMENTS TO ANALYZE ===
+        The video has {total_comments} comments (including replies). They were grouped into clusters of
+        similar comments; each cluster header gives how many comments it stands for, followed by a few
+        representative comments.
         {comments_text}
 
         === ANALYSIS INSTRUCTIONS ===
@@ -126,11 +185,6 @@ class CommentAnalyzer:
         === REQUIRED OUTPUT FORMAT (JSON) ===
         Strictly output JSON with no markdown formatting.
         {{
-          "sentiment_counts": {{
-            "positive": <int count>,
-            "negative": <int count>,
-            "neutral": <int count>
-          }},
           "engagement_metrics": {{
             "engagement_score": <int 0-100 based on genuine discussion depth and relevance>,
             "bot_activity_percentage": <int 0-100>
@@ -145,56 +199,120 @@ class CommentAnalyzer:
 
         try:
             # NEW SDK Call Structure
-            response = self.client.models.generate_content(
+            response_text = gemini_cache.generate_content(
+                self.client,
                 model=DEFAULT_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json"
-                )
+                ),
+                call_site="comment_analysis",
+                budget=budget,
+                validate=gemini_cache.json_validator(
+                    "engagement_metrics", "community_insights", "summary_of_vibe")
             )
-            return json.loads(response.text)
+            result = json.loads(response_text)
         except Exception as e:
             print(f"[!] AI Analysis failed ({e}). Falling back to rule-based.")
             return self._analyze_fallback(video_data)
 
+        # Sentiment for every comment: local first pass, Gemini only for the ambiguous ones
+        result["sentiment_counts"], result["sentiment_coverage"] = self.classify_sentiment(
+            comments, title, transcript_context, budget)
+        return result
+
+    def classify_sentiment(self, comments: List[Dict], title: str = "", transcript_context: str = "",
+                           budget: Optional[TokenBudget] = None) -> tuple:
+        """
+        Sentiment counts over every comment and reply.
+        Returns (sentiment_counts, coverage) where coverage tells how many labels came from where.
+        """
+        flat = flatten_comments(comments)
+        scored = get_default_classifier().classify_batch(c['text'] for c in flat)
+        labels = list(scored["labels"])
+
+        # Most-liked ambiguous comments first, they shape the perceived vibe the most
+        review = np.flatnonzero(scored["needs_review"]).tolist()
+        review.sort(key=lambda i: flat[i]['likes'], reverse=True)
+        escalated = review[:MAX_SENTIMENT_ESCALATIONS] if self.use_ai else []
+
+        resolved = self._escalate_sentiment([flat[i]['text'] for i in escalated], title,
+                                            transcript_context, budget) if escalated else {}
+        for pos, label in resolved.items():
+            labels[escalated[pos]] = label
+
+        return count_labels(labels), {
+            "comments": len(flat),
+            "local": len(flat) - len(resolved),
+            "flagged_ambiguous": len(review),
+            "resolved_by_ai": len(resolved)
+        }
+
+    def _escalate_sentiment(self, texts: List[str], title: str, transcript_context: str,
+                            budget: Optional[TokenBudget] = None) -> Dict[int, str]:
+        """Asks Gemini for per-comment labels; returns {position in texts: label}"""
+        try:
+            prompt_limit = budget.require("comment_analysis") if budget else PER_CALL_PROMPT_LIMITS["comment_analysis"]
+        except TokenBudgetExceeded as e:
+            print(f"[!] {e}. Keeping local sentiment labels.")
+            return {}
+
+        context = fit_text(transcript_context, 300)
+        lines = [f"{i + 1}. " + " ".join(t.split())[:ESCALATION_COMMENT_CHARS] for i, t in enumerate(texts)]
+        allowance = prompt_limit - PROMPT_OVERHEAD_TOKENS - estimate_tokens(context)
+        used, kept = 0, []
+        for line in lines:
+            used += estimate_tokens(line) + 1
+            if used > allowance:
+                break
+            kept.append(line)
+        if not kept:
+            return {}
+        comments_text = "\n".join(kept)
+
+        prompt = f"""
+        Classify the sentiment of each YouTube comment toward the video. These comments were flagged as
+        ambiguous: watch for sarcasm, irony and mixed feelings. Anger about a negative topic the video
+        covers counts as agreeing with the video (positive), not attacking it.
+
+        Title: "{title}"
+        TRANSCRIPT SUMMARY: {context}
+
+        COMMENTS:
+        {comments_text}
+
+        Strictly output JSON with no markdown formatting, one label per comment in the same order:
+        {{"labels": ["positive" | "negative" | "neutral", ...]}}
+        """
+        try:
+            response_text = gemini_cache.generate_content(
+                self.client,
+                model=DEFAULT_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+                call_site="comment_analysis",
+                budget=budget,
+                # A cut-off answer has fewer labels than comments
+                validate=gemini_cache.json_validator(
+                    "labels", check=lambda r: isinstance(r["labels"], list) and len(r["labels"]) >= len(kept))
+            )
+            labels = json.loads(response_text).get("labels", [])
+        except Exception as e:
+            print(f"[!] Sentiment escalation failed ({e}). Keeping local labels.")
+            return {}
+
+        return {i: label for i, label in enumerate(labels[:len(kept)]) if label in LABELS}
+
     def _analyze_fallback(self, video_data: Dict[str, Any]) -> Dict[str, Any]:
         """Rule-based analysis (No AI required) - Matches new Output Structure"""
-        comments = video_data.get('comments', [])
+        comments = flatten_comments(video_data.get('comments', []))
 
         if not comments:
             return self._create_empty_analysis("No comments available")
 
-        # 1. Keywords
-        bot_keywords = ['great video', 'nice', 'love it', 'amazing',
-                        'cool', 'wow', 'best', 'promo', 'check my channel']
-        skeptic_keywords = ['fake', 'scam',
-                            'lie', 'false', 'debunk', 'clickbait']
-        positive_keywords = ['love', 'agree', 'good',
-                             'thanks', 'informative', 'lol', 'funny']
-
-        # 2. Counters
+        # 1. Keywords + 2. Counters
         total = len(comments)
-        metrics = {
-            'positive': 0, 'negative': 0, 'neutral': 0,
-            'bot': 0, 'total_len': 0
-        }
-
-        for c in comments:
-            text = c.get('text', '').lower()
-            t_len = len(text)
-            metrics['total_len'] += t_len
-
-            # Bot Detection (Simple Heuristic: Short + Generic)
-            if t_len < 25 and any(k in text for k in bot_keywords):
-                metrics['bot'] += 1
-
-            # Sentiment (Simple Keyword Matching)
-            elif any(k in text for k in positive_keywords):
-                metrics['positive'] += 1
-            elif any(k in text for k in skeptic_keywords):
-                metrics['negative'] += 1
-            else:
-                metrics['neutral'] += 1
+        metrics = self._rule_based_counts([c.get('text') or '' for c in comments])
 
         # 3. Calculate Scores
         p_bot = round((metrics['bot'] / total) * 100) if total > 0 else 0
@@ -222,9 +340,270 @@ class CommentAnalyzer:
                 "dominant_topic": "No Dominant Topic Detected",
                 "controversy_level": "High" if metrics['negative'] > metrics['positive'] else "Low"
             },
-            "summary_of_vibe": "Rule-based analysis performed. Sentiment derived from keywords only."
+            "summary_of_vibe": "Rule-based analysis performed. Sentiment scored with the local lexicon classifier."
         }
 
+    def _rule_based_counts(self, texts: List[str]) -> Dict[str, int]:
+        """Local sentiment and bot counts for a batch of comment texts"""
+        # Keywords (lexicons/comment_lexicons.json), matched for the whole batch in one pass
+        labels = get_default_matcher().classify_batch(texts)
+        sentiment = get_default_classifier().classify_batch(texts)["labels"]
+
+        metrics = {
+            'positive': 0, 'negative': 0, 'neutral': 0,
+            'bot': 0, 'total_len': 0
+        }
+
+        for text, categories, label in zip(texts, labels, sentiment):
+            t_len = len(text)
+            metrics['total_len'] += t_len
+
+            # Bot Detection (Simple Heuristic: Short + Generic)
+            if t_len < 25 and 'bot' in categories:
+                metrics['bot'] += 1
+
+            # Sentiment (local lexicon classifier)
+            else:
+                metrics[label] += 1
+        return metrics
+
+    # --- Map-Reduce Mode ---
+    def _chunk_lines(self, lines: List[str], max_tokens: int) -> List[tuple]:
+        """(start, end) ranges of consecutive lines, each within max_tokens"""
+        chunks = []
+        start, used = 0, 0
+        for i, line in enumerate(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > max_tokens and i > start:
+                chunks.append((start, i))
+                start, used = i, 0
+            used += cost
+        if start < len(lines):
+            chunks.append((start, len(lines)))
+        return chunks
+
+    def _validate_chunk(self, result: Any) -> Optional[Dict[str, Any]]:
+        """The chunk result with integer counts, or None if any count is not a number"""
+        if not isinstance(result, dict):
+            return None
+        counts = result.get("sentiment_counts")
+        counts = counts if isinstance(counts, dict) else {}
+        sentiment = {k: _as_int(counts.get(k)) for k in ("positive", "negative", "neutral")}
+        bot_count = _as_int(result.get("bot_count"))
+        engagement = _as_int(result.get("engagement_score"))
+        if None in sentiment.values() or bot_count is None or engagement is None:
+            return None
+        return {**result, "sentiment_counts": sentiment, "bot_count": bot_count, "engagement_score": engagement}
+
+    def _normalize_counts(self, counts: Dict[str, int], size: int) -> Dict[str, int]:
+        """Clamps a chunk's (validated) sentiment counts so they add up to the chunk size"""
+        values = {k: max(0, counts.get(k, 0)) for k in ("positive", "negative", "neutral")}
+        total = sum(values.values())
+        if total > size:
+            values = {k: v * size // total for k, v in values.items()}
+            total = sum(values.values())
+        values["neutral"] += size - total
+        return values
+
+    def _analyze_chunk(self, index: int, lines: List[str], context: str,
+                       budget: Optional[TokenBudget] = None) -> Optional[Dict[str, Any]]:
+        """Map step: counts and a one-line summary for one chunk of comments"""
+        comments_text = "\n".join(lines)
+        prompt = f"""
+        Act as an expert Social Media Analyst. Below is chunk {index + 1} of a video's comment section.
+        Classify EVERY comment in this chunk.
+
+        VIDEO CONTEXT: {context}
+
+        COMMENTS ({len(lines)}):
+        {comments_text}
+
+        Rules: anger at a negative topic covered by the video counts as agreeing with the video, not
+        attacking it. Only count repetitive text as bot if it is generic and unrelated to the video.
+
+        Strictly output JSON with no markdown formatting.
+        {{
+          "sentiment_counts": {{"positive": <int>, "negative": <int>, "neutral": <int>}},
+          "bot_count": <int>,
+          "engagement_score": <int 0-100 based on genuine discussion depth and relevance>,
+          "dominant_topic": "<main subject of this chunk>",
+          "controversy_level": "<Low/Medium/High>",
+          "chunk_summary": "<1 sentence on how these commenters feel>"
+        }}
+        """
+        try:
+            response_text = gemini_cache.generate_content(
+                self.client,
+                model=DEFAULT_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+                call_site="comment_analysis",
+                budget=budget,
+                validate=gemini_cache.json_validator(check=self._validate_chunk)
+            )
+            result = self._validate_chunk(json.loads(response_text))
+            if result is None:
+                print(f"[!] Comment chunk {index + 1} returned malformed counts. Using rule-based counts.")
+            return result
+        except Exception as e:
+            print(f"[!] Comment chunk {index + 1} failed ({e}). Using rule-based counts.")
+            return None
+
+    def _reduce_with_ai(self, title: str, context: str, totals: Dict[str, int], bot_percentage: int,
+                        chunk_notes: List[str], budget: Optional[TokenBudget] = None) -> Optional[Dict[str, Any]]:
+        """Reduce step: one call over the chunk summaries for the overall topic and vibe"""
+        try:
+            prompt_limit = budget.require("comment_analysis") if budget else PER_CALL_PROMPT_LIMITS["comment_analysis"]
+        except TokenBudgetExceeded as e:
+            print(f"[!] {e}. Skipping the summary call.")
+            return None
+
+        notes = "\n".join(chunk_notes)
+        notes = fit_text(notes, prompt_limit - PROMPT_OVERHEAD_TOKENS - estimate_tokens(context))
+        prompt = f"""
+        Act as an expert Social Media Analyst. A video's full comment section was analyzed in chunks.
+
+        Title: "{title}"
+        TRANSCRIPT SUMMARY: {context}
+
+        OVERALL COUNTS: {json.dumps(totals)} (bot activity {bot_percentage}%)
+
+        CHUNK SUMMARIES (comment count, topic, controversy, summary):
+        {notes}
+
+        Strictly output JSON with no markdown formatting.
+        {{
+          "dominant_topic": "<The main subject the comments are discussing>",
+          "controversy_level": "<Low/Medium/High>",
+          "summary_of_vibe": "<2 sentences summarizing how the audience feels about the video content>"
+        }}
+        """
+        try:
+            response_text = gemini_cache.generate_content(
+                self.client,
+                model=DEFAULT_MODEL,
+                contents=prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json"),
+                call_site="comment_analysis",
+                budget=budget,
+                validate=gemini_cache.json_validator("dominant_topic", "controversy_level", "summary_of_vibe")
+            )
+            result = json.loads(response_text)
+            return result if isinstance(result, dict) else None
+        except Exception as e:
+            print(f"[!] Comment summary call failed ({e}).")
+            return None
+
+    def analyze_map_reduce(self, video_data: Dict[str, Any], transcript_context: str,
+                           budget: Optional[TokenBudget] = None) -> Dict[str, Any]:
+        """Analyzes EVERY comment: token-bounded chunks in parallel (map), then one summary call (reduce)"""
+        flat = flatten_comments(video_data.get('comments', []))
+        if not flat:
+            return self._create_empty_analysis("No comments to analyze")
+
+        sampler = CommentSampler()
+        lines = [sampler.render_comment(c) for c in flat]
+        context = fit_text(transcript_context, MAP_CONTEXT_TOKENS)
+        fixed_cost = MAP_PROMPT_OVERHEAD_TOKENS + estimate_tokens(context)
+        chunk_limit = min(MAP_CHUNK_TOKENS, PER_CALL_PROMPT_LIMITS["comment_analysis"]) - fixed_cost
+        chunks = self._chunk_lines(lines, chunk_limit)
+
+        # Plan how many chunks the budget pays for, keeping room for the reduce call;
+        # the rest is counted with the rule-based classifier so counts still cover everything
+        ai_chunks = len(chunks)
+        if budget is not None:
+            available = budget.remaining("comment_analysis") - (PROMPT_OVERHEAD_TOKENS + 80 * len(chunks) + OUTPUT_RESERVE)
+            spent = 0
+            for i, (start, end) in enumerate(chunks):
+                spent += fixed_cost + sum(estimate_tokens(l) + 1 for l in lines[start:end]) + OUTPUT_RESERVE
+                if spent > available:
+                    ai_chunks = i
+                    break
+        print(f"   Map step: {len(flat)} comments in {len(chunks)} chunks "
+              f"({ai_chunks} with AI, {MAP_WORKERS} in parallel)")
+
+        with ThreadPoolExecutor(max_workers=max(1, MAP_WORKERS)) as pool:
+            futures = [pool.submit(self._analyze_chunk, i, lines[start:end], context, budget)
+                       for i, (start, end) in enumerate(chunks[:ai_chunks])]
+            results = [f.result() for f in futures] + [None] * (len(chunks) - ai_chunks)
+
+        # Reduce: sum counts, weight scores by chunk size
+        totals = Counter(positive=0, negative=0, neutral=0)
+        bots, engagement_sum, ai_comments = 0, 0, 0
+        topics, controversy = Counter(), Counter()
+        chunk_notes = []
+        for (start, end), result in zip(chunks, results):
+            size = end - start
+            if result is None:
+                rb = self._rule_based_counts([c['text'] for c in flat[start:end]])
+                totals.update({k: rb[k] for k in ("positive", "negative", "neutral")})
+                bots += rb['bot']
+                continue
+            totals.update(self._normalize_counts(result.get("sentiment_counts"), size))
+            bots += min(size, max(0, result["bot_count"]))
+            engagement_sum += min(100, max(0, result["engagement_score"])) * size
+            ai_comments += size
+            topic = result.get("dominant_topic") or "Unknown"
+            level = result.get("controversy_level") or "Unknown"
+            topics[topic] += size
+            controversy[level] += size
+            chunk_notes.append(f"- ({size}) {topic} | {level} | {result.get('chunk_summary', '')}")
+
+        if not ai_comments:
+            print("[!] No chunk could be analyzed with AI. Falling back to rule-based.")
+            return self._analyze_fallback(video_data)
+
+        total = len(flat)
+        bot_percentage = round(bots / total * 100)
+        sentiment_counts = {k: totals[k] for k in ("positive", "negative", "neutral")}
+        final = self._reduce_with_ai(video_data.get('title', 'Unknown Video'), context,
+                                     sentiment_counts, bot_percentage, chunk_notes, budget) or {}
+
+        return {
+            "sentiment_counts": sentiment_counts,
+            "engagement_metrics": {
+                "engagement_score": round(engagement_sum / ai_comments),
+                "bot_activity_percentage": bot_percentage
+            },
+            "community_insights": {
+                "dominant_topic": final.get("dominant_topic") or topics.most_common(1)[0][0],
+                "controversy_level": final.get("controversy_level") or controversy.most_common(1)[0][0]
+            },
+            "summary_of_vibe": final.get("summary_of_vibe") or " ".join(
+                n.split(" | ", 2)[-1] for n in chunk_notes[:2]),
+            "coverage": {
+                "mode": "map_reduce",
+                "comments": total,
+                "chunks": len(chunks),
+                "ai_chunks": sum(r is not None for r in results),
+                "rule_based_comments": total - ai_comments
+            }
+        }
+
+    def _duplicate_metrics(self, comments: List[Dict]) -> Dict[str, Any]:
+        """Near-duplicate (copy-paste) clusters over every comment and reply"""
+        texts = [c.get('text') or '' for c in flatten_comments(comments)]
+        duplicates = find_near_duplicates(texts)
+        return {
+            "duplicate_comment_ratio": duplicates["duplicate_ratio"],
+            "duplicate_cluster_count": duplicates["cluster_count"],
+            "largest_duplicate_cluster": duplicates["largest_cluster_size"],
+            "duplicate_clusters": [
+                {"size": c["size"], "example": c["example"][:200]} for c in duplicates["clusters"]
+            ]
+        }
+
+    def _author_activity(self, video_id: str, comments: List[Dict]) -> Dict[str, Any]:
+        """High-fan-out commenters (many distinct videos), looked up in one pipelined pass"""
+        flat = flatten_comments(comments)
+        try:
+            return author_index.author_activity(video_id, [author_key(c) for c in flat],
+                                                [c.get('text') or '' for c in flat],
+                                                names=[c.get('author') for c in flat])
+        except Exception as e:
+            print(f"[!] Author activity lookup failed: {e}")
+            return {}
+
     def _format_comments_for_prompt(self, comments: List[Dict]) -> str:
         """Helper to format comments into a readable string for AI"""
         out = ""
@@ -243,8 +622,10 @@ class CommentAnalyzer:
             "summary_of_vibe": reason
         }
 
-    def run(self, video_id: str, output_path: Optional[str] = None, input_path: Optional[str] = None):
-        """Main execution flow"""
+    def run(self, video_id: str, output_path: Optional[str] = None, input_path: Optional[str] = None,
+            mode: Optional[str] = None):
+        """Main execution flow. mode: "sample" (default) or "map_reduce" """
+        mode = mode or ANALYSIS_MODE
 
         # 1. Load Video Data (Comments)
         metadata_key = video_id + "_summary.json"
@@ -266,7 +647,14 @@ class CommentAnalyzer:
             video_data = {'id': video_id, 'comments': comments}
         # ------------------------
 
-        print(f"   Loaded {len(video_data.get('comments', []))} comments.")
+        # The summary only holds the top threads; prefer the full columnar comment store
+        # CRUD GET 7. Fetch the full comment table from Valkey with the key "VIDEO_ID_comments.col"
+        columns = load_comments(video_id)
+        if columns is not None and len(columns):
+            video_data['comments'] = columns.to_tree()
+            print(f"   Loaded {len(columns)} comments from the comment store.")
+        else:
+            print(f"   Loaded {len(video_data.get('comments', []))} comments.")
 
         # 2. Load Transcript Context (if provided)
         # CRUD GET 4. Fetch the segmented summary data From Valkey with the key "VIDEO_ID_segmented_summary.json"
@@ -275,6 +663,7 @@ class CommentAnalyzer:
 
         if transcript_data is None:
             print("   No Transcript Context provided (running in Context-Blind mode)")
+            transcript_context = self._format_transcript_context({})
         else:
             print(f"   Formatting Transcript Context: {transcript_key}")
             transcript_context = self._format_transcript_context(
@@ -282,12 +671,25 @@ class CommentAnalyzer:
 
         # 3. Analyze
         if self.use_ai:
-            print("   Running AI Analysis (Context-Aware)...")
-            result = self.analyze_with_ai(video_data, transcript_context)
+            print(f"   Running AI Analysis (Context-Aware, {mode})...")
+            budget = TokenBudget.for_video(video_id)
+            if mode == "map_reduce":
+                result = self.analyze_map_reduce(video_data, transcript_context, budget=budget)
+            else:
+                result = self.analyze_with_ai(video_data, transcript_context, budget=budget)
+            budget.save()
         else:
             print("   Running Fallback Analysis (Rule-Based)...")
             result = self._analyze_fallback(video_data)
 
+        # Copy-paste campaigns are measured locally on the full comment set,
+        # accounts active on many other videos via the cross-video author index
+        if isinstance(result, dict):
+            engagement = result.setdefault("engagement_metrics", {})
+            if isinstance(engagement, dict):
+                engagement.update(self._duplicate_metrics(video_data.get('comments', [])))
+                engagement["author_activity"] = self._author_activity(video_id, video_data.get('comments', []))
+
         # 4. Save Output
         final_output = {
             "video_id": video_data.get('id', 'unknown'),
@@ -296,13 +698,20 @@ class CommentAnalyzer:
             "analysis": result  # This now contains the clean 4 keys requested
         }
 
-        if not output_path:
+        # Without an output or input path the analysis is only saved to Valkey
+        if not output_path and input_path:
             output_path = input_path.replace(".json", "_analysis.json")
             if output_path == input_path:
                 output_path += "_analysis.json"
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(final_output, f, indent=2, ensure_ascii=False)
+        self._save_analysis(video_id, final_output, output_path)
+        if isinstance(result, dict):
+            self._save_comment_state(video_id, result, video_data.get('comments', []), columns)
+
+    def _save_analysis(self, video_id: str, final_output: Dict[str, Any], output_path: Optional[str]):
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(final_output, f, indent=2, ensure_ascii=False)
 
         # CRUD PUT 6. Save the _analysis result to Valkey with the key "VIDEO_ID_analysis.json"
         valkey_key = f"{video_id}_analysis.json"
@@ -310,4 +719,139 @@ class CommentAnalyzer:
             final_output, indent=2, ensure_ascii=False)
         crud.valkey_set(valkey_key, analysis_json)
 
-        print(f"Analysis saved to: {output_path}\n")
+        print(f"Analysis saved to: {output_path or valkey_key}\n")
+
+    # --- Incremental Refresh ---
+    def _save_comment_state(self, video_id: str, result: Dict[str, Any], comments: List[Dict], columns=None):
+        """Stores what a refresh needs to merge new comments: counts and the high-water mark"""
+        total = len(flatten_comments(comments))
+        counts = result.get("sentiment_counts") or {}
+        bot_percentage = (result.get("engagement_metrics") or {}).get("bot_activity_percentage") or 0
+        state = {
+            "high_water_mark": max(columns.timestamps) if columns is not None and len(columns) else 0,
+            "comments_analyzed": total,
+            "counts": {k: int(counts.get(k) or 0) for k in ("positive", "negative", "neutral")},
+            "sentiment_method": self._sentiment_method(result),
+            "bot_comments": round(bot_percentage * total / 100),
+            "updated_at": datetime.now().isoformat()
+        }
+        # CRUD PUT 8. Save the incremental state to Valkey with the key "VIDEO_ID_comment_state.json"
+        crud.valkey_set(f"{video_id}_comment_state.json", state)
+
+    def _sentiment_method(self, result: Dict[str, Any]) -> str:
+        """Which classifier produced an analysis' sentiment counts"""
+        if (result.get("coverage") or {}).get("mode") == "map_reduce":
+            return "map_reduce"
+        if "sentiment_coverage" in result:
+            return "classifier"
+        return "rules"
+
+    def _map_counts(self, comments: List[Dict], context: str, budget: Optional[TokenBudget] = None) -> tuple:
+        """Map-step sentiment and bot counts (no reduce call); rule-based for chunks Gemini can't do"""
+        sampler = CommentSampler()
+        lines = [sampler.render_comment(c) for c in comments]
+        context = fit_text(context, MAP_CONTEXT_TOKENS)
+        chunk_limit = min(MAP_CHUNK_TOKENS, PER_CALL_PROMPT_LIMITS["comment_analysis"]) - (
+            MAP_PROMPT_OVERHEAD_TOKENS + estimate_tokens(context))
+
+        totals = Counter(positive=0, negative=0, neutral=0)
+        bots = 0
+        for i, (start, end) in enumerate(self._chunk_lines(lines, chunk_limit)):
+            size = end - start
+            result = None
+            try:
+                if budget is not None:
+                    budget.require("comment_analysis")
+                result = self._analyze_chunk(i, lines[start:end], context, budget)
+            except TokenBudgetExceeded as e:
+                print(f"[!] {e}. Using rule-based counts.")
+            if result is None:
+                rb = self._rule_based_counts([c['text'] for c in comments[start:end]])
+                totals.update({k: rb[k] for k in ("positive", "negative", "neutral")})
+                bots += rb['bot']
+                continue
+            totals.update(self._normalize_counts(result["sentiment_counts"], size))
+            bots += min(size, max(0, result["bot_count"]))
+        return {k: totals[k] for k in ("positive", "negative", "neutral")}, bots
+
+    def _classify_delta(self, video_id: str, method: str, comments: List[Dict]) -> tuple:
+        """
+        (sentiment counts, bot count) for new comments, from the same classifier that
+        produced the stored counts, so the two can be added up.
+        """
+        texts = [c['text'] for c in comments]
+        rb = self._rule_based_counts(texts)
+        counts, bots = {k: rb[k] for k in ("positive", "negative", "neutral")}, rb['bot']
+        if method == "rules" or not self.use_ai:
+            return counts, bots
+
+        metadata = valkey_get(f"{video_id}_summary.json")
+        title = metadata.get('title', '') if isinstance(metadata, dict) else ''
+        context = self._format_transcript_context(valkey_get(f"{video_id}_segmented_summary.json") or {})
+        budget = TokenBudget.for_video(video_id)
+        if method == "map_reduce":
+            counts, bots = self._map_counts(comments, context, budget)
+        else:
+            counts, _ = self.classify_sentiment(comments, title, context, budget)
+        budget.save()
+        return counts, bots
+
+    def refresh(self, video_id: str, output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Incremental re-analysis: fetches only comments newer than the last run,
+        classifies that delta with the classifier of the stored counts (local lexicon
+        classifier, Gemini escalation or map-step chunks) and merges it into the
+        stored analysis. Falls back to a full run when there is no previous state.
+        """
+        # CRUD GET 8. Fetch the incremental state from Valkey with the key "VIDEO_ID_comment_state.json"
+        state = valkey_get(f"{video_id}_comment_state.json")
+        previous = valkey_get(f"{video_id}_analysis.json")
+        columns = load_comments(video_id)
+
+        if not isinstance(state, dict) or not isinstance(previous, dict) or columns is None:
+            print(f"[!] No incremental state for {video_id}. Running a full analysis.")
+            self.run(video_id, output_path=output_path)
+            return valkey_get(f"{video_id}_analysis.json")
+
+        print(f"Refreshing analysis for {video_id} (high-water mark {state.get('high_water_mark', 0)})")
+        new_rows = columns.extend_raw(fetch_new_comments(video_id, state.get("high_water_mark", 0), columns.ids))
+        analysis = previous.setdefault("analysis", {})
+
+        if new_rows:
+            # Only the delta is classified; stored counts are kept as they are
+            delta_comments = [{"text": columns.text(i), "author": columns.author(i),
+                               "author_id": columns.channel(i), "likes": columns.likes[i]} for i in new_rows]
+            delta, delta_bots = self._classify_delta(video_id, state.get("sentiment_method", "rules"), delta_comments)
+            counts = state.setdefault("counts", {})
+            for k in ("positive", "negative", "neutral"):
+                counts[k] = counts.get(k, 0) + delta[k]
+            state["bot_comments"] = state.get("bot_comments", 0) + delta_bots
+            state["comments_analyzed"] = state.get("comments_analyzed", 0) + len(new_rows)
+            state["high_water_mark"] = max([state.get("high_water_mark", 0)] + [columns.timestamps[i] for i in new_rows])
+            state["updated_at"] = datetime.now().isoformat()
+
+            # CRUD PUT 7. Save the full comment table to Valkey with the key "VIDEO_ID_comments.col"
+            store_comments(video_id, columns)
+
+            analysis["sentiment_counts"] = dict(counts)
+            engagement = analysis.setdefault("engagement_metrics", {})
+            engagement["bot_activity_percentage"] = round(state["bot_comments"] / max(1, state["comments_analyzed"]) * 100)
+            # Duplicate clusters are recomputed locally over the updated comment table
+            tree = columns.to_tree()
+            engagement.update(self._duplicate_metrics(tree))
+            try:
+                author_index.index_comments(video_id, [columns.author_key(i) for i in new_rows],
+                                            [columns.text(i) for i in new_rows])
+            except Exception as e:
+                print(f"[!] Author indexing failed for {video_id}: {e}")
+            engagement["author_activity"] = self._author_activity(video_id, tree)
+            crud.valkey_set(f"{video_id}_comment_state.json", state)
+
+        previous["refreshed_at"] = datetime.now().isoformat()
+        previous["incremental"] = {
+            "new_comments": len(new_rows),
+            "comments_analyzed": state.get("comments_analyzed", 0),
+            "high_water_mark": state.get("high_water_mark", 0)
+        }
+        self._save_analysis(video_id, previous, output_path)
+        return previous
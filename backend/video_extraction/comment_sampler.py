@@ -0,0 +1,236 @@
+"""
+Representative Comment Sampler
+Picks the comments that go into the Gemini prompt so the model sees the whole
+spread of opinions instead of just the top-liked threads.
+
+Method:
+- Every comment and reply becomes a hashed TF-IDF vector (HASH_DIM buckets).
+- Spherical k-means (k-means++ init, NumPy) groups them into topic/opinion clusters;
+  comments without any words (emoji, "first") form their own cluster.
+- Representatives are ranked inside each cluster by closeness to the centroid and
+  likes, and slots are handed out in proportion to cluster size until the token
+  allowance is used up.
+- The prompt shows each cluster's size, share and top terms, so counts can be
+  estimated for the full comment set.
+"""
+
+import os
+import zlib
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from video_extraction.near_duplicates import normalize
+from video_extraction.token_budget import estimate_tokens
+from video_extraction.utils.text import tokenize
+
+# --- Configuration ---
+HASH_DIM = 512
+NUM_CLUSTERS = int(os.environ.get("COMMENT_SAMPLE_CLUSTERS", 12))
+KMEANS_ITERATIONS = 10
+MAX_COMMENT_CHARS = 300     # long comments are trimmed in the prompt
+TOP_TERMS = 4
+NO_TEXT_CLUSTER = -1
+
+
+def author_key(comment: Dict[str, Any]) -> Optional[str]:
+    """yt-dlp's author_id (channel id), or the display name for comments stored without one"""
+    return comment.get('author_id') or comment.get('author')
+
+
+def flatten_comments(comments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Top-level comments and their replies as one flat list (replies are marked)"""
+    flat = []
+    for c in comments:
+        flat.append({"text": c.get('text') or '', "author": c.get('author'), "author_id": c.get('author_id'),
+                     "likes": c.get('likes') or 0, "is_reply": False})
+        for r in c.get('replies') or []:
+            flat.append({"text": r.get('text') or '', "author": r.get('author'), "author_id": r.get('author_id'),
+                         "likes": r.get('likes') or 0, "is_reply": True})
+    return flat
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) % HASH_DIM
+
+
+def vectorize(texts: List[str]):
+    """
+    L2-normalized hashed TF-IDF matrix (len(texts), HASH_DIM) plus a readable
+    label (the most frequent term) for each hash bucket.
+    """
+    rows, cols = [], []
+    term_freq = Counter()
+    for i, text in enumerate(texts):
+        terms = set(tokenize(text))
+        term_freq.update(terms)
+        for term in terms:
+            rows.append(i)
+            cols.append(_bucket(term))
+
+    matrix = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), 1.0)
+        matrix = np.minimum(matrix, 1.0)
+        df = (matrix > 0).sum(axis=0)
+        matrix *= (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+
+    labels: Dict[int, str] = {}
+    for term, _ in term_freq.most_common():
+        labels.setdefault(_bucket(term), term)
+    return matrix, labels
+
+
+def spherical_kmeans(matrix: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    """Cosine k-means on unit rows. Returns (labels, similarity to own centroid, centroids)"""
+    rng = np.random.default_rng(seed)
+    n = len(matrix)
+
+    # k-means++ seeding on cosine distance
+    centers = [matrix[rng.integers(n)]]
+    distance = 1.0 - matrix @ centers[0]
+    for _ in range(1, k):
+        weights = np.clip(distance, 0, None)
+        total = weights.sum()
+        idx = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centers.append(matrix[idx])
+        distance = np.minimum(distance, 1.0 - matrix @ matrix[idx])
+    centroids = np.array(centers)
+
+    for _ in range(iterations):
+        similarity = matrix @ centroids.T
+        labels = similarity.argmax(axis=1)
+
+        updated = np.zeros_like(centroids)
+        np.add.at(updated, labels, matrix)
+        norms = np.linalg.norm(updated, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        updated[~empty] /= norms[~empty]
+        updated[empty] = centroids[empty]   # keep empty clusters where they were
+
+        if np.allclose(updated, centroids, atol=1e-4):
+            break
+        centroids = updated
+
+    similarity = matrix @ centroids.T
+    labels = similarity.argmax(axis=1)
+    return labels, similarity[np.arange(n), labels], centroids
+
+
+class CommentSampler:
+    """Cluster-aware, token-bounded comment sample for prompts"""
+
+    def __init__(self, num_clusters: int = NUM_CLUSTERS, seed: int = 0):
+        self.num_clusters = num_clusters
+        self.seed = seed
+
+    def render_comment(self, c: Dict[str, Any]) -> str:
+        text = " ".join((c.get('text') or '').split())
+        if len(text) > MAX_COMMENT_CHARS:
+            text = text[:MAX_COMMENT_CHARS] + "..."
+        reply = "(reply) " if c.get('is_reply') else ""
+        return f"[{c.get('likes', 0)} likes] {reply}{c.get('author')}: {text}"
+
+    def _render_header(self, cluster: Dict[str, Any], total: int) -> str:
+        terms = ", ".join(cluster["terms"]) or "no words (emoji / very short)"
+        share = round(100 * cluster["size"] / total) if total else 0
+        return f"[Cluster {cluster['rank']}] ~{cluster['size']:,} comments ({share}%) | terms: {terms}"
+
+    def cluster(self, flat: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Clusters flat comments; each cluster lists its members best-representative first"""
+        texts = [c["text"] for c in flat]
+        matrix, bucket_labels = vectorize(texts)
+        has_text = np.linalg.norm(matrix, axis=1) > 0
+
+        labels = np.full(len(flat), NO_TEXT_CLUSTER, dtype=np.int64)
+        closeness = np.zeros(len(flat), dtype=np.float32)
+        centroids = np.zeros((0, HASH_DIM), dtype=np.float32)
+
+        text_idx = np.flatnonzero(has_text)
+        if len(text_idx):
+            k = max(1, min(self.num_clusters, len(text_idx)))
+            sub_labels, sub_closeness, centroids = spherical_kmeans(matrix[text_idx], k, seed=self.seed)
+            labels[text_idx] = sub_labels
+            closeness[text_idx] = sub_closeness
+
+        likes = np.array([c["likes"] for c in flat], dtype=np.float64)
+        score = (closeness + 0.1) * (1.0 + np.log1p(np.maximum(likes, 0)))
+
+        clusters = []
+        for label in np.unique(labels):
+            members = np.flatnonzero(labels == label)
+            members = members[np.argsort(-score[members], kind="stable")]
+            terms = []
+            if label != NO_TEXT_CLUSTER:
+                top_dims = np.argsort(-centroids[label])[:TOP_TERMS]
+                terms = [bucket_labels[d] for d in top_dims if centroids[label][d] > 0 and d in bucket_labels]
+            clusters.append({"size": len(members), "terms": terms, "members": members.tolist()})
+
+        clusters.sort(key=lambda c: c["size"], reverse=True)
+        for rank, c in enumerate(clusters, start=1):
+            c["rank"] = rank
+        return clusters
+
+    def sample(self, comments: List[Dict[str, Any]], max_tokens: int) -> Dict[str, Any]:
+        """
+        Representative comments within max_tokens.
+        Returns {"total": int, "clusters": [{"rank", "size", "terms", "comments": [...]}]}
+        """
+        flat = flatten_comments(comments)
+        if not flat:
+            return {"total": 0, "clusters": []}
+        clusters = self.cluster(flat)
+        total = len(flat)
+
+        picked: Dict[int, List[Dict[str, Any]]] = {c["rank"]: [] for c in clusters}
+        seen_texts: Dict[int, set] = {c["rank"]: set() for c in clusters}
+        cursor = {c["rank"]: 0 for c in clusters}
+        open_clusters = list(clusters)
+        used = 0
+
+        # Slots go to the cluster with the highest size / (picked + 1), so the
+        # sample follows the size distribution while small clusters still get a voice
+        while open_clusters and used < max_tokens:
+            cluster = max(open_clusters, key=lambda c: c["size"] / (len(picked[c["rank"]]) + 1))
+            rank = cluster["rank"]
+
+            candidate = None
+            while cursor[rank] < len(cluster["members"]):
+                c = flat[cluster["members"][cursor[rank]]]
+                cursor[rank] += 1
+                key = normalize(c["text"])
+                if key not in seen_texts[rank]:
+                    seen_texts[rank].add(key)
+                    candidate = c
+                    break
+            if candidate is None:
+                open_clusters.remove(cluster)
+                continue
+
+            cost = estimate_tokens(self.render_comment(candidate)) + 2   # list number + newline
+            if not picked[rank]:
+                cost += estimate_tokens(self._render_header(cluster, total)) + 1
+            if used + cost > max_tokens:
+                open_clusters.remove(cluster)
+                continue
+            picked[rank].append(candidate)
+            used += cost
+
+        return {
+            "total": total,
+            "clusters": [{"rank": c["rank"], "size": c["size"], "terms": c["terms"], "comments": picked[c["rank"]]}
+                         for c in clusters if picked[c["rank"]]]
+        }
+
+    def format_for_prompt(self, sample: Dict[str, Any]) -> str:
+        """Clusters with their sizes, each followed by its representative comments"""
+        lines = []
+        for cluster in sample["clusters"]:
+            lines.append(self._render_header(cluster, sample["total"]))
+            for i, c in enumerate(cluster["comments"], start=1):
+                lines.append(f"  {i}. {self.render_comment(c)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,238 @@
+"""
+Columnar Comment Store
+Compact representation of a video's full comment section, so tens of thousands
+of comments are cheap to store, load and scan.
+
+Layout (parallel arrays, one entry per comment):
+- ids           comment ids
+- parents       index of the parent comment, -1 for top-level comments
+- likes         like counts
+- timestamps    unix timestamps (0 if unknown)
+- author_ids    index into the `authors` / `channels` tables (one row per channel id,
+                falling back to the display name when yt-dlp gives no author_id)
+- text_offsets  n + 1 byte offsets into one UTF-8 text buffer
+
+Serialized as a zlib-compressed binary blob: "VIDEO_ID_comments.bin" on disk and
+base64 in Valkey under "VIDEO_ID_comments.col".
+"""
+
+import sys
+import zlib
+import struct
+import base64
+from array import array
+from typing import Dict, List, Optional, Any, Iterator
+
+from valkey_rest import crud
+
+MAGIC = b"CCOL"
+FORMAT_VERSION = 2          # v2 added the `channels` section; v1 blobs still load
+_HEADER = struct.Struct("<4sHI")
+_SECTION = struct.Struct("<Q")
+
+
+def _pack_array(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class CommentColumns:
+    """Parallel-array comment table"""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.parents = array("i")
+        self.likes = array("q")
+        self.timestamps = array("q")
+        self.author_ids = array("i")
+        self.authors: List[str] = []
+        self.channels: List[str] = []
+        self.text_offsets = array("q", [0])
+        self.text_buffer = bytearray()
+        self._author_index: Dict[str, int] = {}
+        self._id_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # --- Building ---
+    def _author_id(self, author: Optional[str], channel_id: Optional[str] = None) -> int:
+        # Display names are not unique and can change; the channel id is stable
+        key = channel_id or author or ""
+        idx = self._author_index.get(key)
+        if idx is None:
+            idx = len(self.authors)
+            self.authors.append(author or "")
+            self.channels.append(channel_id or "")
+            self._author_index[key] = idx
+        return idx
+
+    def add(self, comment_id: str, text: Optional[str], author: Optional[str] = None,
+            likes: int = 0, parent: int = -1, timestamp: int = 0,
+            channel_id: Optional[str] = None) -> int:
+        """Appends one comment and returns its row index"""
+        row = len(self.ids)
+        self.ids.append(comment_id)
+        self._id_index[comment_id] = row
+        self.parents.append(parent)
+        self.likes.append(int(likes or 0))
+        self.timestamps.append(int(timestamp or 0))
+        self.author_ids.append(self._author_id(author, channel_id))
+        self.text_buffer += (text or "").encode("utf-8")
+        self.text_offsets.append(len(self.text_buffer))
+        return row
+
+    @classmethod
+    def from_raw(cls, raw_comments: List[Dict[str, Any]]) -> "CommentColumns":
+        """Builds the table from yt-dlp's flat comment list (parents may come after replies)"""
+        columns = cls()
+        columns.extend_raw(raw_comments)
+        return columns
+
+    def extend_raw(self, raw_comments: List[Dict[str, Any]]) -> List[int]:
+        """Appends yt-dlp comments that aren't stored yet; returns the new row indices"""
+        rows = []
+        pending_parents = []
+        for c in raw_comments:
+            if c.get('id') in self._id_index:
+                continue
+            row = self.add(c.get('id'), c.get('text'), c.get('author'),
+                           c.get('like_count') or 0, -1, c.get('timestamp') or 0, c.get('author_id'))
+            rows.append(row)
+            parent_id = c.get('parent')
+            if parent_id and parent_id != 'root':
+                pending_parents.append((row, parent_id))
+
+        for row, parent_id in pending_parents:
+            self.parents[row] = self._id_index.get(parent_id, -1)
+        return rows
+
+    # --- Access ---
+    def index_of(self, comment_id: str) -> Optional[int]:
+        return self._id_index.get(comment_id)
+
+    def text(self, i: int) -> str:
+        return self.text_buffer[self.text_offsets[i]:self.text_offsets[i + 1]].decode("utf-8")
+
+    def texts(self) -> Iterator[str]:
+        for i in range(len(self.ids)):
+            yield self.text(i)
+
+    def author(self, i: int) -> str:
+        return self.authors[self.author_ids[i]]
+
+    def channel(self, i: int) -> str:
+        """yt-dlp's author_id (channel id) of the comment, "" if unknown"""
+        return self.channels[self.author_ids[i]]
+
+    def author_key(self, i: int) -> str:
+        """Stable author identity: the channel id, or the display name without one"""
+        return self.channel(i) or self.author(i)
+
+    def roots(self) -> List[int]:
+        return [i for i, p in enumerate(self.parents) if p < 0]
+
+    def to_tree(self, limit_roots: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Nested dicts in the original summary.json format, roots sorted by likes"""
+        nodes = [{
+            "id": self.ids[i],
+            "author": self.author(i),
+            "author_id": self.channel(i),
+            "text": self.text(i),
+            "likes": self.likes[i],
+            "replies": []
+        } for i in range(len(self.ids))]
+
+        roots = []
+        for i, parent in enumerate(self.parents):
+            if parent < 0:
+                roots.append(nodes[i])
+            else:
+                nodes[parent]["replies"].append(nodes[i])
+
+        roots.sort(key=lambda x: x['likes'], reverse=True)
+        return roots[:limit_roots] if limit_roots is not None else roots
+
+    # --- Serialization ---
+    def to_bytes(self) -> bytes:
+        sections = [
+            "\n".join(self.ids).encode("utf-8"),
+            _pack_array(self.parents),
+            _pack_array(self.likes),
+            _pack_array(self.timestamps),
+            _pack_array(self.author_ids),
+            "\0".join(self.authors).encode("utf-8"),
+            _pack_array(self.text_offsets),
+            bytes(self.text_buffer),
+            "\0".join(self.channels).encode("utf-8"),
+        ]
+        body = b"".join(_SECTION.pack(len(s)) + s for s in sections)
+        return zlib.compress(_HEADER.pack(MAGIC, FORMAT_VERSION, len(self.ids)) + body, 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CommentColumns":
+        raw = zlib.decompress(blob)
+        magic, version, count = _HEADER.unpack_from(raw, 0)
+        if magic != MAGIC or version not in (1, FORMAT_VERSION):
+            raise ValueError(f"Unsupported comment store format ({magic!r}, v{version})")
+
+        sections = []
+        pos = _HEADER.size
+        while pos < len(raw):
+            (size,) = _SECTION.unpack_from(raw, pos)
+            pos += _SECTION.size
+            sections.append(raw[pos:pos + size])
+            pos += size
+
+        columns = cls()
+        columns.ids = sections[0].decode("utf-8").split("\n") if count else []
+        columns.parents = _unpack_array("i", sections[1])
+        columns.likes = _unpack_array("q", sections[2])
+        columns.timestamps = _unpack_array("q", sections[3])
+        columns.author_ids = _unpack_array("i", sections[4])
+        columns.authors = sections[5].decode("utf-8").split("\0") if count else []
+        columns.text_offsets = _unpack_array("q", sections[6])
+        columns.text_buffer = bytearray(sections[7])
+        if version >= 2:
+            columns.channels = sections[8].decode("utf-8").split("\0") if count else []
+        else:
+            columns.channels = [""] * len(columns.authors)
+        columns._author_index = {c or a: i for i, (a, c) in enumerate(zip(columns.authors, columns.channels))}
+        columns._id_index = {cid: i for i, cid in enumerate(columns.ids)}
+        return columns
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "CommentColumns":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def store_comments(video_id: str, columns: CommentColumns):
+    """Saves the comment table to Valkey under "VIDEO_ID_comments.col" """
+    crud.valkey_set(video_id + "_comments.col", base64.b64encode(columns.to_bytes()).decode("ascii"))
+
+
+def load_comments(video_id: str) -> Optional[CommentColumns]:
+    """Loads the comment table from Valkey, or None if it was never stored"""
+    encoded = crud.valkey_get(video_id + "_comments.col")
+    if not isinstance(encoded, str):
+        return None
+    try:
+        return CommentColumns.from_bytes(base64.b64decode(encoded))
+    except (ValueError, zlib.error) as e:
+        print(f"[!] Could not decode comment store for {video_id}: {e}")
+        return None
@@ -8,24 +8,42 @@ Features:
 - VTT Parsing: Extracts clean text while preserving timeline flow.
 - Smart Segmentation: Chunks transcript into 5-minute blocks.
 - AI Summarization: Uses Gemini (via google-genai SDK) to summarize segments.
-- Fallback Mode: Preserves raw text segments if AI is unavailable/fails.
+- Fallback Mode: Local extractive summaries (TextRank) if AI is unavailable/fails.
+- Preview: Extractive summaries are published first, so they can be shown while
+  the Gemini summaries are still being generated.
+- Segment Cache: Successful summaries are cached in Valkey per segment, so a
+  re-run only summarizes segments that are missing or previously failed.
+- Fused Claims (FUSED_CLAIM_EXTRACTION=1): the same call also returns the segment's
+  verifiable claims and an is_checkable flag, so FactChecker can skip its own
+  claim extraction pass.
 """
 
 import json
-import sys
 import os
 import re
 import argparse
 import math
+import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable
 
 import valkey_rest
+from video_extraction import gemini_cache, gemini_client, search_index
+from video_extraction.extractive_summarizer import ExtractiveSummarizer
+from video_extraction.token_budget import (
+    TokenBudget, TokenBudgetExceeded, PER_CALL_PROMPT_LIMITS, fit_text, estimate_tokens)
 
 # --- Configuration ---
 # Using the model specified in your reference
 DEFAULT_MODEL = "gemini-3-flash-preview" 
 
+# Bump whenever the segment prompt or schema changes, so summaries cached
+# under the old prompt are no longer reused.
+PROMPT_VERSION = "v1"
+FUSED_CLAIM_EXTRACTION = os.environ.get("FUSED_CLAIM_EXTRACTION", "0") == "1"
+SEGMENT_CACHE_PREFIX = "segment_summary"
+SEGMENT_CACHE_TTL = int(os.environ.get("SEGMENT_CACHE_TTL", 60 * 60 * 24 * 30))
+
 # Check for the new Google GenAI SDK
 try:
     from google import genai
@@ -37,15 +55,19 @@ except ImportError:
 class TranscriptSegmenter:
     """Parses VTT, segments by time, and summarizes using Gemini"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, fused_claims: Optional[bool] = None):
         self.api_key = os.environ.get('GEMINI_API_KEY')
+        self.fused_claims = FUSED_CLAIM_EXTRACTION if fused_claims is None else fused_claims
+        # Fused summaries have a different schema, so they are cached separately
+        self.prompt_version = f"{PROMPT_VERSION}+claims" if self.fused_claims else PROMPT_VERSION
         self.use_ai = False
         self.client = None
+        self.extractive = ExtractiveSummarizer()
 
         if GEMINI_AVAILABLE and self.api_key:
             try:
-                # NEW SDK Initialization based on your reference
-                self.client = genai.Client(api_key=self.api_key)
+                # Shared, process-wide client (connection reuse + global rate limits)
+                self.client = gemini_client.get_client(self.api_key)
                 self.use_ai = True
                 print(f"[OK] AI mode enabled ({DEFAULT_MODEL})")
             except Exception as e:
@@ -170,47 +192,74 @@ class TranscriptSegmenter:
                 
         return final_segments
 
-    def generate_ai_summary(self, segment_text: str, timestamp_range: str) -> Dict[str, Any]:
-        """Uses Gemini to summarize the text segment with STRICT schema validation"""
-        
-        prompt = f"""
-        Analyze the following transcript segment from a video ({timestamp_range}).
-        TRANSCRIPT TEXT: {segment_text[:15000]} 
+    def generate_ai_summary(self, segment_text: str, timestamp_range: str,
+                            budget: Optional[TokenBudget] = None, refresh: bool = False,
+                            stage: str = "segment_summary") -> Dict[str, Any]:
+        """
+        Uses Gemini to summarize the text segment with STRICT schema validation.
+        With refresh, a cached Gemini response for the same prompt is not reused.
+        The call is budgeted and recorded under `stage`.
         """
 
+        # Size the prompt against the video's remaining token budget
+        try:
+            prompt_limit = budget.require(stage) if budget else PER_CALL_PROMPT_LIMITS[stage]
+        except TokenBudgetExceeded as e:
+            print(f"[!] Skipping segment {timestamp_range}: {e}")
+            return self._create_fallback_summary()
+
+        claims_task = """
+        Also set 'is_checkable' to FALSE for gaming, music, vlogs, or pure opinion and TRUE for
+        news, politics, science, or educational content. If TRUE, list the verifiable factual
+        claims (names, events, stats) as self-contained sentences in 'claims'.""" if self.fused_claims else ""
+        header = f"""
+        Analyze the following transcript segment from a video ({timestamp_range}).{claims_task}
+        TRANSCRIPT TEXT: """
+        prompt = header + fit_text(segment_text, prompt_limit - estimate_tokens(header)) + "\n"
+
         # Define the strict schema for the output
         # This forces the model to return exactly these keys with these types.
-        summary_schema = types.Schema(
-            type=types.Type.OBJECT,
-            properties={
-                "topic": types.Schema(type=types.Type.STRING),
-                "summary": types.Schema(type=types.Type.STRING),
-                "key_points": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(type=types.Type.STRING)
-                ),
-                "sentiment": types.Schema(
-                    type=types.Type.STRING,
-                    enum=["Positive", "Neutral", "Negative", "Controversial"] # Enforce specific values
-                ),
-                "entities_mentioned": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(type=types.Type.STRING)
-                )
-            },
-            required=["topic", "summary", "key_points", "sentiment", "entities_mentioned"]
-        )
+        properties = {
+            "topic": types.Schema(type=types.Type.STRING),
+            "summary": types.Schema(type=types.Type.STRING),
+            "key_points": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING)
+            ),
+            "sentiment": types.Schema(
+                type=types.Type.STRING,
+                enum=["Positive", "Neutral", "Negative", "Controversial"] # Enforce specific values
+            ),
+            "entities_mentioned": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING)
+            )
+        }
+        required = ["topic", "summary", "key_points", "sentiment", "entities_mentioned"]
+        if self.fused_claims:
+            properties["is_checkable"] = types.Schema(type=types.Type.BOOLEAN)
+            properties["claims"] = types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING)
+            )
+            required += ["is_checkable", "claims"]
+        summary_schema = types.Schema(type=types.Type.OBJECT, properties=properties, required=required)
 
         try:
-            response = self.client.models.generate_content(
+            response_text = gemini_cache.generate_content(
+                self.client,
                 model=DEFAULT_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
                     response_schema=summary_schema  # <--- THIS ENFORCES THE STRUCTURE
-                )
+                ),
+                call_site=stage,
+                budget=budget,
+                validate=gemini_cache.json_validator(*required),
+                refresh=refresh
             )
-            return json.loads(response.text)
+            return json.loads(response_text)
         except Exception as e:
             print(f"[!] AI Generation failed for segment {timestamp_range}: {e}")
             return self._create_fallback_summary()
@@ -225,80 +274,234 @@ class TranscriptSegmenter:
             "entities_mentioned": []
         }
 
-    def process_file(self, input_path: str, output_path: Optional[str] = None, video_id: Optional[str] = None):
-        """Main processing pipeline"""
-        print(f"Processing: {input_path}")
-        
-        # 1. Read File
+    def _extractive_summary(self, segment_text: str) -> Dict[str, Any]:
+        """Local CPU-only summary used when no Gemini summary is available"""
+        try:
+            return self.extractive.summarize(segment_text)
+        except Exception as e:
+            print(f"[!] Extractive summary failed: {e}")
+            return self._create_fallback_summary()
+
+    def _segment_cache_key(self, segment_text: str) -> str:
+        """Valkey key for a segment summary: hash of prompt version, model and text"""
+        digest = hashlib.sha256(
+            f"{self.prompt_version}\n{DEFAULT_MODEL}\n{segment_text}".encode("utf-8")).hexdigest()
+        return f"{SEGMENT_CACHE_PREFIX}:{digest}"
+
+    def summarize_segment(self, seg: Dict[str, Any], budget: Optional[TokenBudget] = None,
+                          refresh: bool = False, stage: str = "segment_summary") -> Dict[str, Any]:
+        """
+        Builds the output entry for one segment.
+        Reuses a cached summary when available, otherwise calls Gemini and caches the
+        result. With refresh, neither the summary nor the Gemini response cache is used. Failed segments are never cached, so they are
+        retried on the next run.
+        """
+        cache_key = self._segment_cache_key(seg['text'])
+        ai_data = None if refresh else valkey_rest.crud.valkey_get(cache_key)
+        status = "ok"
+        source = "gemini"
+
+        if isinstance(ai_data, dict):
+            print(f"    Segment {seg['segment_id']} ({seg['timestamp_range']}) loaded from cache.")
+        elif self.use_ai:
+            print(f"    Analyzing Segment {seg['segment_id']} ({seg['timestamp_range']})...")
+            ai_data = self.generate_ai_summary(seg['text'], seg['timestamp_range'], budget=budget,
+                                               refresh=refresh, stage=stage)
+
+            # Check if the AI returned our fallback error message
+            if ai_data.get("topic") == "Analysis Unavailable":
+                status = "failed"
+            else:
+                valkey_rest.crud.valkey_set(cache_key, ai_data, expire=SEGMENT_CACHE_TTL)
+        else:
+            status = "failed"
+
+        # No Gemini summary: use the local extractive one instead of the raw text
+        if status == "failed":
+            ai_data = self._extractive_summary(seg['text'])
+            source = "extractive"
+
+        # Combine structural data with AI analysis
+        segment_result = {
+            "segment_id": seg['segment_id'],
+            "timestamps": {
+                "start_sec": seg['start_time_seconds'],
+                "end_sec": seg['end_time_seconds'],
+                "display": seg['timestamp_range']
+            },
+            "status": status,
+            "source": source,
+            "analysis": ai_data
+        }
+
+        return segment_result
+
+    def _build_output(self, input_path: str, processed_data: List[Dict[str, Any]],
+                      summary_status: str) -> Dict[str, Any]:
+        return {
+            "source_file": os.path.basename(input_path),
+            "processed_at": datetime.now().isoformat(),
+            "summary_status": summary_status,
+            "total_segments": len(processed_data),
+            "failed_segments": [s['segment_id'] for s in processed_data if s['status'] == "failed"],
+            "segments": processed_data
+        }
+
+    def _load_segments(self, input_path: str) -> List[Dict]:
+        """Reads, parses and segments a VTT file"""
         try:
             with open(input_path, 'r', encoding='utf-8') as f:
                 raw_lines = f.readlines()
         except FileNotFoundError:
             print(f"[!] Error: File not found: {input_path}")
-            sys.exit(1)
+            raise
 
-        # 2. Parse & Segment
         print(" -> Parsing VTT...")
         parsed_entries = self.clean_vtt_text(raw_lines)
         print(" -> Segmenting into 5-minute chunks...")
         segments = self.create_segments(parsed_entries, interval_minutes=5)
         print(f" -> Created {len(segments)} segments.")
+        return segments
 
-        # 3. Analyze each segment
-        processed_data = []
-        
-        for seg in segments:
-            print(f"    Analyzing Segment {seg['segment_id']} ({seg['timestamp_range']})...")
-            
-            ai_data = {}
-            include_raw_text = False # Default to False (don't show raw text if AI works)
+    def publish_preview(self, input_path: str, video_id: str, segments: Optional[List[Dict]] = None):
+        """
+        Publishes extractive summaries for every segment to Valkey right away
+        (summary_status "preview"). process_file() later overwrites them.
+        """
+        if segments is None:
+            segments = self._load_segments(input_path)
 
-            if self.use_ai:
-                ai_data = self.generate_ai_summary(seg['text'], seg['timestamp_range'])
-                
-                # Check if the AI returned our fallback error message
-                if ai_data.get("topic") == "Analysis Unavailable":
-                    include_raw_text = True
-            else:
-                # AI is disabled, so we must include raw text
-                ai_data = self._create_fallback_summary()
-                include_raw_text = True
-            
-            # Combine structural data with AI analysis
-            segment_result = {
+        preview_data = []
+        for seg in segments:
+            preview_data.append({
                 "segment_id": seg['segment_id'],
                 "timestamps": {
                     "start_sec": seg['start_time_seconds'],
                     "end_sec": seg['end_time_seconds'],
                     "display": seg['timestamp_range']
                 },
-                "analysis": ai_data
-            }
+                "status": "pending",
+                "source": "extractive",
+                "analysis": self._extractive_summary(seg['text'])
+            })
+
+        preview = self._build_output(input_path, preview_data, "preview")
+        # Valkey only: the file on disk marks a finished summarization
+        self._save_output(preview, None, video_id)
+        print(f" -> Published extractive preview for {len(preview_data)} segments.")
+
+    def _save_output(self, final_output: Dict[str, Any], output_path: Optional[str], video_id: Optional[str]):
+        """Writes the segmented summary to disk (if a path is given) and to Valkey"""
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(final_output, f, indent=2, ensure_ascii=False)
+
+        # CRUD PUT 4. Save the segmented summary data to Valkey with the key "VIDEO_ID_segmented_summary.json"
+        valkey_rest.crud.valkey_set(video_id + "_segmented_summary.json", json.dumps(final_output, indent=2, ensure_ascii=False))
+
+    def _index_for_search(self, video_id: Optional[str], processed_data: List[Dict], segments: List[Dict]):
+        """Adds the finished segment summaries to the transcript search index"""
+        if not video_id:
+            return
+        try:
+            search_index.index_segments(
+                video_id, processed_data, {seg['segment_id']: seg['text'] for seg in segments})
+        except Exception as e:
+            print(f"[!] Search indexing failed for {video_id}: {e}")
+
+    def process_file(self, input_path: str, output_path: Optional[str] = None, video_id: Optional[str] = None,
+                     preview: bool = True, on_segment: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Main processing pipeline.
+        on_segment is called with each segment result as soon as it is summarized
+        (e.g. FactCheckStream.add_segment), before the whole video is done.
+        """
+        print(f"Processing: {input_path}")
+        
+        # 1. Read File, 2. Parse & Segment
+        segments = self._load_segments(input_path)
 
-            # Only add the massive raw text block if AI failed or is off
-            if include_raw_text:
-                segment_result["raw_transcript"] = seg['text']
+        # Extractive first pass, so there is something to show immediately
+        if preview and self.use_ai:
+            self.publish_preview(input_path, video_id, segments)
 
+        # 3. Analyze each segment (cached segments are skipped)
+        budget = TokenBudget.for_video(video_id)
+        processed_data = []
+        for seg in segments:
+            segment_result = self.summarize_segment(seg, budget)
             processed_data.append(segment_result)
+            if on_segment is not None:
+                try:
+                    on_segment(segment_result)
+                except Exception as e:
+                    print(f"[!] Segment callback failed for segment {seg['segment_id']}: {e}")
+        budget.save()
 
         # 4. Final Output Construction
-        final_output = {
-            "source_file": os.path.basename(input_path),
-            "processed_at": datetime.now().isoformat(),
-            "total_segments": len(processed_data),
-            "segments": processed_data
-        }
+        final_output = self._build_output(input_path, processed_data, "complete")
+        failed = final_output["failed_segments"]
+        if failed:
+            print(f" -> {len(failed)} segment(s) fell back to extractive summaries: {failed}. "
+                  f"Retry with retry_failed_segments().")
 
         # 5. Save
         if not output_path:
             output_path = input_path.replace(".vtt", "_segmented_summary.json")
             if output_path == input_path: # safety if extension didn't match
                 output_path += ".json"
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(final_output, f, indent=2, ensure_ascii=False)
-            
-        # CRUD PUT 4. Save the segmented summary data to Valkey with the key "VIDEO_ID_segmented_summary.json"
-        valkey_rest.crud.valkey_set(video_id + "_segmented_summary.json", json.dumps(final_output, indent=2, ensure_ascii=False))
 
-        print(f"\n[Success] JSON saved to: {output_path}")
\ No newline at end of file
+        self._save_output(final_output, output_path, video_id)
+        self._index_for_search(video_id, processed_data, segments)
+
+        print(f"\n[Success] JSON saved to: {output_path}")
+
+    def retry_failed_segments(self, video_id: str, segment_ids: Optional[List[int]] = None,
+                              output_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Re-summarizes individual segments of an already processed video.
+        By default only the segments marked as failed are retried; pass segment_ids
+        to force specific ones. The VTT is re-read from Valkey, so the video does not
+        have to be downloaded or processed again.
+        """
+        summary_key = video_id + "_segmented_summary.json"
+        # CRUD GET 4. Fetch the segmented summary data From Valkey with the key "VIDEO_ID_segmented_summary.json"
+        existing = valkey_rest.crud.valkey_get(summary_key)
+        # CRUD GET 2. Fetch the VTT data from Valkey with the key "VIDEO_ID.en.vtt"
+        vtt_content = valkey_rest.crud.valkey_get(video_id + ".en.vtt")
+
+        if not isinstance(existing, dict) or not isinstance(vtt_content, str):
+            print(f"[!] Cannot retry segments for {video_id}: summary or VTT missing in Valkey.")
+            return {}
+
+        # Explicitly listed segments are re-summarized even if their summary is cached
+        refresh = segment_ids is not None
+        if segment_ids is None:
+            segment_ids = existing.get("failed_segments") or [
+                s.get("segment_id") for s in existing.get("segments", [])
+                if s.get("status") == "failed" or "raw_transcript" in s]
+        elif not isinstance(segment_ids, list) or not all(
+                isinstance(s, int) and not isinstance(s, bool) for s in segment_ids):
+            raise ValueError("segment_ids must be a list of integers")
+        targets = set(segment_ids)
+        if not targets:
+            print(f" -> No failed segments for {video_id}.")
+            return existing
+
+        segments = self.create_segments(self.clean_vtt_text(vtt_content.splitlines()), interval_minutes=5)
+        # Retries spend their own stage budget, so they still work after the first
+        # pass used up segment_summary, and are still capped (and reported)
+        budget = TokenBudget.for_video(video_id)
+        refreshed = {seg['segment_id']: self.summarize_segment(seg, budget, refresh=refresh, stage="segment_retry")
+                     for seg in segments if seg['segment_id'] in targets}
+        budget.save()
+
+        processed_data = [refreshed.get(s.get("segment_id"), s) for s in existing.get("segments", [])]
+        existing["segments"] = processed_data
+        existing["failed_segments"] = [s['segment_id'] for s in processed_data if s.get('status') == "failed"]
+        existing["processed_at"] = datetime.now().isoformat()
+
+        self._save_output(existing, output_path, video_id)
+        self._index_for_search(video_id, list(refreshed.values()), segments)
+        print(f" -> Retried segments {sorted(targets)}; still failing: {existing['failed_segments']}")
+        return existing
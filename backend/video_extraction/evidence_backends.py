@@ -0,0 +1,363 @@
+"""
+Evidence Backends
+Where FactChecker looks up evidence for a claim. Every backend returns a list of
+{"title", "snippet", "source", "url"} dicts, the shape the verification prompt expects.
+
+Backends:
+- DuckDuckGoBackend: live news + web search (needs network, shared rate limit)
+- LocalCorpusBackend: BM25 over a news/reference corpus on disk (JSONL, or Parquet
+  when pyarrow is installed). The index is built once into a directory of .npy
+  arrays (CSR postings) that are memory-mapped on load, so startup is instant and
+  only the postings a query touches are paged in.
+- FallbackBackend: local corpus first, the web only for low-recall queries.
+
+EVIDENCE_BACKEND selects the default: "duckduckgo" (default), "local" or "local+web".
+"""
+
+import os
+import abc
+import json
+import time
+import threading
+import argparse
+from typing import Dict, List, Any, Iterator, Optional
+
+import numpy as np
+
+from video_extraction.utils.rate_limit import TokenBucket
+from video_extraction.utils.text import tokenize
+
+# --- Configuration ---
+EVIDENCE_BACKEND = os.environ.get("EVIDENCE_BACKEND", "duckduckgo")
+EVIDENCE_CORPUS_PATH = os.environ.get("EVIDENCE_CORPUS_PATH")
+EVIDENCE_INDEX_DIR = os.environ.get("EVIDENCE_INDEX_DIR")     # default: "<corpus>.index"
+MAX_RESULTS = 5
+
+# Politeness toward DuckDuckGo, shared by every backend instance in the process
+SEARCH_REQUESTS_PER_SECOND = float(os.environ.get("SEARCH_REQUESTS_PER_SECOND", 2))
+SEARCH_BURST = 4
+
+# A local hit must match this share of the query terms; fewer than
+# LOCAL_MIN_RESULTS such hits counts as low recall
+LOCAL_MIN_TERM_COVERAGE = float(os.environ.get("LOCAL_MIN_TERM_COVERAGE", 0.5))
+LOCAL_MIN_RESULTS = int(os.environ.get("LOCAL_MIN_RESULTS", 2))
+SNIPPET_CHARS = 500
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_search_limiter = TokenBucket(SEARCH_REQUESTS_PER_SECOND, SEARCH_BURST)
+
+# --- Imports ---
+try:
+    from duckduckgo_search import DDGS
+    DDG_AVAILABLE = True
+except ImportError:
+    DDG_AVAILABLE = False
+    print("[!] Warning: 'duckduckgo-search' library not installed. pip install duckduckgo-search")
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+class SearchFailed(Exception):
+    """
+    A search that could not run to completion (network error, no rate limit slot in
+    time). Unlike an empty result list this must not be cached; `partial` holds
+    whatever was found before the failure.
+    """
+
+    def __init__(self, message: str, partial: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.partial = partial or []
+
+
+class EvidenceBackend(abc.ABC):
+    """Looks up evidence for a claim; subclasses implement search() and raise SearchFailed on errors"""
+    name = "base"     # also namespaces the backend's entries in the claim cache
+
+    @abc.abstractmethod
+    def search(self, query: str, timeout: float) -> List[Dict[str, Any]]:
+        """Up to MAX_RESULTS {"title", "snippet", "source", "url"} dicts for the query"""
+
+
+class DuckDuckGoBackend(EvidenceBackend):
+    name = "duckduckgo"
+
+    def search(self, query: str, timeout: float) -> List[Dict[str, Any]]:
+        """Searches DuckDuckGo News and Web, giving up after `timeout` seconds"""
+        if not DDG_AVAILABLE:
+            raise SearchFailed("duckduckgo-search is not installed")
+
+        deadline = time.monotonic() + timeout
+        results = []
+        try:
+            with DDGS(timeout=max(1, int(timeout))) as ddgs:
+                # 1. Try News Search first (better for fact checking)
+                if not _search_limiter.acquire(1, timeout=max(0.0, deadline - time.monotonic())):
+                    print(f"[!] Search rate limit: no slot in time for '{query[:50]}'")
+                    raise SearchFailed("no search rate limit slot in time")
+                news_gen = ddgs.news(query, max_results=3)
+                if news_gen:
+                    for r in news_gen:
+                        results.append({
+                            "title": r.get('title'),
+                            # DDG uses 'body' for news snippets
+                            "snippet": r.get('body'),
+                            "source": r.get('source'),
+                            "url": r.get('url')
+                        })
+
+                # 2. Fallback to Web Search if news is empty or sparse (and time is left)
+                if len(results) < 2:
+                    if not _search_limiter.acquire(1, timeout=max(0.0, deadline - time.monotonic())):
+                        raise SearchFailed("no search rate limit slot in time for the web search", results)
+                    web_gen = ddgs.text(query, max_results=3)
+                    if web_gen:
+                        for r in web_gen:
+                            results.append({
+                                "title": r.get('title'),
+                                "snippet": r.get('body'),
+                                # Web search doesn't always have source name
+                                "source": r.get('href'),
+                                "url": r.get('href')
+                            })
+
+            return results[:MAX_RESULTS]  # Return top 5 combined
+        except SearchFailed:
+            raise
+        except Exception as e:
+            print(f"[!] DDG Search failed for '{query}': {e}")
+            raise SearchFailed(str(e), results[:MAX_RESULTS]) from e
+
+
+def read_corpus(path: str) -> Iterator[Dict[str, Any]]:
+    """Documents of a JSONL or Parquet corpus as {"title", "text", "source", "url"}"""
+    if path.endswith(".parquet"):
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Reading a Parquet corpus needs pyarrow. pip install pyarrow")
+        rows = (row for batch in pq.ParquetFile(path).iter_batches() for row in batch.to_pylist())
+    else:
+        def _jsonl():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        rows = _jsonl()
+
+    for row in rows:
+        yield {
+            "title": row.get("title") or "",
+            "text": row.get("text") or row.get("body") or row.get("snippet") or row.get("content") or "",
+            "source": row.get("source") or "",
+            "url": row.get("url") or ""
+        }
+
+
+def build_index(corpus_path: str, index_dir: str) -> int:
+    """
+    Tokenizes the corpus into CSR postings and saves them to index_dir:
+    vocab.json (term -> id), offsets/doc_ids/tfs.npy (postings of term t are
+    offsets[t]:offsets[t + 1]), doc_len.npy, plus docs.jsonl with line offsets
+    (docs.npy) for reading back result metadata.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    vocab: Dict[str, int] = {}
+    term_ids: List[np.ndarray] = []
+    owners: List[np.ndarray] = []
+    counts: List[np.ndarray] = []
+    doc_len: List[int] = []
+    doc_offsets: List[int] = []
+
+    with open(os.path.join(index_dir, "docs.jsonl"), 'wb') as docs_file:
+        for doc_id, doc in enumerate(read_corpus(corpus_path)):
+            tokens = tokenize(f"{doc['title']} {doc['text']}")
+            ids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in tokens), dtype=np.int64, count=len(tokens))
+            unique, tf = np.unique(ids, return_counts=True)
+            term_ids.append(unique)
+            owners.append(np.full(len(unique), doc_id, dtype=np.int32))
+            counts.append(tf.astype(np.uint16))
+            doc_len.append(len(tokens))
+
+            doc_offsets.append(docs_file.tell())
+            docs_file.write(json.dumps({
+                "title": doc["title"],
+                "snippet": doc["text"][:SNIPPET_CHARS],
+                "source": doc["source"],
+                "url": doc["url"]
+            }, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    terms = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int64)
+    order = np.argsort(terms, kind="stable")
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(terms, minlength=len(vocab)), out=offsets[1:])
+
+    np.save(os.path.join(index_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(index_dir, "doc_ids.npy"),
+            np.concatenate(owners)[order] if owners else np.zeros(0, dtype=np.int32))
+    np.save(os.path.join(index_dir, "tfs.npy"),
+            np.concatenate(counts)[order] if counts else np.zeros(0, dtype=np.uint16))
+    np.save(os.path.join(index_dir, "doc_len.npy"), np.asarray(doc_len, dtype=np.float32))
+    np.save(os.path.join(index_dir, "docs.npy"), np.asarray(doc_offsets, dtype=np.int64))
+    with open(os.path.join(index_dir, "vocab.json"), 'w', encoding='utf-8') as f:
+        json.dump(vocab, f, ensure_ascii=False)
+
+    # Written last: an index without a manifest is incomplete and gets rebuilt
+    stat = os.stat(corpus_path)
+    with open(os.path.join(index_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump({"corpus": os.path.abspath(corpus_path), "size": stat.st_size,
+                   "mtime": stat.st_mtime, "documents": len(doc_len)}, f)
+    return len(doc_len)
+
+
+class LocalCorpusBackend(EvidenceBackend):
+    """BM25 over a memory-mapped index of a local corpus"""
+    name = "local"
+
+    def __init__(self, corpus_path: str, index_dir: Optional[str] = None):
+        self.corpus_path = corpus_path
+        self.index_dir = index_dir or f"{corpus_path}.index"
+        if not self._index_is_current():
+            print(f" -> Building evidence index for {corpus_path}...")
+            started = time.monotonic()
+            count = build_index(corpus_path, self.index_dir)
+            print(f"    Indexed {count} documents in {time.monotonic() - started:.1f}s")
+
+        def _load(name):
+            return np.load(os.path.join(self.index_dir, name), mmap_mode="r")
+
+        with open(os.path.join(self.index_dir, "vocab.json"), 'r', encoding='utf-8') as f:
+            self.vocab: Dict[str, int] = json.load(f)
+        self.offsets = _load("offsets.npy")
+        self.doc_ids = _load("doc_ids.npy")
+        self.tfs = _load("tfs.npy")
+        self.doc_len = np.asarray(_load("doc_len.npy"))
+        self.doc_offsets = _load("docs.npy")
+        self.doc_count = len(self.doc_len)
+        self.avg_len = float(self.doc_len.mean()) if self.doc_count else 0.0
+        self._docs_lock = threading.Lock()
+        self._docs_file = open(os.path.join(self.index_dir, "docs.jsonl"), 'rb')
+
+    def _index_is_current(self) -> bool:
+        try:
+            with open(os.path.join(self.index_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            stat = os.stat(self.corpus_path)
+        except (OSError, ValueError):
+            return False
+        return manifest.get("size") == stat.st_size and manifest.get("mtime") == stat.st_mtime
+
+    def _read_doc(self, doc_id: int) -> Dict[str, Any]:
+        with self._docs_lock:
+            self._docs_file.seek(int(self.doc_offsets[doc_id]))
+            return json.loads(self._docs_file.readline())
+
+    def search(self, query: str, timeout: float = 0.0, limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+        """Top BM25 documents that match at least LOCAL_MIN_TERM_COVERAGE of the query terms"""
+        term_ids = [self.vocab[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocab]
+        query_terms = len(set(tokenize(query)))
+        if not term_ids or not self.doc_count:
+            return []
+
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        matched = np.zeros(self.doc_count, dtype=np.int16)
+        for term_id in term_ids:
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            docs = np.asarray(self.doc_ids[start:end])
+            tf = np.asarray(self.tfs[start:end], dtype=np.float32)
+            idf = np.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[docs] / self.avg_len)
+            # Postings hold each doc once per term, so fancy-index += is safe
+            scores[docs] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            matched[docs] += 1
+
+        candidates = np.flatnonzero(matched >= max(1, np.ceil(LOCAL_MIN_TERM_COVERAGE * query_terms)))
+        if not len(candidates):
+            return []
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:limit]]
+        return [self._read_doc(int(doc_id)) for doc_id in top]
+
+
+class FallbackBackend(EvidenceBackend):
+    """Serves from `primary` and asks `fallback` only when the primary has too few results"""
+
+    def __init__(self, primary: EvidenceBackend, fallback: EvidenceBackend, min_results: int = LOCAL_MIN_RESULTS):
+        self.primary = primary
+        self.fallback = fallback
+        self.min_results = min_results
+        self.name = f"{primary.name}+{fallback.name}"
+        self.stats = {"primary": 0, "fallback": 0}
+
+    def search(self, query: str, timeout: float) -> List[Dict[str, Any]]:
+        started = time.monotonic()
+        results = self.primary.search(query, timeout)
+        if len(results) >= self.min_results:
+            self.stats["primary"] += 1
+            return results[:MAX_RESULTS]
+
+        self.stats["fallback"] += 1
+        remaining = max(0.0, timeout - (time.monotonic() - started))
+        seen = {r.get("url") for r in results}
+        try:
+            found = self.fallback.search(query, remaining)
+        except SearchFailed as e:
+            extra = [r for r in e.partial if r.get("url") not in seen]
+            raise SearchFailed(str(e), (results + extra)[:MAX_RESULTS]) from e
+        extra = [r for r in found if r.get("url") not in seen]
+        return (results + extra)[:MAX_RESULTS]
+
+
+def create_backend(name: str = EVIDENCE_BACKEND, corpus_path: Optional[str] = EVIDENCE_CORPUS_PATH,
+                   index_dir: Optional[str] = EVIDENCE_INDEX_DIR) -> EvidenceBackend:
+    """Backend by name; falls back to DuckDuckGo when the local corpus is unusable"""
+    if name in ("local", "local+web"):
+        if not corpus_path or not os.path.exists(corpus_path):
+            print(f"[!] Evidence corpus not found ({corpus_path}); using DuckDuckGo instead.")
+            return DuckDuckGoBackend()
+        try:
+            local = LocalCorpusBackend(corpus_path, index_dir)
+        except Exception as e:
+            print(f"[!] Loading evidence corpus failed: {e}; using DuckDuckGo instead.")
+            return DuckDuckGoBackend()
+        return local if name == "local" else FallbackBackend(local, DuckDuckGoBackend())
+    if name != "duckduckgo":
+        print(f"[!] Unknown evidence backend '{name}'; using DuckDuckGo.")
+    return DuckDuckGoBackend()
+
+
+# Process-wide backend, built on first use (so the local index is loaded once)
+_default_backend: Optional[EvidenceBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_default_backend() -> EvidenceBackend:
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = create_backend()
+        return _default_backend
+
+
+def set_default_backend(backend: Optional[EvidenceBackend]):
+    global _default_backend
+    with _default_lock:
+        _default_backend = backend
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the local evidence index")
+    parser.add_argument("corpus", help="JSONL or Parquet corpus")
+    parser.add_argument("--index-dir", help="Index directory (default: <corpus>.index)")
+    parser.add_argument("--query", help="Search the index instead of only building it")
+    args = parser.parse_args()
+
+    backend = LocalCorpusBackend(args.corpus, args.index_dir)
+    print(f"[OK] {backend.doc_count} documents, {len(backend.vocab)} terms")
+    if args.query:
+        started = time.perf_counter()
+        hits = backend.search(args.query)
+        print(f"    {len(hits)} results in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for hit in hits:
+            print(f"    - {hit['title']} ({hit['url']})")
@@ -0,0 +1,115 @@
+"""
+Evidence Passage Ranker (CPU only)
+Shrinks the verification prompt: instead of every search result as raw JSON, each
+claim gets only the evidence passages that bear on it, within a token budget.
+
+Method:
+- Each search result is split into passages (its title, then snippet sentences).
+- Score = BM25 of the passage against the claim (the claim's passages are the collection)
+  + NUMBER_WEIGHT per number shared with the claim ("9.1%", "5 million")
+  + ENTITY_WEIGHT per named entity shared with the claim.
+- The best passages are kept until EVIDENCE_TOKENS_PER_CLAIM and serialized as
+  compact "- passage (source)" lines.
+"""
+
+import os
+import json
+import math
+from collections import Counter
+from typing import Dict, List, Any, Set, Tuple
+
+from video_extraction.claim_cache import normalize_claim
+from video_extraction.extractive_summarizer import ENTITY_PATTERN
+from video_extraction.media_bias import hostname
+from video_extraction.token_budget import estimate_tokens, fit_text
+from video_extraction.utils.text import tokenize, split_sentences, STOPWORDS
+
+# --- Configuration ---
+EVIDENCE_TOKENS_PER_CLAIM = int(os.environ.get("EVIDENCE_TOKENS_PER_CLAIM", 250))
+NUMBER_WEIGHT = 2.0
+ENTITY_WEIGHT = 1.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+NO_EVIDENCE = "- (no relevant evidence found)"
+
+
+def _numbers(text: str) -> Set[str]:
+    return {t for t in normalize_claim(text).split() if t[0].isdigit()}
+
+
+def _entities(text: str) -> Set[str]:
+    return {e.lower() for e in ENTITY_PATTERN.findall(text or "") if e.lower() not in STOPWORDS}
+
+
+def _source_label(result: Dict[str, Any]) -> str:
+    return hostname(result.get("url") or "") or (result.get("source") or "").strip() or "unknown"
+
+
+def split_passages(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Title and snippet sentences of every result as {"text", "source"}"""
+    passages = []
+    seen = set()
+    for result in results:
+        source = _source_label(result)
+        for text in [result.get("title") or ""] + split_sentences(result.get("snippet") or ""):
+            text = " ".join(text.split())
+            if len(text) < 12 or text.lower() in seen:
+                continue
+            seen.add(text.lower())
+            passages.append({"text": text, "source": source})
+    return passages
+
+
+def rank_passages(claim: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Passages of the results that share terms, numbers or entities with the claim, best first"""
+    passages = split_passages(results)
+    if not passages:
+        return []
+
+    claim_terms = set(tokenize(claim))
+    claim_numbers = _numbers(claim)
+    claim_entities = _entities(claim)
+
+    passage_tokens = [tokenize(p["text"]) for p in passages]
+    avg_len = sum(len(t) for t in passage_tokens) / len(passages) or 1.0
+    doc_freq = Counter(term for tokens in passage_tokens for term in set(tokens) & claim_terms)
+
+    ranked = []
+    for passage, tokens in zip(passages, passage_tokens):
+        counts = Counter(tokens)
+        score = 0.0
+        for term in claim_terms & counts.keys():
+            idf = math.log(1 + (len(passages) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            tf = counts[term]
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg_len))
+        score += NUMBER_WEIGHT * len(claim_numbers & _numbers(passage["text"]))
+        score += ENTITY_WEIGHT * len(claim_entities & _entities(passage["text"]))
+        if score > 0:
+            ranked.append({**passage, "score": round(score, 3)})
+
+    ranked.sort(key=lambda p: p["score"], reverse=True)
+    return ranked
+
+
+def compact_evidence(claim: str, results: List[Dict[str, Any]],
+                     max_tokens: int = EVIDENCE_TOKENS_PER_CLAIM) -> Tuple[str, Dict[str, int]]:
+    """
+    The claim's evidence as compact prompt lines within max_tokens, plus
+    {"raw_tokens", "prompt_tokens"} (raw = the results as compact JSON).
+    """
+    raw_tokens = estimate_tokens(json.dumps(results or [], separators=(',', ':'), ensure_ascii=False))
+
+    lines = []
+    used = 0
+    for passage in rank_passages(claim, results or []):
+        line = f"- {passage['text']} ({passage['source']})"
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            if not lines:
+                lines.append(fit_text(line, max_tokens))
+            break
+        lines.append(line)
+        used += cost
+
+    text = "\n".join(lines) if lines else NO_EVIDENCE
+    return text, {"raw_tokens": raw_tokens, "prompt_tokens": estimate_tokens(text)}
@@ -0,0 +1,129 @@
+"""
+Extractive Segment Summarizer (CPU only)
+Fills the same fields as the Gemini segment summary (topic, summary, key_points,
+entities_mentioned) in milliseconds, without any API call.
+
+Used as:
+- Fallback: when Gemini is unavailable or fails for a segment.
+- First Pass: a preview published before the LLM summaries are ready.
+
+Method: TF-IDF sentence vectors ranked with TextRank; keywords from aggregate
+TF-IDF weights; entities from capitalized phrases and acronyms.
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Any
+
+from video_extraction.utils.text import tokenize, split_sentences, STOPWORDS
+
+ENTITY_PATTERN = re.compile(r"\b(?:[A-Z][a-zA-Z'&-]+|[A-Z]{2,6})(?:\s+(?:of\s+|the\s+)?[A-Z][a-zA-Z'&-]+)*")
+LEADING_ARTICLE = re.compile(r"^(?:The|A|An|This|That)\s+")
+
+
+class ExtractiveSummarizer:
+    """TextRank over TF-IDF sentence vectors"""
+
+    def __init__(self, summary_sentences: int = 3, key_points: int = 5,
+                 max_entities: int = 8, damping: float = 0.85, iterations: int = 30):
+        self.summary_sentences = summary_sentences
+        self.key_points = key_points
+        self.max_entities = max_entities
+        self.damping = damping
+        self.iterations = iterations
+
+    def _tfidf_vectors(self, sentence_tokens: List[List[str]]) -> List[Dict[str, float]]:
+        doc_freq = Counter()
+        for tokens in sentence_tokens:
+            doc_freq.update(set(tokens))
+
+        n = len(sentence_tokens)
+        vectors = []
+        for tokens in sentence_tokens:
+            counts = Counter(tokens)
+            vec = {t: c * math.log(1 + n / doc_freq[t]) for t, c in counts.items()}
+            norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+            vectors.append({t: w / norm for t, w in vec.items()})
+        return vectors
+
+    def _textrank(self, vectors: List[Dict[str, float]]) -> List[float]:
+        n = len(vectors)
+        if n == 1:
+            return [1.0]
+
+        # Cosine similarity graph (vectors are already normalized)
+        edges = [[0.0] * n for _ in range(n)]
+        for i in range(n):
+            vi = vectors[i]
+            for j in range(i + 1, n):
+                vj = vectors[j]
+                small, large = (vi, vj) if len(vi) < len(vj) else (vj, vi)
+                sim = sum(w * large.get(t, 0.0) for t, w in small.items())
+                edges[i][j] = edges[j][i] = sim
+
+        out_weight = [sum(row) or 1.0 for row in edges]
+        scores = [1.0 / n] * n
+        for _ in range(self.iterations):
+            scores = [
+                (1 - self.damping) / n + self.damping * sum(
+                    edges[j][i] * scores[j] / out_weight[j] for j in range(n) if edges[j][i])
+                for i in range(n)
+            ]
+        return scores
+
+    def extract_keywords(self, vectors: List[Dict[str, float]], limit: int = 5) -> List[str]:
+        weights = Counter()
+        for vec in vectors:
+            weights.update(vec)
+        return [t for t, _ in weights.most_common(limit)]
+
+    def extract_entities(self, text: str) -> List[str]:
+        """Capitalized phrases / acronyms that are not just sentence-initial words"""
+        counts = Counter()
+        for match in ENTITY_PATTERN.finditer(text):
+            phrase = match.group(0).strip(" -'")
+            start = match.start()
+            preceding = text[:start].rstrip()
+            sentence_initial = not preceding or preceding[-1] in ".!?"
+            words = phrase.split()
+
+            if sentence_initial and len(words) == 1 and not phrase.isupper():
+                continue
+            phrase = LEADING_ARTICLE.sub("", phrase)
+            if len(phrase.split()) == 1 and phrase.lower() in STOPWORDS:
+                continue
+            counts[phrase] += 1
+        return [e for e, _ in counts.most_common(self.max_entities)]
+
+    def summarize(self, text: str) -> Dict[str, Any]:
+        """Returns a dict with the same keys as the Gemini segment summary"""
+        sentences = split_sentences(text)
+        sentence_tokens = [tokenize(s) for s in sentences]
+        ranked_pool = [i for i, tokens in enumerate(sentence_tokens) if tokens]
+
+        if not ranked_pool:
+            return {
+                "topic": "No Dialogue",
+                "summary": text[:200],
+                "key_points": [],
+                "sentiment": "Unknown",
+                "entities_mentioned": []
+            }
+
+        vectors = self._tfidf_vectors([sentence_tokens[i] for i in ranked_pool])
+        scores = self._textrank(vectors)
+        order = [ranked_pool[i] for i in sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)]
+
+        # Summary keeps the best sentences in their original (chronological) order
+        summary_ids = sorted(order[:self.summary_sentences])
+        point_ids = order[self.summary_sentences:self.summary_sentences + self.key_points] or order[:self.key_points]
+
+        keywords = self.extract_keywords(vectors, limit=3)
+        return {
+            "topic": ", ".join(k.title() for k in keywords),
+            "summary": " ".join(sentences[i] for i in summary_ids),
+            "key_points": [sentences[i] for i in sorted(point_ids)],
+            "sentiment": "Unknown",
+            "entities_mentioned": self.extract_entities(text)
+        }
@@ -1,23 +1,52 @@
 #!/usr/bin/env python3
 """
-Video Fact Checker & Perspective Analyzer (DuckDuckGo Version)
+Video Fact Checker & Perspective Analyzer
 1. Extracts verifiable claims (skips non-news content safely).
-2. Searches the ENTIRE WEB using DuckDuckGo (No Google API Key needed).
+2. Searches evidence through an EvidenceBackend: DuckDuckGo (No Google API Key needed),
+   a local BM25 corpus, or the corpus with DuckDuckGo as fallback (EVIDENCE_BACKEND).
 3. Verifies claims, finds perspectives, and calculates media bias.
+
+FactCheckStream runs the same steps per segment while the transcript is still
+being summarized, publishing verdicts as they come in.
 """
 
 import json
 import os
+import time
+import queue
 import argparse
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple
 
-from valkey_rest.crud import valkey_set
+from valkey_rest.crud import valkey_get, valkey_set, valkey_delete_keys
+from video_extraction import checkability_triage, claim_cache, claim_index, evidence_backends, evidence_ranker, gemini_cache, gemini_client, media_bias
+from video_extraction.token_budget import (
+    TokenBudget, TokenBudgetExceeded, PER_CALL_PROMPT_LIMITS, fit_items)
 
 # --- Configuration ---
 # Only Gemini Key is needed now!
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 GEMINI_MODEL = "gemini-3-flash-preview" 
 
+# Approximate size of the fixed instructions in the extraction / verification prompts
+PROMPT_OVERHEAD_TOKENS = 400
+
+# Evidence search: parallel claims and deadlines (seconds)
+SEARCH_WORKERS = int(os.environ.get("SEARCH_WORKERS", 4))
+SEARCH_CLAIM_TIMEOUT = float(os.environ.get("SEARCH_CLAIM_TIMEOUT", 12))
+SEARCH_TOTAL_TIMEOUT = float(os.environ.get("SEARCH_TOTAL_TIMEOUT", 30))
+
+# Claim verification: claims per Gemini call, concurrent calls and retries of a failed batch
+VERIFY_BATCH_CLAIMS = max(1, int(os.environ.get("VERIFY_BATCH_CLAIMS", 4)))
+VERIFY_WORKERS = int(os.environ.get("VERIFY_WORKERS", 3))
+VERIFY_RETRIES = 1
+# Word overlap (Jaccard) for pairing a reworded claim in Gemini's answer with its claim
+MATCH_MIN_OVERLAP = 0.5
+
+# Progressive results of a streaming fact check expire if the stream dies
+PARTIAL_TTL = 60 * 60
+
 # --- Imports ---
 try:
     from google import genai
@@ -27,19 +56,14 @@ except ImportError:
     GEMINI_AVAILABLE = False
     print("[!] Warning: 'google-genai' library not installed. pip install google-genai")
 
-try:
-    from duckduckgo_search import DDGS
-    DDG_AVAILABLE = True
-except ImportError:
-    DDG_AVAILABLE = False
-    print("[!] Warning: 'duckduckgo-search' library not installed. pip install duckduckgo-search")
-
 
 class FactChecker:
-    def __init__(self):
+    def __init__(self, backend: evidence_backends.EvidenceBackend = None):
+        # Evidence source; the process-wide default (EVIDENCE_BACKEND) unless one is injected
+        self.backend = backend or evidence_backends.get_default_backend()
         self.gemini_client = None
         if GEMINI_AVAILABLE and GEMINI_API_KEY:
-            self.gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+            self.gemini_client = gemini_client.get_client(GEMINI_API_KEY)
 
     def _load_json(self, path: str) -> Dict:
         try:
@@ -64,19 +88,29 @@ class FactChecker:
         }
 
     # --- Step 1: Extract Claims (Smart Filter) ---
-    def extract_claims(self, transcript_data: Dict) -> Dict:
+    def extract_claims(self, transcript_data: Dict, budget: TokenBudget = None) -> Dict:
         print(" -> Analyzing content type and extracting claims...")
         segments = transcript_data.get("segments", [])
         if not segments:
             return {"is_news": False, "claims": []}
 
-        # Prepare context
-        segments_text = ""
+        try:
+            prompt_limit = budget.require("claim_extraction") if budget else PER_CALL_PROMPT_LIMITS["claim_extraction"]
+        except TokenBudgetExceeded as e:
+            print(f"[!] Extraction skipped: {e}")
+            return {"is_checkable": False, "claims": [], "failed": True}
+
+        # Prepare context (as many segments as fit in the prompt budget)
+        segment_lines = []
         for seg in segments:
             analysis = seg.get("analysis", {})
             points = analysis.get("key_points", [])
             summary = analysis.get("summary", "")
-            segments_text += f"Segment {seg['segment_id']}: {summary}. Key Points: {'; '.join(points)}\n\n"
+            segment_lines.append(f"Segment {seg['segment_id']}: {summary}. Key Points: {'; '.join(points)}\n\n")
+        kept_lines = fit_items(segment_lines, lambda line: line, prompt_limit - PROMPT_OVERHEAD_TOKENS)
+        if len(kept_lines) < len(segment_lines):
+            print(f"    Prompt budget fits {len(kept_lines)}/{len(segment_lines)} segments.")
+        segments_text = "".join(kept_lines)
 
         prompt = f"""
         You are a Content Triage Bot. Analyze these video summaries.
@@ -113,84 +147,169 @@ class FactChecker:
         )
 
         try:
-            response = self.gemini_client.models.generate_content(
+            response_text = gemini_cache.generate_content(
+                self.gemini_client,
                 model=GEMINI_MODEL,
                 contents=prompt,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json",
                     response_schema=extraction_schema
-                )
+                ),
+                call_site="claim_extraction",
+                budget=budget,
+                validate=gemini_cache.json_validator(
+                    "is_checkable", "claims", check=lambda r: isinstance(r["claims"], list))
             )
-            return json.loads(response.text)
+            return json.loads(response_text)
         except Exception as e:
             print(f"[!] Extraction failed: {e}")
-            return {"is_checkable": False, "claims": []}
+            return {"is_checkable": False, "claims": [], "failed": True}
 
-    # --- Step 2: Search Evidence (DuckDuckGo) ---
-    def search_duckduckgo(self, query: str) -> List[Dict]:
-        """Searches DuckDuckGo News and Web"""
-        if not DDG_AVAILABLE:
-            return []
-
-        results = []
+    def fused_claims(self, transcript_data: Dict, budget: TokenBudget = None) -> Optional[Dict]:
+        """
+        Claims already extracted by TranscriptSegmenter in fused mode (FUSED_CLAIM_EXTRACTION).
+        Segments without them (extractive fallbacks, older summaries) go through
+        extract_claims. None if no segment has fused claims.
+        """
+        segments = transcript_data.get("segments", [])
+        fused = [s for s in segments
+                 if isinstance(s.get("analysis", {}).get("claims"), list) and "is_checkable" in s["analysis"]]
+        if not fused:
+            return None
+        print(f" -> Using claims from {len(fused)}/{len(segments)} segment summaries (fused mode).")
+
+        is_checkable = any(s["analysis"]["is_checkable"] for s in fused)
+        claims = [{"claim_text": claim_txt, "segment_id": s["segment_id"]}
+                  for s in fused if s["analysis"]["is_checkable"] for claim_txt in s["analysis"]["claims"]]
+
+        rest = [s for s in segments if s not in fused]
+        failed = False
+        if rest:
+            extraction_result = self.extract_claims({"segments": rest}, budget=budget)
+            is_checkable = is_checkable or extraction_result.get("is_checkable", False)
+            claims += extraction_result.get("claims", [])
+            failed = bool(extraction_result.get("failed"))
+
+        # The same claim often comes up in several segments
+        unique, seen = [], set()
+        for item in claims:
+            key = claim_cache.normalize_claim(item["claim_text"])
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(item)
+        result = {"is_checkable": is_checkable, "claims": unique}
+        if failed:
+            result["failed"] = True
+        return result
+
+    def _load_metadata(self, video_id: str) -> Optional[Dict]:
+        # CRUD GET 1. Fetch the video metadata from Valkey with the key "VIDEO_ID_summary.json"
         try:
-            with DDGS() as ddgs:
-                # 1. Try News Search first (better for fact checking)
-                news_gen = ddgs.news(query, max_results=3)
-                if news_gen:
-                    for r in news_gen:
-                        results.append({
-                            "title": r.get('title'),
-                            # DDG uses 'body' for news snippets
-                            "snippet": r.get('body'),
-                            "source": r.get('source'),
-                            "url": r.get('url')
-                        })
-
-                # 2. Fallback to Web Search if news is empty or sparse
-                if len(results) < 2:
-                    web_gen = ddgs.text(query, max_results=3)
-                    if web_gen:
-                        for r in web_gen:
-                            results.append({
-                                "title": r.get('title'),
-                                "snippet": r.get('body'),
-                                # Web search doesn't always have source name
-                                "source": r.get('href'),
-                                "url": r.get('href')
-                            })
-
-            return results[:5]  # Return top 5 combined
+            metadata = valkey_get(f"{video_id}_summary.json")
         except Exception as e:
-            print(f"[!] DDG Search failed for '{query}': {e}")
-            return []
-
-    # --- Step 3: Verify & Synthesize ---
-    def verify_and_synthesize(self, claims_with_evidence: List[Dict]) -> Dict:
-        print(" -> Verifying claims and calculating media bias...")
+            print(f"[!] Loading metadata failed: {e}")
+            return None
+        return metadata if isinstance(metadata, dict) else None
 
-        input_context = ""
-        for item in claims_with_evidence:
-            input_context += f"""
-            CLAIM: "{item['claim']}"
-            SEARCH RESULTS:
-            {json.dumps(item['search_results'], indent=2)}
-            ------------------------------------------------
-            """
+    def triage_and_extract(self, transcript_data: Dict, metadata: Optional[Dict],
+                           budget: TokenBudget = None, record: bool = True,
+                           explore: Optional[bool] = None) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Uses fused claims from the segment summaries when there are any. Otherwise runs the
+        local checkability triage first and calls extract_claims only when the content is
+        not clearly non-news (or the skip is explored, see checkability_triage.EXPLORE_RATE);
+        Gemini's is_checkable decisions become triage training examples (unless record is
+        False, e.g. for single segments of a stream).
+        Returns (extraction_result, triage summary or None).
+        """
+        fused = self.fused_claims(transcript_data, budget)
+        if fused is not None:
+            return fused, None
+
+        triage = None
+        if checkability_triage.TRIAGE_ENABLED:
+            try:
+                triage = checkability_triage.get_default_triage().triage(
+                    metadata, transcript_data.get("segments", []), explore=explore)
+            except Exception as e:
+                print(f"[!] Checkability triage failed: {e}")
+        summary = {k: triage[k] for k in ("decision", "probability", "model", "explored")} if triage else None
+
+        if triage and triage["decision"] == "skip":
+            print(f" -> Triage: non-news (p={triage['probability']}, {triage['took_ms']} ms). "
+                  f"Skipping claim extraction.")
+            return {"is_checkable": False, "claims": []}, summary
+        if triage and triage["explored"]:
+            print(f" -> Triage: non-news (p={triage['probability']}), sent to Gemini anyway for a training label.")
+
+        extraction_result = self.extract_claims(transcript_data, budget=budget)
+        if record and triage and "is_checkable" in extraction_result and not extraction_result.get("failed"):
+            try:
+                checkability_triage.record_example(triage["fields"], extraction_result["is_checkable"])
+            except Exception as e:
+                print(f"[!] Recording triage example failed: {e}")
+        return extraction_result, summary
+
+    # --- Step 2: Search Evidence ---
+    def search_duckduckgo(self, query: str, timeout: float = SEARCH_CLAIM_TIMEOUT) -> List[Dict]:
+        """Searches DuckDuckGo News and Web regardless of the configured backend"""
+        try:
+            return evidence_backends.DuckDuckGoBackend().search(query, timeout)
+        except evidence_backends.SearchFailed as e:
+            return e.partial
 
-        prompt = f"""
-        Act as a Fact Checker and Media Bias Analyst.
-        
-        TASKS:
-        1. FACT CHECK: Verdict (True/False/Unverified) based on evidence.
-        2. PERSPECTIVES: Identify varied news sources.
-        3. BIAS DISTRIBUTION: Count Left/Center/Right leaning sources found in the evidence.
-        
-        INPUT DATA:
-        {input_context}
+    def search_all(self, claims: List[str]) -> List[List[Dict]]:
+        """
+        Evidence for every claim, searched concurrently.
+        Each claim gets SEARCH_CLAIM_TIMEOUT once it starts, the whole batch SEARCH_TOTAL_TIMEOUT;
+        claims that miss the deadline get no evidence instead of holding up the rest.
+        Only completed searches are cached: failures and timeouts are retried next time.
         """
+        results: List[List[Dict]] = [[] for _ in claims]
+        if not claims:
+            return results
+
+        # Claims seen before (in any video) are answered from the claim cache
+        cache = claim_cache.get_claim_cache()
+        to_search = list(range(len(claims)))
+        if cache is not None:
+            cached = cache.get_many(claims, self.backend.name)
+            for i, hit in enumerate(cached):
+                if hit is not None:
+                    results[i] = hit
+            to_search = [i for i, hit in enumerate(cached) if hit is None]
+            print(f"    Claim cache: {len(claims) - len(to_search)}/{len(claims)} hits")
+        if not to_search:
+            return results
+
+        started = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=max(1, min(SEARCH_WORKERS, len(to_search))))
+        futures = {pool.submit(self.backend.search, claims[i], SEARCH_CLAIM_TIMEOUT): i for i in to_search}
+        done, pending = wait(futures, timeout=SEARCH_TOTAL_TIMEOUT)
+        failed = 0
+        for future in done:
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except evidence_backends.SearchFailed as e:
+                results[i] = e.partial
+                failed += 1
+                continue
+            if cache is not None:
+                cache.put(claims[i], results[i], self.backend.name)
+        # Don't wait for stragglers; their threads finish on their own (backends get their own timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        if pending:
+            print(f"[!] {len(pending)}/{len(to_search)} searches missed the {SEARCH_TOTAL_TIMEOUT:.0f}s deadline.")
+        if failed:
+            print(f"[!] {failed}/{len(to_search)} searches failed; not caching them.")
+        print(f"    Searched {len(to_search)} claims ({self.backend.name}) in {time.monotonic() - started:.1f}s")
+        return results
 
-        final_schema = types.Schema(
+    # --- Step 3: Verify & Synthesize ---
+    def _verification_schema(self):
+        return types.Schema(
             type=types.Type.OBJECT,
             properties={
                 "fact_checks": types.Schema(
@@ -208,47 +327,275 @@ class FactChecker:
                         },
                         required=["claim", "verdict", "explanation"]
                     )
-                ),
-                "alternative_perspectives": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={
-                            "source": types.Schema(type=types.Type.STRING),
-                            "type": types.Schema(type=types.Type.STRING),
-                            "description": types.Schema(type=types.Type.STRING),
-                            "url": types.Schema(type=types.Type.STRING)
-                        },
-                        required=["source", "type", "description", "url"]
-                    )
-                ),
-                "bias_distribution": types.Schema(
-                    type=types.Type.OBJECT,
-                    properties={
-                        "left_count": types.Schema(type=types.Type.INTEGER),
-                        "center_count": types.Schema(type=types.Type.INTEGER),
-                        "right_count": types.Schema(type=types.Type.INTEGER)
-                    },
-                    required=["left_count", "center_count", "right_count"]
                 )
             },
-            required=["fact_checks",
-                      "alternative_perspectives", "bias_distribution"]
+            required=["fact_checks"]
         )
 
+    @staticmethod
+    def _is_valid_verification(response_text: str) -> bool:
         try:
-            response = self.gemini_client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    response_mime_type="application/json",
-                    response_schema=final_schema
-                )
-            )
-            return json.loads(response.text)
+            result = json.loads(response_text)
+        except (TypeError, ValueError):
+            return False
+        return isinstance(result, dict) and isinstance(result.get("fact_checks"), list)
+
+    def _verify_batch(self, batch: List[Dict], budget: TokenBudget = None) -> Dict:
+        """One verification call for a batch of claims; raises on any failure"""
+        prompt_limit = budget.require("claim_verification") if budget else PER_CALL_PROMPT_LIMITS["claim_verification"]
+
+        # Ranked evidence passages (see evidence_ranker) and only as many claims as fit in the prompt budget
+        claim_blocks = [
+            f'CLAIM: "{item["claim"]}"\nEVIDENCE:\n{item["evidence_text"]}\n---\n'
+            for item in batch
+        ]
+        kept_blocks = fit_items(claim_blocks, lambda block: block, prompt_limit - PROMPT_OVERHEAD_TOKENS)
+        # Claims that don't fit stay visible as Unverified instead of vanishing
+        dropped = [{
+            "claim": item["claim"],
+            "verdict": "Unverified",
+            "explanation": "Not verified: the claim and its evidence did not fit in the remaining token budget."
+        } for item in batch[len(kept_blocks):]]
+        if dropped:
+            print(f"    Prompt budget fits {len(kept_blocks)}/{len(claim_blocks)} claims of a batch.")
+        if not kept_blocks:
+            return {"fact_checks": dropped}
+        input_context = "".join(kept_blocks)
+
+        prompt = f"""
+        Act as a Fact Checker.
+        
+        TASK: For each claim, give a Verdict (True/False/Unverified) based on the evidence.
+        
+        INPUT DATA:
+        {input_context}
+        """
+
+        response_text = gemini_cache.generate_content(
+            self.gemini_client,
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=self._verification_schema()
+            ),
+            call_site="claim_verification",
+            budget=budget,
+            validate=self._is_valid_verification
+        )
+        if not self._is_valid_verification(response_text):
+            raise ValueError("Malformed verification response")
+        result = json.loads(response_text)
+        result["fact_checks"] = (result.get("fact_checks") or []) + dropped
+        return result
+
+    def _verify_with_retry(self, batch: List[Dict], budget: TokenBudget = None) -> Any:
+        """The batch's result, or None once VERIFY_RETRIES retries have failed"""
+        for attempt in range(VERIFY_RETRIES + 1):
+            try:
+                return self._verify_batch(batch, budget)
+            except TokenBudgetExceeded as e:
+                print(f"[!] Verification batch skipped: {e}")
+                return None
+            except Exception as e:
+                print(f"[!] Verification batch failed (attempt {attempt + 1}/{VERIFY_RETRIES + 1}): {e}")
+        return None
+
+    @staticmethod
+    def _match_checks(batch: List[Dict], checks: List[Any]) -> List[Dict]:
+        """
+        One fact check per claim of the batch, in claim order. Checks are matched by
+        normalized claim text, or for reworded claims by word overlap
+        (MATCH_MIN_OVERLAP); claims Gemini left out come back as Unverified.
+        """
+        checks = [c for c in checks if isinstance(c, dict)]
+        check_keys = [claim_cache.normalize_claim(str(c.get("claim", ""))) for c in checks]
+        claim_keys = [claim_cache.normalize_claim(item["claim"]) for item in batch]
+
+        matched: List[Optional[int]] = [None] * len(batch)
+        used = set()
+        for pos, key in enumerate(claim_keys):
+            i = next((i for i, k in enumerate(check_keys) if k == key and i not in used), None)
+            if i is not None:
+                matched[pos] = i
+                used.add(i)
+
+        for pos, key in enumerate(claim_keys):
+            if matched[pos] is not None:
+                continue
+            words = set(key.split())
+            best, best_overlap = None, MATCH_MIN_OVERLAP
+            for i, k in enumerate(check_keys):
+                other = set(k.split())
+                if i in used or not words or not other:
+                    continue
+                overlap = len(words & other) / len(words | other)
+                if overlap >= best_overlap:
+                    best, best_overlap = i, overlap
+            if best is not None:
+                matched[pos] = best
+                used.add(best)
+
+        return [checks[i] if i is not None else {
+            "claim": item["claim"],
+            "verdict": "Unverified",
+            "explanation": "Not verified: no verdict was returned for this claim."
+        } for item, i in zip(batch, matched)]
+
+    def _merge_verifications(self, batches: List[List[Dict]], results: List[Any]) -> Dict:
+        """Concatenates the fact checks of all batches, in claim order"""
+        merged = self._create_safe_empty_response()
+        merged.pop("status", None)
+        merged.pop("reason", None)
+
+        for batch, result in zip(batches, results):
+            if result is None:
+                # Keep the claims visible instead of dropping them with their batch
+                merged["fact_checks"].extend({
+                    "claim": item["claim"],
+                    "verdict": "Unverified",
+                    "explanation": "Verification failed for this claim."
+                } for item in batch)
+                continue
+
+            merged["fact_checks"].extend(self._match_checks(batch, result.get("fact_checks") or []))
+
+        merged["verification"] = {"batches": len(batches),
+                                  "failed_batches": sum(r is None for r in results)}
+        return merged
+
+    def verify_and_synthesize(self, claims_with_evidence: List[Dict], budget: TokenBudget = None) -> Dict:
+        """
+        Verifies claims in batches of VERIFY_BATCH_CLAIMS, VERIFY_WORKERS at a time,
+        each claim with its top evidence passages (EVIDENCE_TOKENS_PER_CLAIM).
+        Perspectives and bias distribution come from the local media bias table.
+        """
+        print(" -> Verifying claims and calculating media bias...")
+
+        # Only the passages relevant to each claim go into the prompt
+        prepared = []
+        compression = {"raw_tokens": 0, "prompt_tokens": 0}
+        for item in claims_with_evidence:
+            evidence_text, sizes = evidence_ranker.compact_evidence(item["claim"], item.get("search_results") or [])
+            prepared.append({**item, "evidence_text": evidence_text})
+            for key in compression:
+                compression[key] += sizes[key]
+        compression["tokens_saved"] = max(0, compression["raw_tokens"] - compression["prompt_tokens"])
+        print(f"    Evidence: {compression['raw_tokens']} -> {compression['prompt_tokens']} tokens "
+              f"({compression['tokens_saved']} saved)")
+
+        batches = [prepared[i:i + VERIFY_BATCH_CLAIMS]
+                   for i in range(0, len(prepared), VERIFY_BATCH_CLAIMS)]
+        if not batches:
+            return self._create_safe_empty_response("No claims to verify")
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(VERIFY_WORKERS, len(batches)))) as pool:
+            results = list(pool.map(lambda batch: self._verify_with_retry(batch, budget), batches))
+
+        failed = sum(r is None for r in results)
+        print(f"    Verified {len(batches)} batches in {time.monotonic() - started:.1f}s ({failed} failed)")
+        if failed == len(batches):
+            final_result = self._create_safe_empty_response("AI Processing Failed")
+        else:
+            final_result = self._merge_verifications(batches, results)
+        final_result["evidence_compression"] = compression
+
+        evidence = [r for item in claims_with_evidence for r in item.get("search_results") or []]
+        return self._apply_media_bias(final_result, evidence)
+
+    def _apply_media_bias(self, final_result: Dict, evidence: List[Dict]) -> Dict:
+        """Perspectives and bias distribution of the evidence, from the local media bias table"""
+        try:
+            table = media_bias.get_default_table()
+            final_result["alternative_perspectives"] = table.perspectives(evidence)
+            final_result["bias_distribution"] = table.bias_distribution(evidence)
         except Exception as e:
-            print(f"[!] Verification failed: {e}")
-            return self._create_safe_empty_response("AI Processing Failed")
+            print(f"[!] Media bias rating failed: {e}")
+        return final_result
+
+    def _reused_fact_check(self, claim: str, match: Dict[str, Any]) -> Dict[str, Any]:
+        """Fact check entry built from a previously verified, similar claim"""
+        return {
+            "claim": claim,
+            "verdict": match["verdict"],
+            "explanation": match["explanation"],
+            "reused_from": {
+                "claim": match["claim"],
+                "video_id": match["video_id"],
+                "verified_at": match["verified_at"],
+                "similarity": match["similarity"]
+            }
+        }
+
+    def check_claims(self, claim_texts: List[str], video_id: str, budget: TokenBudget = None):
+        """
+        Reuse, search and verify a list of claims.
+        Returns (result, claims_with_evidence); result has status "processed".
+        claims_with_evidence also lists the reused claims, with their stored evidence.
+        """
+        # Claims (or paraphrases) verified in earlier videos reuse the stored verdict
+        try:
+            matches = claim_index.find_matches(claim_texts)
+        except Exception as e:
+            print(f"[!] Claim index lookup failed: {e}")
+            matches = [None] * len(claim_texts)
+        reused = [self._reused_fact_check(claim_txt, match)
+                  for claim_txt, match in zip(claim_texts, matches) if match is not None]
+        novel = [claim_txt for claim_txt, match in zip(claim_texts, matches) if match is None]
+        if reused:
+            print(f" -> Reusing {len(reused)} verdicts, {len(novel)} claims are new.")
+
+        claims_with_evidence = []
+        if novel:
+            # DuckDuckGo Search (No "news verification" suffix needed, DDG is smart),
+            # all claims at once so the stage takes about as long as the slowest query
+            for claim_txt in novel:
+                print(f"    Searching: {claim_txt[:50]}...")
+            evidence = self.search_all(novel)
+            claims_with_evidence = [{"claim": claim_txt, "search_results": results}
+                                    for claim_txt, results in zip(novel, evidence)]
+
+            final_result = self.verify_and_synthesize(claims_with_evidence, budget=budget)
+            try:
+                claim_index.add_verdicts(video_id, final_result.get("fact_checks", []),
+                                         {item["claim"]: item["search_results"] for item in claims_with_evidence})
+            except Exception as e:
+                print(f"[!] Claim index update failed: {e}")
+        else:
+            final_result = self._create_safe_empty_response()
+
+        if reused:
+            # Perspectives and bias distribution also cover the evidence of reused verdicts
+            claims_with_evidence += [{"claim": claim_txt, "search_results": match.get("evidence") or [], "reused": True}
+                                     for claim_txt, match in zip(claim_texts, matches) if match is not None]
+            self._apply_media_bias(
+                final_result, [r for item in claims_with_evidence for r in item.get("search_results") or []])
+
+        final_result["fact_checks"] = final_result.get("fact_checks", []) + reused
+        final_result["status"] = "processed"
+        final_result.pop("reason", None)
+        return final_result, claims_with_evidence
+
+    def _build_output(self, source_file: Any, final_result: Dict) -> Dict:
+        return {
+            "video_source": source_file,
+            "checked_at": "2026-02-14",
+            "analysis": final_result
+        }
+
+    def _save_output(self, final_output: Dict, output_path: Optional[str], video_id: str) -> str:
+        """Writes the fact check to disk (if a path is given) and to Valkey; returns its JSON"""
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(final_output, f, indent=2, ensure_ascii=False)
+
+        # CRUD PUT 5. Save the fact check result to Valkey with the key "VIDEO_ID_fact_check.json"
+        valkey_key = f"{video_id}_fact_check.json"
+        fact_check_json = json.dumps(
+            final_output, indent=2, ensure_ascii=False)
+        valkey_set(valkey_key, fact_check_json)
+        return fact_check_json
 
     def process_video(self, input_path: str, output_path: str, video_id: str):
         print(f"Starting Fact Check for: {input_path}")
@@ -256,7 +603,8 @@ class FactChecker:
         if not data:
             return
 
-        extraction_result = self.extract_claims(data)
+        budget = TokenBudget.for_video(video_id)
+        extraction_result, triage = self.triage_and_extract(data, self._load_metadata(video_id), budget)
 
         if not extraction_result.get("is_checkable", False):
             print(" -> Video identified as Non-News. Skipping.")
@@ -264,34 +612,176 @@ class FactChecker:
         else:
             claims = extraction_result.get("claims", [])
             print(f" -> Found {len(claims)} verifiable claims.")
+            final_result, _ = self.check_claims([item['claim_text'] for item in claims], video_id, budget)
+        if triage:
+            final_result["triage"] = triage
 
-            claims_with_evidence = []
-            for item in claims:
-                claim_txt = item['claim_text']
-                print(f"    Searching: {claim_txt[:50]}...")
+        final_output = self._build_output(data.get("source_file"), final_result)
+        budget.save()
+        fact_check_json = self._save_output(final_output, output_path, video_id)
 
-                # DuckDuckGo Search (No "news verification" suffix needed, DDG is smart)
-                results = self.search_duckduckgo(claim_txt)
-                claims_with_evidence.append(
-                    {"claim": claim_txt, "search_results": results})
+        print(f"\n[Success] Fact Check saved to: {output_path}")
+        return fact_check_json
 
-            final_result = self.verify_and_synthesize(claims_with_evidence)
-            final_result["status"] = "processed"
 
-        final_output = {
-            "video_source": data.get("source_file"),
-            "checked_at": "2026-02-14",
-            "analysis": final_result
-        }
+class FactCheckStream:
+    """
+    Fact checks a video segment by segment while TranscriptSegmenter is still running.
+    Pass add_segment as process_file's on_segment callback: each summarized segment is
+    queued, and a worker thread extracts its claims, searches and verifies them, then
+    publishes the verdicts so far to "<id>_fact_check_partial.json". finish() waits for
+    the queue and saves the complete result like process_video.
+
+    If claim extraction failed for any segment (or the summarization itself failed,
+    see abort()), no final result is saved: the partial key is dropped and the video
+    can be fact checked again later instead of being stuck with an incomplete verdict.
+    """
+
+    def __init__(self, checker: FactChecker, video_id: str, output_path: Optional[str] = None,
+                 source_file: Any = None):
+        self.checker = checker
+        self.video_id = video_id
+        self.output_path = output_path
+        self.source_file = source_file
+        self.budget = TokenBudget.for_video(video_id)
+
+        self.fact_checks: List[Dict] = []
+        self.evidence: List[Dict] = []
+        self.seen_claims = set()
+        self.segments_done = 0
+        self.segments: List[Dict] = []
+        self.gemini_decided = False     # Gemini (not triage or fused claims) judged some segment
+        # Exploration is drawn once, so a whole video is either explored or not
+        self.explore = checkability_triage.should_explore()
+        self.failed_segments: List[Any] = []
+        self.checkable = False
+        self.metadata: Optional[Dict] = None
+        self.verification = {"batches": 0, "failed_batches": 0}
+        self.compression = {"raw_tokens": 0, "prompt_tokens": 0, "tokens_saved": 0}
+
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def add_segment(self, segment: Dict[str, Any]):
+        """on_segment callback; returns immediately"""
+        self._queue.put(segment)
+
+    def _run(self):
+        self.metadata = self.checker._load_metadata(self.video_id)
+        while True:
+            segment = self._queue.get()
+            if segment is None:
+                return
+            try:
+                self._check_segment(segment)
+            except Exception as e:
+                print(f"[!] Streaming fact check failed for segment {segment.get('segment_id')}: {e}")
+                self.failed_segments.append(segment.get("segment_id"))
+            self.segments_done += 1
+            self._publish_partial()
+
+    def _check_segment(self, segment: Dict[str, Any]):
+        self.segments.append(segment)
+        # Triage examples are per video: one is recorded in finish(), not one per segment
+        extraction, triage = self.checker.triage_and_extract(
+            {"segments": [segment]}, self.metadata, self.budget, record=False, explore=self.explore)
+        if triage and triage["decision"] == "extract" and not extraction.get("failed"):
+            self.gemini_decided = True
+        if extraction.get("failed"):
+            self.failed_segments.append(segment.get("segment_id"))
+            return
+        if not extraction.get("is_checkable", False):
+            return
+        self.checkable = True
+
+        # Claims repeated in a later segment are only checked once
+        claim_texts = []
+        for item in extraction.get("claims", []):
+            key = claim_cache.normalize_claim(item.get("claim_text", ""))
+            if key and key not in self.seen_claims:
+                self.seen_claims.add(key)
+                claim_texts.append(item["claim_text"])
+        if not claim_texts:
+            return
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(final_output, f, indent=2, ensure_ascii=False)
+        print(f" -> Segment {segment.get('segment_id')}: {len(claim_texts)} new claims.")
+        result, claims_with_evidence = self.checker.check_claims(claim_texts, self.video_id, self.budget)
+        self.fact_checks.extend(result.get("fact_checks", []))
+        self.evidence.extend(r for item in claims_with_evidence for r in item.get("search_results") or [])
+        for key, value in (result.get("verification") or {}).items():
+            self.verification[key] = self.verification.get(key, 0) + value
+        for key, value in (result.get("evidence_compression") or {}).items():
+            self.compression[key] = self.compression.get(key, 0) + value
+
+    def _result(self, status: str) -> Dict[str, Any]:
+        result = self.checker._create_safe_empty_response()
+        result.pop("reason", None)
+        result["fact_checks"] = list(self.fact_checks)
+        result["status"] = status
+        result["segments_checked"] = self.segments_done
+        result["verification"] = dict(self.verification)
+        result["evidence_compression"] = dict(self.compression)
+        self.checker._apply_media_bias(result, self.evidence)
+        return result
+
+    def _publish_partial(self):
+        try:
+            partial = self.checker._build_output(self.source_file, self._result("partial"))
+            valkey_set(f"{self.video_id}_fact_check_partial.json",
+                       json.dumps(partial, ensure_ascii=False), expire=PARTIAL_TTL)
+        except Exception as e:
+            print(f"[!] Publishing partial fact check failed: {e}")
 
-        # CRUD PUT 5. Save the fact check result to Valkey with the key "VIDEO_ID_fact_check.json"
-        valkey_key = f"{video_id}_fact_check.json"
-        fact_check_json = json.dumps(
-            final_output, indent=2, ensure_ascii=False)
-        valkey_set(valkey_key, fact_check_json)
+    def _stop(self):
+        self._queue.put(None)
+        self._worker.join()
+        self.budget.save()
 
-        print(f"\n[Success] Fact Check saved to: {output_path}")
+    def _drop_partial(self):
+        try:
+            valkey_delete_keys(f"{self.video_id}_fact_check_partial.json")
+        except Exception as e:
+            print(f"[!] Removing partial fact check failed: {e}")
+
+    def _record_triage_example(self):
+        """One training example for the whole video, labeled with the video-level is_checkable"""
+        if not (checkability_triage.TRIAGE_ENABLED and self.gemini_decided):
+            return
+        try:
+            checkability_triage.record_example(
+                checkability_triage.example_fields(self.metadata, self.segments), self.checkable)
+        except Exception as e:
+            print(f"[!] Recording triage example failed: {e}")
+
+    def abort(self, reason: str):
+        """Stops without saving a final result, e.g. when the summarization raised"""
+        self._stop()
+        self._drop_partial()
+        print(f"[!] Streaming fact check aborted ({reason}); no result saved.")
+
+    def finish(self) -> Optional[str]:
+        """
+        Waits for the queued segments, saves the final fact check and returns its JSON.
+        Returns None without saving if claim extraction failed for any segment.
+        """
+        self._stop()
+        if self.failed_segments:
+            self._drop_partial()
+            print(f"[!] Claim extraction failed for segments {self.failed_segments}; "
+                  f"not saving a fact check result.")
+            return None
+
+        if self.checkable:
+            final_result = self._result("processed")
+        else:
+            print(" -> Video identified as Non-News. Skipping.")
+            final_result = self.checker._create_safe_empty_response("Non-News Content")
+        self._record_triage_example()
+
+        fact_check_json = self.checker._save_output(
+            self.checker._build_output(self.source_file, final_result), self.output_path, self.video_id)
+        self._drop_partial()
+        print(f"\n[Success] Streaming fact check finished ({len(self.fact_checks)} verdicts, "
+              f"{self.segments_done} segments).")
         return fact_check_json
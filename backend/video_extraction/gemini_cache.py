@@ -0,0 +1,245 @@
+"""
+Gemini Response Cache
+Shared cache in front of every Gemini `generate_content` call made by
+TranscriptSegmenter, CommentAnalyzer and FactChecker.
+
+Features:
+- Deterministic Keys: model + prompt + response schema + generation config.
+- Valkey Storage: Entries expire after a TTL (GEMINI_CACHE_TTL).
+- Validated Entries: Every caller passes a validator (see json_validator); only
+  responses it accepts are cached, so a truncated or malformed response is
+  requested again on the next call instead of being served for a week.
+- Size-Aware Eviction: Oversized responses are not cached, and the least recently
+  used entries are evicted once the cache grows past GEMINI_CACHE_MAX_BYTES.
+  Entries that expired are dropped from the byte count when they are next missed
+  or evicted.
+- Metrics: Hits / misses are counted per call site (e.g. "segment_summary").
+"""
+
+import json
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, Optional, Any, Callable
+
+from valkey_rest import crud
+from video_extraction import gemini_client
+from video_extraction.token_budget import estimate_tokens
+
+# --- Configuration ---
+CACHE_PREFIX = "gemini_cache"
+INDEX_KEY = f"{CACHE_PREFIX}:index"      # sorted set: entry key -> last access time
+SIZES_KEY = f"{CACHE_PREFIX}:sizes"      # hash: entry key -> bytes
+BYTES_KEY = f"{CACHE_PREFIX}:bytes"      # counter: total bytes tracked
+STATS_KEY = f"{CACHE_PREFIX}:stats"      # hash: "<call_site>:hits" / "<call_site>:misses"
+
+DEFAULT_TTL = int(os.environ.get("GEMINI_CACHE_TTL", 60 * 60 * 24 * 7))
+DEFAULT_MAX_TOTAL_BYTES = int(os.environ.get("GEMINI_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_MAX_ENTRY_BYTES = int(os.environ.get("GEMINI_CACHE_MAX_ENTRY_BYTES", 512 * 1024))
+CACHE_ENABLED = os.environ.get("GEMINI_CACHE_ENABLED", "1") != "0"
+
+
+def _to_jsonable(obj: Any) -> Any:
+    """Turns SDK objects (pydantic models like types.Schema) into plain JSON data"""
+    if obj is None:
+        return None
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    return obj
+
+
+def json_validator(*required_keys: str,
+                   check: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Callable[[str], bool]:
+    """
+    Validator for generate_content(): accepts a JSON object that has every one of
+    `required_keys` and, if given, passes `check(parsed)`
+    """
+    def validate(text: str) -> bool:
+        try:
+            result = json.loads(text)
+        except (TypeError, ValueError):
+            return False
+        if not isinstance(result, dict) or any(k not in result for k in required_keys):
+            return False
+        return check is None or bool(check(result))
+    return validate
+
+
+class GeminiResponseCache:
+    """Valkey-backed response cache with TTL, size-aware LRU eviction and hit metrics"""
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+                 max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES):
+        self.ttl = ttl
+        self.max_total_bytes = max_total_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        # In-process counters, mirrored to Valkey so all workers are aggregated
+        self.local_stats: Dict[str, Dict[str, int]] = {}
+
+    def make_key(self, model: str, contents: Any, config: Any = None) -> str:
+        """Deterministic key over everything that influences the generated output"""
+        payload = json.dumps({
+            "model": model,
+            "contents": _to_jsonable(contents),
+            "config": _to_jsonable(config),
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"{CACHE_PREFIX}:{digest}"
+
+    def _record(self, call_site: str, outcome: str):
+        with self._lock:
+            site = self.local_stats.setdefault(call_site, {"hits": 0, "misses": 0})
+            site[outcome] += 1
+        try:
+            crud.valkey_hincr(STATS_KEY, f"{call_site}:{outcome}")
+        except Exception as e:
+            print(f"[!] Gemini cache stats update failed: {e}")
+
+    def get(self, key: str, call_site: str,
+            validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Returns the cached response text, or None on a miss (or if `validate` rejects it)"""
+        try:
+            entry = crud.valkey_get(key)
+        except Exception as e:
+            print(f"[!] Gemini cache read failed: {e}")
+            entry = None
+
+        if isinstance(entry, dict) and isinstance(entry.get("text"), str) \
+                and (validate is None or validate(entry["text"])):
+            self._record(call_site, "hits")
+            try:
+                crud.valkey_zadd(INDEX_KEY, {key: time.time()})
+            except Exception:
+                pass
+            return entry["text"]
+
+        self._record(call_site, "misses")
+        if entry is None:
+            try:
+                self._forget(key)
+            except Exception as e:
+                print(f"[!] Gemini cache cleanup failed: {e}")
+        return None
+
+    def _forget(self, key: str):
+        """Drops the size and LRU bookkeeping of an entry that expired on its TTL"""
+        size = crud.valkey_hmget(SIZES_KEY, [key])[0]
+        if size is None:
+            return
+        crud.valkey_zrem(INDEX_KEY, key)
+        # HDEL succeeds in one process only, so the bytes are subtracted once
+        if crud.valkey_hdel(SIZES_KEY, key):
+            crud.valkey_incr(BYTES_KEY, -int(size))
+
+    def put(self, key: str, text: str, call_site: str):
+        """Stores a response, skipping oversized ones and evicting old entries if needed"""
+        entry = {"text": text, "call_site": call_site, "cached_at": time.time()}
+        size = len(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_entry_bytes:
+            return
+
+        try:
+            crud.valkey_set(key, entry, expire=self.ttl)
+            crud.valkey_zadd(INDEX_KEY, {key: time.time()})
+            previous = crud.valkey_hmget(SIZES_KEY, [key])[0]
+            crud.valkey_hincr(SIZES_KEY, key, size - int(previous or 0))
+            total = crud.valkey_incr(BYTES_KEY, size - int(previous or 0))
+            if total > self.max_total_bytes:
+                self._evict(total)
+        except Exception as e:
+            print(f"[!] Gemini cache write failed: {e}")
+
+    def _evict(self, total: int, batch: int = 32):
+        """Drops least recently used entries until the cache is back under budget"""
+        target = int(self.max_total_bytes * 0.9)
+        while total > target:
+            victims = crud.valkey_zrange(INDEX_KEY, 0, batch - 1)
+            if not victims:
+                break
+            sizes = crud.valkey_hmget(SIZES_KEY, victims)
+
+            # Only take as many of the oldest entries as needed to get under target
+            freed = 0
+            for i, s in enumerate(sizes):
+                freed += int(s or 0)
+                if total - freed <= target:
+                    victims = victims[:i + 1]
+                    break
+
+            crud.valkey_delete_keys(*victims)
+            crud.valkey_zrem(INDEX_KEY, *victims)
+
+            # Victims may have expired already; count each one's bytes once,
+            # in whichever process removes its size entry
+            pipe = crud.valkey_pipeline()
+            for victim in victims:
+                pipe.hdel(SIZES_KEY, victim)
+            removed = pipe.execute()
+            freed = sum(int(s or 0) for s, gone in zip(sizes, removed) if gone)
+            total = crud.valkey_incr(BYTES_KEY, -freed)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit ratio per call site, aggregated over all processes via Valkey"""
+        try:
+            raw = crud.valkey_hgetall(STATS_KEY)
+        except Exception:
+            raw = {f"{site}:{k}": v for site, c in self.local_stats.items() for k, v in c.items()}
+
+        report: Dict[str, Dict[str, Any]] = {}
+        for field, value in raw.items():
+            call_site, _, outcome = field.rpartition(":")
+            site = report.setdefault(call_site, {"hits": 0, "misses": 0})
+            site[outcome] = int(value)
+
+        for site in report.values():
+            lookups = site["hits"] + site["misses"]
+            site["hit_ratio"] = round(site["hits"] / lookups, 4) if lookups else 0.0
+        return report
+
+
+# Process-wide cache instance. Replace it with set_response_cache() (None disables caching).
+_response_cache: Optional[GeminiResponseCache] = GeminiResponseCache() if CACHE_ENABLED else None
+
+
+def get_response_cache() -> Optional[GeminiResponseCache]:
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[GeminiResponseCache]):
+    global _response_cache
+    _response_cache = cache
+
+
+def generate_content(client, model: str, contents: Any, config: Any = None,
+                     call_site: str = "default", budget=None, *,
+                     validate: Callable[[str], bool], refresh: bool = False) -> str:
+    """
+    Drop-in for `client.models.generate_content(...).text` with caching.
+    Only responses that `validate` accepts are cached (and served from the cache),
+    so a retry after a truncated or malformed response calls Gemini again.
+    With refresh, the cached response is skipped and replaced by the new one.
+    If a TokenBudget is given, the call's usage is recorded under `call_site`.
+    """
+    cache = _response_cache
+    key = None
+    estimated_tokens = estimate_tokens(contents)
+    if cache is not None:
+        key = cache.make_key(model, contents, config)
+        cached_text = None if refresh else cache.get(key, call_site, validate)
+        if cached_text is not None:
+            if budget is not None:
+                budget.record(call_site, estimated_prompt_tokens=estimated_tokens, cached=True)
+            return cached_text
+
+    response = gemini_client.generate_content(client, model=model, contents=contents,
+                                              config=config, call_site=call_site)
+    text = response.text
+    if budget is not None:
+        budget.record(call_site, getattr(response, "usage_metadata", None),
+                      estimated_prompt_tokens=estimated_tokens)
+
+    if cache is not None and text and validate(text):
+        cache.put(key, text, call_site)
+    return text
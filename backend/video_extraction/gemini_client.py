@@ -0,0 +1,168 @@
+"""
+Gemini Client Pool & Rate Limiter
+One shared `genai.Client` per API key for the whole process, plus global
+coordination of all Gemini traffic.
+
+Features:
+- Client Registry: Clients (and their HTTP connection pools) are reused across requests.
+- Global Limits: Token buckets for requests-per-minute and tokens-per-minute. The
+  prompt estimate is reserved up front and corrected with the reported usage.
+- Retry: Exponential backoff with jitter on 429 / 5xx instead of failing immediately.
+- Metrics: Queue depth, waits, retries and failures for monitoring.
+"""
+
+import os
+import time
+import random
+import threading
+from typing import Dict, Optional, Any
+
+from video_extraction.utils.rate_limit import TokenBucket
+from video_extraction.token_budget import estimate_tokens
+
+# --- Configuration ---
+GEMINI_RPM = float(os.environ.get("GEMINI_RPM", 60))
+GEMINI_TPM = float(os.environ.get("GEMINI_TPM", 1_000_000))
+GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", 5))
+GEMINI_BACKOFF_BASE = float(os.environ.get("GEMINI_BACKOFF_BASE", 1.0))
+GEMINI_BACKOFF_MAX = float(os.environ.get("GEMINI_BACKOFF_MAX", 30.0))
+# How long a call may wait in the limiter queue before giving up
+GEMINI_QUEUE_TIMEOUT = float(os.environ.get("GEMINI_QUEUE_TIMEOUT", 120.0))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+try:
+    from google import genai
+    GEMINI_AVAILABLE = True
+except ImportError:
+    GEMINI_AVAILABLE = False
+
+
+class GeminiRateLimitTimeout(Exception):
+    """Raised when a call waited longer than GEMINI_QUEUE_TIMEOUT for capacity"""
+
+
+class GeminiRateLimiter:
+    """Global requests-per-minute and tokens-per-minute limiter"""
+
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM):
+        self.requests = TokenBucket(rate=rpm / 60.0, capacity=rpm)
+        self.tokens = TokenBucket(rate=tpm / 60.0, capacity=tpm)
+
+    def acquire(self, estimated_tokens: int, timeout: Optional[float] = GEMINI_QUEUE_TIMEOUT):
+        if not self.requests.acquire(1, timeout=timeout):
+            raise GeminiRateLimitTimeout("Timed out waiting for Gemini request capacity")
+        if not self.tokens.acquire(estimated_tokens, timeout=timeout):
+            self.requests.release(1)
+            raise GeminiRateLimitTimeout("Timed out waiting for Gemini token capacity")
+
+    def settle(self, estimated_tokens: int, usage_metadata: Any):
+        """
+        Corrects the token bucket once the actual usage is known: acquire() only
+        reserved the estimated prompt, not the output (or a mis-estimated prompt)
+        """
+        actual = getattr(usage_metadata, "total_token_count", None)
+        if actual is None:
+            prompt = getattr(usage_metadata, "prompt_token_count", None)
+            output = getattr(usage_metadata, "candidates_token_count", None)
+            if prompt is None and output is None:
+                return
+            actual = (prompt or 0) + (output or 0)
+        difference = actual - estimated_tokens
+        if difference > 0:
+            self.tokens.debit(difference)
+        elif difference < 0:
+            self.tokens.release(-difference)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests.stats(), "tokens": self.tokens.stats()}
+
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+_limiter = GeminiRateLimiter()
+
+_metrics_lock = threading.Lock()
+_metrics = {"calls": 0, "retries": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def get_client(api_key: Optional[str] = None):
+    """Returns the shared client for this API key (created on first use), or None"""
+    api_key = api_key or os.environ.get("GEMINI_API_KEY")
+    if not GEMINI_AVAILABLE or not api_key:
+        return None
+
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def get_rate_limiter() -> GeminiRateLimiter:
+    return _limiter
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """Extracts an HTTP status from google-genai / httpx errors"""
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _track(key: str, amount: int = 1):
+    with _metrics_lock:
+        _metrics[key] += amount
+        if key == "in_flight":
+            _metrics["max_in_flight"] = max(_metrics["max_in_flight"], _metrics["in_flight"])
+
+
+def generate_content(client, model: str, contents: Any, config: Any = None, call_site: str = "default"):
+    """
+    Rate-limited `client.models.generate_content` with backoff on 429 / 5xx.
+    Non-retryable errors (and the last retryable one) are re-raised to the caller.
+    """
+    estimated_tokens = max(1, estimate_tokens(contents))
+    attempt = 0
+
+    while True:
+        _limiter.acquire(estimated_tokens)
+        _track("calls")
+        _track("in_flight")
+        try:
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+            _limiter.settle(estimated_tokens, getattr(response, "usage_metadata", None))
+            return response
+        except Exception as e:
+            status = _status_code(e)
+            if status not in RETRYABLE_STATUS_CODES or attempt >= GEMINI_MAX_RETRIES:
+                _track("failures")
+                raise
+
+            delay = min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * (2 ** attempt))
+            delay *= random.uniform(0.5, 1.0)
+            attempt += 1
+            _track("retries")
+            print(f"[!] Gemini {status} at {call_site}, retry {attempt}/{GEMINI_MAX_RETRIES} in {delay:.1f}s")
+        finally:
+            _track("in_flight", -1)
+
+        time.sleep(delay)
+
+
+def stats() -> Dict[str, Any]:
+    """Client pool, limiter queue depth and retry metrics"""
+    with _metrics_lock:
+        call_metrics = dict(_metrics)
+    with _clients_lock:
+        pooled_clients = len(_clients)
+    return {
+        "pooled_clients": pooled_clients,
+        "calls": call_metrics,
+        "limiter": _limiter.stats()
+    }
@@ -0,0 +1,95 @@
+"""
+Multi-Pattern Keyword Matcher
+Compiles every keyword of every lexicon into ONE word-boundary regex, so a whole
+batch of comments is classified in a single scan instead of
+O(comments x keywords) substring checks.
+
+Lexicons are loaded from JSON ({"category": ["keyword", ...]}); the default file is
+lexicons/comment_lexicons.json and can be replaced with COMMENT_LEXICON_PATH.
+"""
+
+import os
+import re
+import json
+import bisect
+from typing import Dict, List, Set, Iterable
+
+DEFAULT_LEXICON_PATH = os.environ.get(
+    "COMMENT_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "comment_lexicons.json"))
+
+
+class KeywordMatcher:
+    """Maps text to the set of lexicon categories whose keywords it contains"""
+
+    def __init__(self, lexicons: Dict[str, List[str]]):
+        keyword_categories: Dict[str, Set[str]] = {}
+        for category, keywords in lexicons.items():
+            for keyword in keywords:
+                keyword = " ".join(keyword.lower().split())
+                if keyword:
+                    keyword_categories.setdefault(keyword, set()).add(category)
+
+        # Matches don't overlap, so a long keyword ("love it") also carries the
+        # categories of the shorter keywords it contains ("love")
+        self.categories: Dict[str, Set[str]] = {}
+        for keyword, cats in keyword_categories.items():
+            merged = set(cats)
+            for other, other_cats in keyword_categories.items():
+                if other != keyword and re.search(rf"\b{re.escape(other)}\b", keyword):
+                    merged |= other_cats
+            self.categories[keyword] = merged
+
+        # Longest first so the alternation prefers the most specific keyword
+        alternation = "|".join(r"[ \t]+".join(re.escape(w) for w in k.split())
+                               for k in sorted(self.categories, key=len, reverse=True))
+        self.pattern = re.compile(rf"\b(?:{alternation})\b") if alternation else None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_LEXICON_PATH) -> "KeywordMatcher":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _categories_of(self, match: str) -> Set[str]:
+        return self.categories.get(" ".join(match.split()), set())
+
+    def match(self, text: str) -> Set[str]:
+        """Categories present in one text"""
+        found: Set[str] = set()
+        if self.pattern is None:
+            return found
+        for m in self.pattern.finditer(text.lower()):
+            found |= self._categories_of(m.group(0))
+        return found
+
+    def classify_batch(self, texts: Iterable[str]) -> List[Set[str]]:
+        """Categories for each text, computed with one regex pass over the whole batch"""
+        texts = list(texts)
+        results: List[Set[str]] = [set() for _ in texts]
+        if self.pattern is None or not texts:
+            return results
+
+        # Join with a separator that can't be part of a match, remembering where each text starts
+        lowered = [t.lower().replace("\n", " ") for t in texts]
+        starts = []
+        pos = 0
+        for t in lowered:
+            starts.append(pos)
+            pos += len(t) + 1
+        buffer = "\n".join(lowered)
+
+        for m in self.pattern.finditer(buffer):
+            idx = bisect.bisect_right(starts, m.start()) - 1
+            results[idx] |= self._categories_of(m.group(0))
+        return results
+
+
+_default_matcher = None
+
+
+def get_default_matcher() -> KeywordMatcher:
+    """Process-wide matcher compiled from DEFAULT_LEXICON_PATH"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = KeywordMatcher.from_file(DEFAULT_LEXICON_PATH)
+    return _default_matcher
@@ -0,0 +1,145 @@
+"""
+Media Bias Table
+Rates evidence sources locally by domain, so bias_distribution and the typing of
+alternative_perspectives are deterministic and cost no Gemini tokens.
+
+Method:
+- Ratings come from lexicons/media_bias.json (MEDIA_BIAS_PATH), keyed by
+  registrable domain ("bbc.co.uk") or a more specific host ("abcnews.go.com").
+- A URL's host is looked up from the most specific suffix down to the registrable
+  domain: at most a few dict probes per URL.
+- Unrated domains may still get a category from their public suffix (.gov, .edu).
+- Ratings: left, lean_left, center, lean_right, right; counted as left/center/right.
+"""
+
+import os
+import json
+from urllib.parse import urlparse
+from typing import Dict, List, Any, Optional
+
+DEFAULT_TABLE_PATH = os.environ.get(
+    "MEDIA_BIAS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "media_bias.json"))
+
+# --- Configuration ---
+MAX_PERSPECTIVES = 6
+DESCRIPTION_CHARS = 200
+
+BIAS_BUCKETS = {"left": "left", "lean_left": "left", "center": "center",
+                "lean_right": "right", "right": "right"}
+BIAS_LABELS = {"left": "Left", "lean_left": "Lean Left", "center": "Center",
+               "lean_right": "Lean Right", "right": "Right"}
+
+
+def hostname(url: str) -> str:
+    """Lowercased host of a URL (also accepts bare domains), without "www." """
+    url = (url or "").strip()
+    if "://" not in url:
+        url = "//" + url
+    host = (urlparse(url).hostname or "").rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+class MediaBiasTable:
+    """Domain -> {"name", "bias", "category"} with public-suffix aware lookups"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.sources = {k.lower(): v for k, v in data.get("sources", {}).items()}
+        self.multi_part_suffixes = {s.lower() for s in data.get("multi_part_suffixes", [])}
+        self.suffix_categories = {k.lower(): v for k, v in data.get("suffix_categories", {}).items()}
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_TABLE_PATH) -> "MediaBiasTable":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def registrable_domain(self, url: str) -> str:
+        """"news.bbc.co.uk" -> "bbc.co.uk", "edition.cnn.com" -> "cnn.com" """
+        labels = hostname(url).split(".")
+        if len(labels) <= 2:
+            return ".".join(labels)
+        suffix_size = 2 if ".".join(labels[-2:]) in self.multi_part_suffixes else 1
+        return ".".join(labels[-(suffix_size + 1):])
+
+    def rate(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        {"domain", "name", "bias", "category"} for a URL, or None if nothing is known.
+        "domain" is the table key that matched (a host entry like "abcnews.go.com" wins).
+        """
+        host = hostname(url)
+        if not host:
+            return None
+        domain = self.registrable_domain(host)
+        labels = host.split(".")
+
+        # Most specific host first, down to the registrable domain
+        for i in range(len(labels) - len(domain.split(".")) + 1):
+            key = ".".join(labels[i:])
+            entry = self.sources.get(key)
+            if entry:
+                return {"domain": key, "name": entry.get("name", key),
+                        "bias": entry.get("bias"), "category": entry.get("category")}
+
+        suffix = domain.split(".", 1)[1] if "." in domain else domain
+        category = self.suffix_categories.get(suffix) or self.suffix_categories.get(suffix.rsplit(".", 1)[-1])
+        if category:
+            return {"domain": domain, "name": domain, "bias": None, "category": category}
+        return None
+
+    def bias_distribution(self, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Left/center/right counts over the distinct rated domains in search results"""
+        buckets: Dict[str, str] = {}
+        for result in results:
+            rating = self.rate(result.get("url") or result.get("source") or "")
+            if rating and rating["bias"] in BIAS_BUCKETS:
+                buckets[rating["domain"]] = BIAS_BUCKETS[rating["bias"]]
+        counts = {"left_count": 0, "center_count": 0, "right_count": 0}
+        for bucket in buckets.values():
+            counts[f"{bucket}_count"] += 1
+        return counts
+
+    def perspectives(self, results: List[Dict[str, Any]], limit: int = MAX_PERSPECTIVES) -> List[Dict[str, Any]]:
+        """
+        One result per domain, typed by its rating. Rated sources come first, taken
+        round-robin across left / center / right so the list shows the spread.
+        """
+        by_bucket: Dict[str, List[Dict[str, Any]]] = {"left": [], "center": [], "right": [], "other": []}
+        seen = set()
+        for result in results:
+            url = result.get("url") or ""
+            rating = self.rate(url or result.get("source") or "")
+            domain = rating["domain"] if rating else hostname(url)
+            if not domain or domain in seen:
+                continue
+            seen.add(domain)
+
+            bias = rating["bias"] if rating else None
+            if bias in BIAS_LABELS:
+                perspective_type = f"{rating['category'] or 'News'} ({BIAS_LABELS[bias]})"
+            else:
+                perspective_type = (rating and rating["category"]) or "Unrated Source"
+            by_bucket[BIAS_BUCKETS.get(bias, "other")].append({
+                "source": rating["name"] if rating else (result.get("source") or domain),
+                "type": perspective_type,
+                "description": (result.get("title") or result.get("snippet") or "")[:DESCRIPTION_CHARS],
+                "url": url
+            })
+
+        ordered = []
+        rated = [by_bucket["left"], by_bucket["center"], by_bucket["right"]]
+        while any(rated) and len(ordered) < limit:
+            for bucket in rated:
+                if bucket and len(ordered) < limit:
+                    ordered.append(bucket.pop(0))
+        return ordered + by_bucket["other"][:limit - len(ordered)]
+
+
+_default_table = None
+
+
+def get_default_table() -> MediaBiasTable:
+    """Process-wide table loaded from DEFAULT_TABLE_PATH"""
+    global _default_table
+    if _default_table is None:
+        _default_table = MediaBiasTable.from_file(DEFAULT_TABLE_PATH)
+    return _default_table
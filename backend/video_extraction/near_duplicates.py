@@ -0,0 +1,192 @@
+"""
+Near-Duplicate Comment Detection (MinHash + LSH)
+Finds copy-paste campaigns where the same sentence is reposted with small edits.
+
+Method:
+- Shingling: byte 5-grams of the normalized text, built and hashed for all
+  comments at once with NumPy.
+- MinHash: NUM_PERM multiply-shift hash functions, computed over all shingles
+  in chunks and reduced per comment.
+- LSH Banding: BANDS x ROWS; comments sharing a band bucket are candidates and
+  are merged (union-find) when their estimated Jaccard similarity is high enough.
+
+Runs in roughly linear time in the number of comments. Signatures are stable
+across processes (fixed seed), so they can be stored and compared later.
+"""
+
+import re
+from typing import Dict, List, Any
+
+import numpy as np
+
+# --- Configuration ---
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SIMILARITY_THRESHOLD = 0.6
+MIN_CHARS = 20              # shorter comments ("lol", "first") are too generic to compare
+CHUNK_SHINGLES = 200_000    # bounds memory of the (perm x shingles) hash matrix
+
+_rng = np.random.default_rng(20260214)
+_A = _rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)   # odd multipliers
+_B = _rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(32)
+_EMPTY = np.iinfo(np.uint64).max
+
+_NON_WORD = re.compile(r"[^\w]+")
+_URL = re.compile(r"https?://\S+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop URLs and punctuation, collapse whitespace"""
+    text = _URL.sub(" ", (text or "").lower())
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def shingle_hashes(texts: List[str]):
+    """
+    Hashes of every byte 5-gram of every (normalized) text.
+    Returns (owners, hashes): owners[i] is the index of the text hashes[i] came from,
+    in ascending order. Texts shorter than SHINGLE_SIZE bytes produce no shingles.
+    """
+    encoded = [t.encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    if len(buffer) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+
+    # Pack each 5-byte window into one integer
+    n_windows = len(buffer) - SHINGLE_SIZE + 1
+    packed = np.zeros(n_windows, dtype=np.uint64)
+    for k in range(SHINGLE_SIZE):
+        packed |= buffer[k:k + n_windows] << np.uint64(8 * k)
+
+    # Keep only windows that lie entirely inside one text
+    byte_owner = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    inside = byte_owner[:n_windows] == byte_owner[SHINGLE_SIZE - 1:]
+    return byte_owner[:n_windows][inside], (packed[inside] * _MIX) >> _SHIFT
+
+
+def minhash_signatures(texts: List[str]) -> np.ndarray:
+    """(len(texts), NUM_PERM) signatures; rows of texts without shingles are all _EMPTY"""
+    signatures = np.full((len(texts), NUM_PERM), _EMPTY, dtype=np.uint64)
+
+    owners, values = shingle_hashes(texts)
+    if not len(values):
+        return signatures
+
+    for start in range(0, len(values), CHUNK_SHINGLES):
+        chunk = values[start:start + CHUNK_SHINGLES]
+        chunk_owners = owners[start:start + CHUNK_SHINGLES]
+        permuted = (_A[:, None] * chunk[None, :] + _B[:, None]) >> _SHIFT  # (perm, shingles)
+
+        # Owners are sorted, so each text's shingles form one contiguous run
+        run_starts = np.flatnonzero(np.r_[True, chunk_owners[1:] != chunk_owners[:-1]])
+        run_owners = chunk_owners[run_starts]
+        mins = np.minimum.reduceat(permuted, run_starts, axis=1).T    # (runs, perm)
+        signatures[run_owners] = np.minimum(signatures[run_owners], mins)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def band_keys(signatures: np.ndarray) -> List[np.ndarray]:
+    """One bucket key per (comment, band): a 64-bit digest of the band's rows"""
+    keys = []
+    for band in range(BANDS):
+        rows = signatures[:, band * ROWS:(band + 1) * ROWS]
+        # Cheap, deterministic mixing of the rows into one integer per comment
+        mixed = np.zeros(len(signatures), dtype=np.uint64)
+        for r in range(ROWS):
+            mixed = mixed * np.uint64(0x100000001B3) ^ rows[:, r]
+        keys.append(mixed)
+    return keys
+
+
+def cluster_signatures(signatures: np.ndarray, valid: np.ndarray,
+                       threshold: float = SIMILARITY_THRESHOLD, min_size: int = 2) -> List[List[int]]:
+    """Groups of valid indices whose signatures are near-duplicates (groups of at least min_size)"""
+    n = len(signatures)
+    uf = _UnionFind(n)
+    valid_idx = np.flatnonzero(valid)
+
+    for keys in band_keys(signatures[valid_idx]):
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bucket_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        bucket_ends = np.r_[bucket_starts[1:], len(order)]
+
+        # Verify every bucket member against its bucket head only (linear per bucket)
+        sizes = bucket_ends - bucket_starts
+        heads = np.repeat(bucket_starts, sizes)
+        positions = np.arange(len(order))
+        candidate = positions != heads
+        if not candidate.any():
+            continue
+
+        members = valid_idx[order[positions[candidate]]]
+        member_heads = valid_idx[order[heads[candidate]]]
+        similarity = (signatures[members] == signatures[member_heads]).mean(axis=1)
+        for head, member in zip(member_heads[similarity >= threshold], members[similarity >= threshold]):
+            uf.union(int(head), int(member))
+
+    groups: Dict[int, List[int]] = {}
+    for i in valid_idx:
+        groups.setdefault(uf.find(i), []).append(int(i))
+    return [g for g in groups.values() if len(g) >= min_size]
+
+
+def find_near_duplicates(texts: List[str], threshold: float = SIMILARITY_THRESHOLD,
+                         top_clusters: int = 5) -> Dict[str, Any]:
+    """
+    Clusters near-duplicate comments.
+    Returns counts plus the largest clusters with an example text each.
+    """
+    total = len(texts)
+
+    # Exact copies (after normalization) share one signature, so hash each distinct text once
+    occurrences: Dict[str, List[int]] = {}
+    for i, t in enumerate(texts):
+        occurrences.setdefault(normalize(t), []).append(i)
+    unique = [t for t in occurrences if len(t) >= MIN_CHARS]
+
+    if not unique:
+        return {"duplicate_ratio": 0.0, "duplicate_comments": 0, "cluster_count": 0,
+                "largest_cluster_size": 0, "clusters": []}
+
+    signatures = minhash_signatures(unique)
+    groups = cluster_signatures(signatures, np.ones(len(unique), dtype=bool), threshold, min_size=1)
+
+    clusters = []
+    for group in groups:
+        members = sorted(i for u in group for i in occurrences[unique[u]])
+        if len(members) > 1:
+            clusters.append(members)
+    clusters.sort(key=len, reverse=True)
+
+    duplicates = sum(len(c) for c in clusters)
+    return {
+        "duplicate_ratio": round(duplicates / total, 4),
+        "duplicate_comments": duplicates,
+        "cluster_count": len(clusters),
+        "largest_cluster_size": len(clusters[0]) if clusters else 0,
+        "clusters": [{"size": len(c), "example": texts[c[0]], "indices": c} for c in clusters[:top_clusters]]
+    }
@@ -0,0 +1,214 @@
+"""
+Transcript Search Index
+Incremental inverted index over processed transcripts and segment summaries,
+stored in Valkey and ranked with BM25.
+
+Layout:
+- search:term:<term>      sorted set  doc_id -> term frequency
+- search:doc_terms:<doc>  set         terms of a doc (so re-indexing can remove old postings)
+- search:doclen           hash        doc_id -> length in tokens
+- search:docs             hash        doc_id -> JSON metadata (video, segment, timestamps, topic)
+- search:video_docs:<id>  set         doc ids belonging to a video
+- search:stats            hash        doc_count, total_length
+
+Doc ids are "<video_id>:<segment_id>". Segment 0 is the full clean transcript,
+which is only indexed until the video's segments are: a video is searchable
+as soon as it is transcribed, and no passage is indexed (and returned) twice.
+Queries read at most MAX_POSTINGS_PER_TERM postings per term (highest tf first),
+so query cost stays flat as the number of indexed videos grows.
+"""
+
+import json
+import math
+import time
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+from valkey_rest import crud
+from video_extraction.utils.text import tokenize
+
+PREFIX = "search"
+DOCLEN_KEY = f"{PREFIX}:doclen"
+DOCS_KEY = f"{PREFIX}:docs"
+STATS_KEY = f"{PREFIX}:stats"
+
+MAX_POSTINGS_PER_TERM = 2000
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _term_key(term: str) -> str:
+    return f"{PREFIX}:term:{term}"
+
+
+def _video_key(video_id: str) -> str:
+    return f"{PREFIX}:video_docs:{video_id}"
+
+
+def _full_transcript_id(video_id: str) -> str:
+    return f"{video_id}:0"
+
+
+def _remove_doc(pipe, doc_id: str, old_terms: List[str], old_length: Optional[str]):
+    for term in old_terms:
+        pipe.zrem(_term_key(term), doc_id)
+    pipe.delete(f"{PREFIX}:doc_terms:{doc_id}")
+    pipe.hdel(DOCLEN_KEY, doc_id)
+    pipe.hdel(DOCS_KEY, doc_id)
+    if old_length is not None:
+        pipe.hincrby(STATS_KEY, "doc_count", -1)
+        pipe.hincrby(STATS_KEY, "total_length", -int(old_length))
+
+
+def _remove_docs(video_id: str, doc_ids: List[str]):
+    pipe = crud.valkey_pipeline()
+    for doc_id in doc_ids:
+        pipe.smembers(f"{PREFIX}:doc_terms:{doc_id}")
+    pipe.hmget(DOCLEN_KEY, doc_ids)
+    *old_terms, old_lengths = pipe.execute()
+
+    pipe = crud.valkey_pipeline()
+    for doc_id, terms, old_length in zip(doc_ids, old_terms, old_lengths):
+        _remove_doc(pipe, doc_id, list(terms), old_length)
+    pipe.srem(_video_key(video_id), *doc_ids)
+    pipe.execute()
+
+
+def index_documents(video_id: str, docs: List[Dict[str, Any]]):
+    """
+    Adds or replaces documents of one video.
+    Each doc: {"segment_id": int, "text": str, "timestamps": {...}, "topic": str}
+    """
+    if not docs:
+        return
+    doc_ids = [f"{video_id}:{d['segment_id']}" for d in docs]
+
+    # Fetch what is currently indexed for these docs (one round trip)
+    pipe = crud.valkey_pipeline()
+    for doc_id in doc_ids:
+        pipe.smembers(f"{PREFIX}:doc_terms:{doc_id}")
+    pipe.hmget(DOCLEN_KEY, doc_ids)
+    *old_terms, old_lengths = pipe.execute()
+
+    pipe = crud.valkey_pipeline()
+    for doc_id, doc, terms, old_length in zip(doc_ids, docs, old_terms, old_lengths):
+        _remove_doc(pipe, doc_id, list(terms), old_length)
+
+        tokens = tokenize(doc.get("text", ""))
+        if not tokens:
+            continue
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            pipe.zadd(_term_key(term), {doc_id: tf})
+        pipe.sadd(f"{PREFIX}:doc_terms:{doc_id}", *counts.keys())
+        pipe.hset(DOCLEN_KEY, doc_id, len(tokens))
+        pipe.hset(DOCS_KEY, doc_id, json.dumps({
+            "video_id": video_id,
+            "segment_id": doc["segment_id"],
+            "timestamps": doc.get("timestamps"),
+            "topic": doc.get("topic")
+        }, ensure_ascii=False))
+        pipe.sadd(_video_key(video_id), doc_id)
+        pipe.hincrby(STATS_KEY, "doc_count", 1)
+        pipe.hincrby(STATS_KEY, "total_length", len(tokens))
+    pipe.execute()
+
+
+def index_transcript(video_id: str, transcript: str):
+    """
+    Indexes the full clean transcript of a video as segment 0, unless its
+    segments are already indexed (they cover the same text)
+    """
+    if crud.valkey_smembers(_video_key(video_id)) - {_full_transcript_id(video_id)}:
+        return
+    index_documents(video_id, [{
+        "segment_id": 0,
+        "text": transcript,
+        "timestamps": None,
+        "topic": "Full transcript"
+    }])
+
+
+def index_segments(video_id: str, segments: List[Dict[str, Any]], segment_texts: Dict[int, str]):
+    """Indexes segment summaries (plus the segment's transcript text) from TranscriptSegmenter"""
+    docs = []
+    for seg in segments:
+        analysis = seg.get("analysis", {})
+        parts = [analysis.get("topic", ""), analysis.get("summary", "")]
+        parts += analysis.get("key_points", []) + analysis.get("entities_mentioned", [])
+        parts.append(segment_texts.get(seg["segment_id"], ""))
+        docs.append({
+            "segment_id": seg["segment_id"],
+            "text": " ".join(p for p in parts if p),
+            "timestamps": seg.get("timestamps"),
+            "topic": analysis.get("topic")
+        })
+    index_documents(video_id, docs)
+
+    # The segments replace the full transcript document
+    if docs:
+        _remove_docs(video_id, [_full_transcript_id(video_id)])
+
+
+def remove_video(video_id: str):
+    """Drops every indexed document of a video"""
+    doc_ids = list(crud.valkey_smembers(_video_key(video_id)))
+    if doc_ids:
+        _remove_docs(video_id, doc_ids)
+
+
+def search(query: str, limit: int = 10) -> Dict[str, Any]:
+    """BM25-ranked segments matching the query"""
+    started = time.perf_counter()
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return {"query": query, "results": [], "took_ms": 0.0}
+
+    # 1. Collection stats, document frequencies and top postings per term
+    pipe = crud.valkey_pipeline()
+    pipe.hgetall(STATS_KEY)
+    for term in terms:
+        pipe.zcard(_term_key(term))
+        pipe.zrevrange(_term_key(term), 0, MAX_POSTINGS_PER_TERM - 1, withscores=True)
+    stats, *term_data = pipe.execute()
+
+    doc_count = int(stats.get("doc_count", 0)) or 1
+    avg_length = int(stats.get("total_length", 0)) / doc_count or 1.0
+
+    postings = {}
+    for i, term in enumerate(terms):
+        df, entries = term_data[2 * i], term_data[2 * i + 1]
+        if df:
+            postings[term] = (df, entries)
+
+    candidates = {doc_id for _, entries in postings.values() for doc_id, _ in entries}
+    if not candidates:
+        return {"query": query, "results": [], "took_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    # 2. Document lengths for the candidates, then BM25
+    candidate_ids = list(candidates)
+    lengths = dict(zip(candidate_ids, crud.valkey_hmget(DOCLEN_KEY, candidate_ids)))
+
+    scores = Counter()
+    for df, entries in postings.values():
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for doc_id, tf in entries:
+            length = int(lengths.get(doc_id) or avg_length)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[doc_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    # 3. Metadata for the top hits
+    top = scores.most_common(limit)
+    metadata = crud.valkey_hmget(DOCS_KEY, [doc_id for doc_id, _ in top])
+
+    results = []
+    for (doc_id, score), meta in zip(top, metadata):
+        entry = json.loads(meta) if meta else {"video_id": doc_id.rsplit(":", 1)[0]}
+        entry["score"] = round(score, 4)
+        results.append(entry)
+
+    return {
+        "query": query,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
@@ -0,0 +1,166 @@
+"""
+Local Sentiment Classifier
+Lexicon-based (VADER-style) sentiment scoring that runs on the CPU for every
+comment, so only the ambiguous ones have to go to Gemini.
+
+Scoring:
+- Word and emoji valences from lexicons/sentiment_lexicon.json (SENTIMENT_LEXICON_PATH)
+- Boosters ("very", "kinda") scale the next word; a negation within 3 words flips it
+- Words after a contrast word ("but") weigh 1.5x, words before it 0.5x
+- ALL-CAPS words and "!" add emphasis
+- compound = sum / sqrt(sum^2 + ALPHA), in [-1, 1]
+
+Tokens of the whole batch are laid out in flat NumPy arrays, so every rule is a
+vectorized operation. Comments that are weak, mixed or carry sarcasm cues are
+flagged with needs_review.
+"""
+
+import os
+import re
+import json
+from typing import Dict, Any, Iterable
+
+import numpy as np
+
+DEFAULT_LEXICON_PATH = os.environ.get(
+    "SENTIMENT_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "sentiment_lexicon.json"))
+
+# --- Configuration ---
+LABEL_THRESHOLD = 0.05      # |compound| needed for positive / negative
+REVIEW_THRESHOLD = 0.3      # sentiment words present but |compound| below this -> ambiguous
+MIXED_MASS = 1.5            # strong positive AND negative words -> ambiguous
+NEGATION_WINDOW = 3
+NEGATION_SCALAR = -0.74
+CAPS_INCREMENT = 0.733
+EXCLAMATION_INCREMENT = 0.292
+MAX_EXCLAMATIONS = 4
+ALPHA = 15
+
+LABELS = ("positive", "negative", "neutral")
+TOKEN_PATTERN = re.compile(r"[A-Za-z][A-Za-z']*|[\U0001F300-\U0001FAFF\u2600-\u27BF]\ufe0f?|!")
+
+
+def _shift(values: np.ndarray, k: int, fill) -> np.ndarray:
+    """values moved k positions to the right (out[i] = values[i - k])"""
+    out = np.full(len(values), fill, dtype=values.dtype)
+    if k < len(values):
+        out[k:] = values[:-k]
+    return out
+
+
+def count_labels(labels: Iterable[str]) -> Dict[str, int]:
+    counts = {label: 0 for label in LABELS}
+    for label in labels:
+        counts[label] += 1
+    return counts
+
+
+class SentimentClassifier:
+    """Vectorized lexicon sentiment for batches of short texts"""
+
+    def __init__(self, lexicon: Dict[str, Any]):
+        self.valences = {k.lower(): float(v) for k, v in lexicon.get("words", {}).items()}
+        self.boosters = {k.lower(): float(v) for k, v in lexicon.get("boosters", {}).items()}
+        self.negations = {w.lower() for w in lexicon.get("negations", [])}
+        self.contrast = {w.lower() for w in lexicon.get("contrast", [])}
+
+        cues = sorted({c.lower() for c in lexicon.get("sarcasm_cues", [])}, key=len, reverse=True)
+        self.sarcasm = re.compile(
+            r"(?<!\w)(?:" + "|".join(re.escape(c) for c in cues) + r")(?!\w)") if cues else None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_LEXICON_PATH) -> "SentimentClassifier":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def classify_batch(self, texts: Iterable[str]) -> Dict[str, Any]:
+        """
+        Returns {"labels": [str], "compound": ndarray, "needs_review": ndarray(bool),
+        "sarcasm": ndarray(bool)}, one entry per text.
+        """
+        texts = [t or "" for t in texts]
+        n = len(texts)
+
+        # 1. Flatten the tokens of every text into parallel lists
+        owners, valence, booster, negation, contrast, caps = [], [], [], [], [], []
+        exclamations = np.zeros(n)
+        for i, text in enumerate(texts):
+            for token in TOKEN_PATTERN.findall(text):
+                if token == "!":
+                    exclamations[i] += 1
+                    continue
+                low = token.lower()
+                owners.append(i)
+                valence.append(self.valences.get(low, 0.0))
+                booster.append(self.boosters.get(low, 0.0))
+                negation.append(low in self.negations)
+                contrast.append(low in self.contrast)
+                caps.append(len(token) > 1 and token.isupper())
+
+        total = np.zeros(n)
+        pos_mass = np.zeros(n)
+        neg_mass = np.zeros(n)
+        sentiment_words = np.zeros(n)
+
+        if owners:
+            owner = np.asarray(owners, dtype=np.int64)
+            val = np.asarray(valence)
+            sign = np.sign(val)
+
+            # 2. Emphasis: caps and the booster right before a word (same text only)
+            val = val + sign * CAPS_INCREMENT * np.asarray(caps)
+            same_prev = _shift(owner, 1, -1) == owner
+            val = val + sign * _shift(np.asarray(booster), 1, 0.0) * same_prev
+
+            # 3. Negation within the previous NEGATION_WINDOW words
+            neg = np.asarray(negation, dtype=bool)
+            negated = np.zeros(len(val), dtype=bool)
+            for k in range(1, NEGATION_WINDOW + 1):
+                negated |= _shift(neg, k, False) & (_shift(owner, k, -1) == owner)
+            val = np.where(negated, val * NEGATION_SCALAR, val)
+
+            # 4. Contrast: the part after the first "but" dominates
+            position = np.arange(len(val))
+            is_contrast = np.asarray(contrast, dtype=bool)
+            no_contrast = np.iinfo(np.int64).max
+            first_contrast = np.full(n, no_contrast, dtype=np.int64)
+            np.minimum.at(first_contrast, owner[is_contrast], position[is_contrast])
+            pivot = first_contrast[owner]
+            weight = np.where(pivot == no_contrast, 1.0,
+                              np.where(position < pivot, 0.5, np.where(position > pivot, 1.5, 1.0)))
+            val = val * weight
+
+            # 5. Per-text sums
+            total = np.bincount(owner, weights=val, minlength=n)
+            pos_mass = np.bincount(owner, weights=np.clip(val, 0, None), minlength=n)
+            neg_mass = np.bincount(owner, weights=np.clip(-val, 0, None), minlength=n)
+            sentiment_words = np.bincount(owner, weights=(val != 0).astype(float), minlength=n)
+
+        total = total + np.sign(total) * np.minimum(exclamations, MAX_EXCLAMATIONS) * EXCLAMATION_INCREMENT
+        compound = total / np.sqrt(total * total + ALPHA)
+
+        labels = np.where(compound >= LABEL_THRESHOLD, "positive",
+                          np.where(compound <= -LABEL_THRESHOLD, "negative", "neutral"))
+
+        sarcasm = np.array([bool(self.sarcasm and self.sarcasm.search(t.lower())) for t in texts], dtype=bool)
+        mixed = (pos_mass >= MIXED_MASS) & (neg_mass >= MIXED_MASS)
+        weak = (sentiment_words > 0) & (np.abs(compound) < REVIEW_THRESHOLD)
+
+        return {
+            "labels": labels.tolist(),
+            "compound": compound,
+            "needs_review": sarcasm | mixed | weak,
+            "sarcasm": sarcasm
+        }
+
+
+_default_classifier = None
+
+
+def get_default_classifier() -> SentimentClassifier:
+    """Process-wide classifier loaded from DEFAULT_LEXICON_PATH"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = SentimentClassifier.from_file(DEFAULT_LEXICON_PATH)
+    return _default_classifier
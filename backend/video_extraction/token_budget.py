@@ -0,0 +1,222 @@
+"""
+Token Accounting & Budgets
+Estimates prompt sizes before each Gemini call, trims inputs to fit a per-video
+and per-stage budget, and records the actual usage reported by Gemini.
+
+Usage is persisted per video in the Valkey hash "VIDEO_ID_token_usage.hash" (one
+"stage:metric" field per counter, updated with HINCRBY), so the budget is shared by
+the segmenter, comment analyzer and fact checker even though they run in separate
+requests, and concurrent instances add to each other's counts instead of
+overwriting them. Usage expires after TOKEN_USAGE_TTL.
+"""
+
+import os
+import math
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable
+
+from valkey_rest import crud
+
+# --- Configuration ---
+CHARS_PER_TOKEN = 4
+VIDEO_TOKEN_BUDGET = int(os.environ.get("VIDEO_TOKEN_BUDGET", 400_000))
+
+# Total tokens (prompt + output) a stage may spend on one video
+STAGE_BUDGETS = {
+    "segment_summary": int(os.environ.get("SEGMENT_SUMMARY_TOKEN_BUDGET", 250_000)),
+    # Explicit re-summarization of segments (retry_failed_segments) on top of the first pass
+    "segment_retry": int(os.environ.get("SEGMENT_RETRY_TOKEN_BUDGET", 50_000)),
+    "comment_analysis": int(os.environ.get("COMMENT_ANALYSIS_TOKEN_BUDGET", 60_000)),
+    "claim_extraction": int(os.environ.get("CLAIM_EXTRACTION_TOKEN_BUDGET", 30_000)),
+    "claim_verification": int(os.environ.get("CLAIM_VERIFICATION_TOKEN_BUDGET", 60_000)),
+}
+
+# Largest prompt a single call of a stage may send
+PER_CALL_PROMPT_LIMITS = {
+    "segment_summary": 4_000,
+    "segment_retry": 4_000,
+    "comment_analysis": 16_000,
+    "claim_extraction": 12_000,
+    "claim_verification": 24_000,
+}
+
+# Tokens held back per call for the model's response
+OUTPUT_RESERVE = 1_000
+
+# Recorded usage is forgotten after this long, so the budget eventually renews
+TOKEN_USAGE_TTL = int(os.environ.get("TOKEN_USAGE_TTL", 7 * 24 * 3600))
+
+USAGE_FIELDS = ("calls", "cached_calls", "prompt_tokens", "output_tokens",
+                "total_tokens", "estimated_prompt_tokens")
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a stage has no budget left for another call"""
+
+
+def estimate_tokens(text: Any) -> int:
+    """Cheap token estimate (~4 characters per token for English text / JSON)"""
+    if not text:
+        return 0
+    return math.ceil(len(str(text)) / CHARS_PER_TOKEN)
+
+
+def fit_text(text: str, max_tokens: int) -> str:
+    """Truncates text so it fits in roughly max_tokens"""
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    # Cut on a word boundary where possible
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars]
+
+
+def fit_items(items: List[Any], render: Callable[[Any], str], max_tokens: int) -> List[Any]:
+    """Keeps items (in order) while their rendered size stays within max_tokens"""
+    kept = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(render(item))
+        if used + cost > max_tokens:
+            break
+        kept.append(item)
+        used += cost
+    return kept
+
+
+def usage_key(video_id: str) -> str:
+    return f"{video_id}_token_usage.hash"
+
+
+def load_usage(video_id: str) -> Dict[str, Dict[str, int]]:
+    """Usage recorded for a video, per stage"""
+    usage: Dict[str, Dict[str, int]] = {}
+    for field, value in crud.valkey_hgetall(usage_key(video_id)).items():
+        stage, _, metric = field.rpartition(":")
+        if stage and metric in USAGE_FIELDS:
+            usage.setdefault(stage, dict.fromkeys(USAGE_FIELDS, 0))[metric] = int(value)
+    return usage
+
+
+def _add_usage(target: Dict[str, Dict[str, int]], stage: str, counts: Dict[str, int]):
+    entry = target.setdefault(stage, dict.fromkeys(USAGE_FIELDS, 0))
+    for metric, amount in counts.items():
+        entry[metric] += amount
+
+
+class TokenBudget:
+    """Per-video token budget split into stages, with actual usage recording"""
+
+    def __init__(self, video_id: Optional[str], total: int = VIDEO_TOKEN_BUDGET,
+                 stages: Optional[Dict[str, int]] = None):
+        self.video_id = video_id
+        self.total = total
+        self.stage_limits = dict(STAGE_BUDGETS, **(stages or {}))
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self._unsaved: Dict[str, Dict[str, int]] = {}     # recorded here, not yet added in Valkey
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_video(cls, video_id: Optional[str], **kwargs) -> "TokenBudget":
+        """Budget that continues from the usage already recorded for this video"""
+        budget = cls(video_id, **kwargs)
+        if video_id:
+            try:
+                budget.usage = load_usage(video_id)
+            except Exception as e:
+                print(f"[!] Could not load token usage for {video_id}: {e}")
+        return budget
+
+    def spent(self, stage: Optional[str] = None) -> int:
+        with self._lock:
+            if stage is not None:
+                return self.usage.get(stage, {}).get("total_tokens", 0)
+            return sum(s.get("total_tokens", 0) for s in self.usage.values())
+
+    def remaining(self, stage: str) -> int:
+        """Tokens (prompt + output) the stage may still spend on this video"""
+        stage_left = self.stage_limits.get(stage, self.total) - self.spent(stage)
+        return max(0, min(stage_left, self.total - self.spent()))
+
+    def prompt_allowance(self, stage: str) -> int:
+        """Largest prompt the next call of `stage` may send, in tokens"""
+        stage_left = self.stage_limits.get(stage, self.total) - self.spent(stage)
+        video_left = self.total - self.spent()
+        per_call = PER_CALL_PROMPT_LIMITS.get(stage, self.total)
+        remaining = min(stage_left, video_left) - OUTPUT_RESERVE
+        return max(0, min(per_call, remaining))
+
+    def require(self, stage: str, min_tokens: int = 256) -> int:
+        """Like prompt_allowance(), but raises TokenBudgetExceeded if the call can't fit"""
+        allowance = self.prompt_allowance(stage)
+        if allowance < min_tokens:
+            raise TokenBudgetExceeded(
+                f"Token budget exhausted for '{stage}' on video {self.video_id} "
+                f"(spent {self.spent(stage)} / {self.stage_limits.get(stage, self.total)})")
+        return allowance
+
+    def record(self, stage: str, usage_metadata: Any = None, estimated_prompt_tokens: int = 0,
+               cached: bool = False):
+        """Adds one call's usage. Falls back to the estimate if Gemini reported no metadata."""
+        prompt_tokens = getattr(usage_metadata, "prompt_token_count", None)
+        output_tokens = getattr(usage_metadata, "candidates_token_count", None)
+        total_tokens = getattr(usage_metadata, "total_token_count", None)
+
+        if cached:
+            prompt_tokens = output_tokens = total_tokens = 0
+        elif prompt_tokens is None:
+            prompt_tokens = estimated_prompt_tokens
+        output_tokens = output_tokens or 0
+        total_tokens = total_tokens or (prompt_tokens + output_tokens)
+
+        counts = {"calls": 1, "cached_calls": int(cached), "prompt_tokens": prompt_tokens,
+                  "output_tokens": output_tokens, "total_tokens": total_tokens,
+                  "estimated_prompt_tokens": estimated_prompt_tokens}
+        with self._lock:
+            _add_usage(self.usage, stage, counts)
+            _add_usage(self._unsaved, stage, counts)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {k: dict(v) for k, v in self.usage.items()}
+        return {
+            "video_id": self.video_id,
+            "updated_at": datetime.now().isoformat(),
+            "budget": {"total": self.total, "stages": self.stage_limits},
+            "total_tokens": sum(s["total_tokens"] for s in stages.values()),
+            "stages": stages
+        }
+
+    def save(self):
+        """
+        Adds the usage recorded since the last save to the Valkey hash (HINCRBY), then
+        picks up what other instances recorded for the video in the meantime.
+        """
+        if not self.video_id:
+            return
+        key = usage_key(self.video_id)
+        with self._lock:
+            deltas, self._unsaved = self._unsaved, {}
+        try:
+            pipe = crud.valkey_pipeline()
+            for stage, counts in deltas.items():
+                for metric, amount in counts.items():
+                    if amount:
+                        pipe.hincrby(key, f"{stage}:{metric}", amount)
+            pipe.expire(key, TOKEN_USAGE_TTL)
+            pipe.execute()
+            stored = load_usage(self.video_id)
+        except Exception as e:
+            print(f"[!] Could not save token usage for {self.video_id}: {e}")
+            with self._lock:
+                for stage, counts in deltas.items():
+                    _add_usage(self._unsaved, stage, counts)
+            return
+
+        with self._lock:
+            for stage, counts in self._unsaved.items():
+                _add_usage(stored, stage, counts)
+            self.usage = stored
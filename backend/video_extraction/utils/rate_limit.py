@@ -0,0 +1,98 @@
+import time
+import threading
+from typing import Dict, Optional, Any
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Refills at `rate` tokens per second up to `capacity`; acquire() blocks until
+    enough tokens are available (or the timeout expires).
+    A rate of 0 (or below) means unlimited: acquire() never waits.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.unlimited = rate <= 0
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._cond = threading.Condition()
+
+        # Metrics
+        self.waiting = 0
+        self.max_waiting = 0
+        self.total_waits = 0
+        self.total_wait_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, amount: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Takes `amount` tokens, waiting if needed. Returns False on timeout."""
+        if self.unlimited:
+            return True
+        # A request larger than the bucket could never be served, so cap it
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        started = time.monotonic()
+
+        with self._cond:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True
+
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            self.total_waits += 1
+            try:
+                while True:
+                    self._refill()
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return True
+
+                    wait_for = (amount - self.tokens) / self.rate
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait_for = min(wait_for, remaining)
+                    self._cond.wait(wait_for)
+            finally:
+                self.waiting -= 1
+                self.total_wait_seconds += time.monotonic() - started
+
+    def release(self, amount: float):
+        """Gives back tokens that were reserved but not used (e.g. over-estimates)."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+            self._cond.notify_all()
+
+    def debit(self, amount: float):
+        """
+        Takes tokens that were used but not reserved (e.g. under-estimates) without
+        waiting. The balance may go negative; later acquire() calls wait it off.
+        """
+        if self.unlimited:
+            return
+        with self._cond:
+            self._refill()
+            self.tokens -= amount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._refill()
+            return {
+                "unlimited": self.unlimited,
+                "available": round(self.tokens, 2),
+                "capacity": self.capacity,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "total_waits": self.total_waits,
+                "total_wait_seconds": round(self.total_wait_seconds, 3)
+            }
@@ -0,0 +1,47 @@
+import re
+from typing import List
+
+# Common English function words (plus caption filler) ignored for scoring and indexing
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are aren't as at be because been before
+being below between both but by can can't cannot could couldn't did didn't do does doesn't doing
+don't down during each few for from further get got had hadn't has hasn't have haven't having he
+he'd he'll he's her here here's hers herself him himself his how how's i i'd i'll i'm i've if in
+into is isn't it it's its itself just let's like me more most mustn't my myself no nor not now of
+off on once only or other ought our ours ourselves out over own really same shan't she she'd
+she'll she's should shouldn't so some such than that that's the their theirs them themselves then
+there there's these they they'd they'll they're they've this those through to too under until up
+us very was wasn't we we'd we'll we're we've were weren't what what's when when's where where's
+which while who who's whom why why's will with won't would wouldn't you you'd you'll you're you've
+your yours yourself yourselves um uh yeah okay oh gonna wanna going know think right well one
+say says said just
+""".split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'%.]*[a-z0-9%]|[a-z0-9]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercased word tokens (keeps numbers like 9.1% intact)"""
+    tokens = WORD_PATTERN.findall(text.lower())
+    if drop_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS and len(t) > 1]
+    return tokens
+
+
+def split_sentences(text: str, max_words: int = 40, window_words: int = 20) -> List[str]:
+    """
+    Splits text into sentences. Auto-generated captions often have no punctuation,
+    so overly long "sentences" are cut into fixed windows of words instead.
+    """
+    sentences = []
+    for sentence in SENTENCE_PATTERN.split(text.strip()):
+        words = sentence.split()
+        if not words:
+            continue
+        if len(words) <= max_words:
+            sentences.append(sentence.strip())
+        else:
+            for i in range(0, len(words), window_words):
+                sentences.append(" ".join(words[i:i + window_words]))
+    return sentences
@@ -3,6 +3,18 @@ import os
 import json
 
 import valkey_rest
+from video_extraction import author_index
+from video_extraction.comment_store import CommentColumns, store_comments
+
+# Full comment sections are kept in the columnar store; summary.json only
+# carries the top-liked threads for backwards compatibility.
+MAX_COMMENTS = int(os.environ.get("MAX_COMMENTS", 20000))
+SUMMARY_ROOT_COMMENTS = 250
+
+# Incremental refresh: newest comments fetched per refresh, and how far before the
+# high-water mark a comment may be dated (yt-dlp timestamps are approximate, e.g. "2 days ago")
+REFRESH_MAX_COMMENTS = int(os.environ.get("REFRESH_MAX_COMMENTS", 2000))
+REFRESH_TIMESTAMP_SLACK = 2 * 24 * 3600
 
 def download_and_extract(video_url):
     # 1. Setup specific folder
@@ -40,7 +52,7 @@ def download_and_extract(video_url):
         
         # --- Comments ---
         'getcomments': True,
-        'extractor_args': {'youtube': {'max_comments': ['250','all','all','all']}},
+        'extractor_args': {'youtube': {'max_comments': [str(MAX_COMMENTS),'all','all','all']}},
         
         # --- Clean Up ---
         'quiet': False, 
@@ -80,42 +92,24 @@ def download_and_extract(video_url):
                     })
 
             # Process Comments 
-            if info.get('comments'):
-                raw_comments = info.get('comments')
-                comment_map = {}
-                root_comments = []
-
-                # 1. First Pass: Create a dictionary of all comments
-                for c in raw_comments:
-                    comment_id = c.get('id')
-                    comment_obj = {
-                        "id": comment_id,
-                        "author": c.get('author'),
-                        "text": c.get('text'),
-                        "likes": c.get('like_count') or 0, # Handle None values
-                        "replies": [] # Prepare a slot for nested replies
-                    }
-                    comment_map[comment_id] = comment_obj
-
-                # 2. Second Pass: Link replies to their parents
-                for c in raw_comments:
-                    current_id = c.get('id')
-                    parent_id = c.get('parent')
-                    
-                    # If it is a top-level comment
-                    if parent_id == 'root':
-                        root_comments.append(comment_map[current_id])
-                    # If it is a reply, and we found its parent
-                    elif parent_id in comment_map:
-                        comment_map[parent_id]['replies'].append(comment_map[current_id])
-
-                # 3. Sort root comments by likes (highest first)
-                root_comments.sort(key=lambda x: x['likes'], reverse=True)
-                
-                # Save the structured tree
-                simple_data['comments'] = root_comments
-            else:
-                simple_data['comments'] = []
+            # 1. Build the columnar table of the whole comment section
+            columns = CommentColumns.from_raw(info.get('comments') or [])
+
+            # 2. Save it next to the video and in Valkey
+            columns.save(f"{output_path}/{video_id}/{video_id}_comments.bin")
+            # CRUD PUT 7. Save the full comment table to Valkey with the key "VIDEO_ID_comments.col"
+            store_comments(video_id, columns)
+
+            # Record the commenters in the cross-video author index (bot fan-out detection)
+            try:
+                author_index.index_comments(video_id, [columns.author_key(i) for i in range(len(columns))],
+                                            columns.texts())
+            except Exception as e:
+                print(f"[!] Author indexing failed for {video_id}: {e}")
+
+            # 3. Keep the top-liked threads (replies nested) in the summary
+            simple_data['comments'] = columns.to_tree(limit_roots=SUMMARY_ROOT_COMMENTS)
+            simple_data['comments_total'] = len(columns)
 
             # C. Save the Simple Data to a clean JSON file
             # We save this as 'VIDEO_ID_summary.json' inside the folder
@@ -125,7 +119,7 @@ def download_and_extract(video_url):
                 json.dump(simple_data, f, indent=4, ensure_ascii=False)
 
             # CRUD PUT 1. Save the summary JSON data to Valkey with the key "VIDEO_ID_summary.json"
-            valkey_rest.crud.valkey_set(video_id + "_summary.json", json.dumps(simple_data, indent=4, ensure_ascii=False))
+            valkey_rest.crud.valkey_set(video_id + "_summary.json", json.dumps(simple_data, separators=(',', ':'), ensure_ascii=False))
 
             print("\n" + "="*30)
             print("ANALYSIS READY")
@@ -135,6 +129,7 @@ def download_and_extract(video_url):
             print(f"2. Audio: {video_id}.mp3")
             print(f"3. Metadata: {video_id}_summary.json")
             print(f"4. Subs: {video_id}.en.vtt")
+            print(f"5. Comments: {video_id}_comments.bin ({len(columns)} comments)")
             
             vtt_file_path = f"{output_path}/{video_id}/{video_id}.en.vtt"
 
@@ -153,6 +148,33 @@ def download_and_extract(video_url):
     except Exception as e:
         print(f"An error occurred: {e}")
 
+def fetch_new_comments(video_id, since_timestamp=0, known_ids=(), max_comments=REFRESH_MAX_COMMENTS):
+    """
+    Fetches only the newest comments of a video (no media download) and returns the ones
+    that aren't in known_ids and aren't older than the high-water mark.
+    """
+    ydl_opts = {
+        'skip_download': True,
+        'getcomments': True,
+        'extractor_args': {'youtube': {
+            'comment_sort': ['new'],
+            'max_comments': [str(max_comments), 'all', 'all', 'all']
+        }},
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+
+    known_ids = set(known_ids)
+    cutoff = since_timestamp - REFRESH_TIMESTAMP_SLACK if since_timestamp else 0
+    new_comments = [c for c in (info.get('comments') or [])
+                    if c.get('id') not in known_ids and (not c.get('timestamp') or c['timestamp'] >= cutoff)]
+    print(f"   Fetched {len(info.get('comments') or [])} recent comments, {len(new_comments)} new.")
+    return new_comments
+
+
 if __name__ == "__main__":
     link = "https://www.youtube.com/watch?v=mqXovE-n9EA&t=362s"
     download_and_analyze(link)
\ No newline at end of file